@@ -0,0 +1,314 @@
+import os
+import json
+import math
+import time
+import logging
+import threading
+from collections import defaultdict, deque
+import requests
+from bourstad.atomic import write_json_atomic, file_lock
+from bourstad.universe import QuoteRecord
+from bourstad.analyzer import NEAR_LOW, APPROACHING_LOW, NEAR_HIGH, APPROACHING_HIGH, AVERAGE_PRICE_BAND
+
+ALERTS_FILE = "data/alerts.jsonl"
+# Which rules fired and when, so later runs and other processes do not fire them again
+ALERTS_STATE_FILE = "data/alerts_state.json"
+
+# Rules registered under this symbol are checked against every quote
+ANY_SYMBOL = "*"
+
+# A triggered rule re-arms once the price is this fraction back past its
+# threshold, so a price hovering around the threshold does not fire again and again
+HYSTERESIS = 0.02
+# Minimum seconds between two events of the same rule and symbol
+COOLDOWN = 3600
+
+WEBHOOK_TIMEOUT = 5
+MEMORY_EVENTS = 200
+
+class Rule:
+    """
+    Fires when a quote's current price crosses factor x a reference price:
+    a fixed value (e.g. the average price of a holding) or another field of
+    the same quote (e.g. its 52-week low). While it is triggered, the rules
+    it suppresses (weaker versions of itself) send no event for the symbol.
+    """
+    def __init__(self, rule_id, symbol, direction, factor, message, reference=None, reference_field=None, hysteresis=HYSTERESIS,
+                 suppresses=()):
+        if direction not in ("above", "below"):
+            raise ValueError(f"Unknown direction {direction!r}; use 'above' or 'below'")
+        if (reference is None) == (reference_field is None):
+            raise ValueError("Give either a reference price or a reference field")
+        self.rule_id = rule_id
+        self.symbol = symbol
+        self.direction = direction
+        self.factor = factor
+        self.message = message
+        self.reference = reference
+        self.reference_field = reference_field
+        self.hysteresis = hysteresis
+        self.suppresses = tuple(suppresses)
+
+    def threshold(self, quote):
+        reference = self.reference if self.reference is not None else getattr(quote, self.reference_field)
+        if reference is None or math.isnan(reference) or reference == 0:
+            return math.nan
+        return reference * self.factor
+
+    def triggered(self, price, threshold):
+        return price <= threshold if self.direction == "below" else price >= threshold
+
+    def rearmed(self, price, threshold):
+        if self.direction == "below":
+            return price > threshold * (1 + self.hysteresis)
+        return price < threshold * (1 - self.hysteresis)
+
+def universe_rules():
+    """
+    The 52-week low/high thresholds of analyze_stocks, checked against every quote.
+    """
+    return [
+        Rule("near-low", ANY_SYMBOL, "below", NEAR_LOW, "Strong Buy - Near 52-week low.", reference_field="low_52_week",
+             suppresses=["approaching-low"]),
+        Rule("approaching-low", ANY_SYMBOL, "below", APPROACHING_LOW, "Buy - Approaching 52-week low.", reference_field="low_52_week"),
+        Rule("near-high", ANY_SYMBOL, "above", NEAR_HIGH, "Strong Sell - Near 52-week high.", reference_field="high_52_week",
+             suppresses=["approaching-high"]),
+        Rule("approaching-high", ANY_SYMBOL, "above", APPROACHING_HIGH, "Sell - Approaching 52-week high.", reference_field="high_52_week"),
+    ]
+
+def holding_rules(owned_securities):
+    """
+    The average-price thresholds of analyze_owned_stocks, one pair per holding.
+    """
+    rules = []
+    for owned in owned_securities:
+        symbol = owned.get("Symbol")
+        average_price = owned.get("Average Price") or 0
+        if not symbol or not average_price:
+            continue
+        rules.append(Rule("holding-above-average", symbol, "above", 1 + AVERAGE_PRICE_BAND,
+                          "Sell - Current price is significantly higher than average price.", reference=average_price))
+        rules.append(Rule("holding-below-average", symbol, "below", 1 - AVERAGE_PRICE_BAND,
+                          "Buy more - Current price is significantly lower than average price.", reference=average_price))
+    return rules
+
+class AlertEngine:
+    """
+    Checks each incoming quote against the rules of its symbol (and the
+    rules for every symbol) and sends an event to the sinks when a rule
+    fires. A rule fires once per crossing: it has to re-arm past its
+    hysteresis band, and then wait out the cooldown, before firing again.
+
+    With a state_path, which rules fired and when is loaded from and saved to
+    that file, shared by run_all, the workers and the dashboard.
+    """
+    def __init__(self, rules=(), sinks=(), cooldown=COOLDOWN, clock=time.time, state_path=None):
+        self.sinks = list(sinks)
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state_path = state_path
+        self._rules = defaultdict(dict)
+        # (rule id, symbol) pairs that fired and have not re-armed yet
+        self._fired = set()
+        self._last_event = {}
+        # Pairs changed since the last save
+        self._dirty = set()
+        self._lock = threading.Lock()
+        for rule in rules:
+            self.add_rule(rule)
+        if state_path:
+            self._fired, self._last_event = self._read_state()
+
+    def _read_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return set(), {}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable alert state {self.state_path}: {e}")
+            return set(), {}
+        fired = {tuple(key) for key in state.get("fired", [])}
+        last_event = {(rule_id, symbol): timestamp for rule_id, symbol, timestamp in state.get("last_event", [])}
+        return fired, last_event
+
+    def save_state(self):
+        """
+        Merge the pairs this engine changed into the state file, keeping
+        those changed by other processes meanwhile.
+        """
+        if not self.state_path:
+            return
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            changes = {key: (key in self._fired, self._last_event.get(key)) for key in dirty}
+        if not changes:
+            return
+        with file_lock(self.state_path):
+            fired, last_event = self._read_state()
+            for key, (is_fired, timestamp) in changes.items():
+                if is_fired:
+                    fired.add(key)
+                else:
+                    fired.discard(key)
+                if timestamp is not None:
+                    last_event[key] = timestamp
+            write_json_atomic(self.state_path, {
+                "fired": sorted(fired),
+                "last_event": sorted([rule_id, symbol, timestamp] for (rule_id, symbol), timestamp in last_event.items()),
+            })
+
+    def add_rule(self, rule):
+        with self._lock:
+            self._rules[rule.symbol][rule.rule_id] = rule
+
+    def remove_rules(self, prefix):
+        """
+        Drop the rules whose id starts with prefix, for every symbol.
+        """
+        with self._lock:
+            for rules in self._rules.values():
+                for rule_id in [rule_id for rule_id in rules if rule_id.startswith(prefix)]:
+                    del rules[rule_id]
+
+    def set_holdings(self, owned_securities):
+        """
+        Replace the holding rules with those of the current holdings.
+        """
+        self.remove_rules("holding-")
+        for rule in holding_rules(owned_securities):
+            self.add_rule(rule)
+
+    def rules_for(self, symbol):
+        with self._lock:
+            return list(self._rules.get(symbol, {}).values()) + list(self._rules.get(ANY_SYMBOL, {}).values())
+
+    def on_quote(self, quote):
+        """
+        Evaluate a new quote.
+        Args:
+            quote (QuoteRecord | dict): The quote; dicts use display columns ("Symbol", "Current Price", ...).
+
+        Returns:
+            list: The events sent to the sinks.
+        """
+        if isinstance(quote, dict):
+            quote = QuoteRecord.from_dict(quote)
+        price = quote.current_price
+        if math.isnan(price) or price == 0:
+            return []
+
+        events = []
+        now = self.clock()
+        rules = [(rule, rule.threshold(quote)) for rule in self.rules_for(quote.symbol)]
+        rules = [(rule, threshold) for rule, threshold in rules if not math.isnan(threshold)]
+        suppressed = {weaker for rule, threshold in rules if rule.triggered(price, threshold) for weaker in rule.suppresses}
+        for rule, threshold in rules:
+            key = (rule.rule_id, quote.symbol)
+            with self._lock:
+                if key in self._fired:
+                    if rule.rearmed(price, threshold):
+                        self._fired.discard(key)
+                        self._dirty.add(key)
+                    continue
+                if not rule.triggered(price, threshold):
+                    continue
+                self._fired.add(key)
+                self._dirty.add(key)
+                # The weaker rule counts as fired, so it stays quiet until the price moves back out
+                if rule.rule_id in suppressed or now - self._last_event.get(key, -math.inf) < self.cooldown:
+                    continue
+                self._last_event[key] = now
+            events.append({
+                "time": now,
+                "rule": rule.rule_id,
+                "symbol": quote.symbol,
+                "name": quote.name,
+                "price": price,
+                "threshold": threshold,
+                "message": f"{quote.name} ({quote.symbol}): {rule.message}",
+            })
+
+        if self._dirty:
+            self.save_state()
+        for event in events:
+            logging.info(f"Alert: {event['message']}")
+            for sink in self.sinks:
+                try:
+                    sink.send(event)
+                except Exception as e:
+                    logging.error(f"Alert sink {type(sink).__name__} failed: {e}")
+        return events
+
+class JsonlSink:
+    """
+    Appends events to a JSON Lines file.
+    """
+    def __init__(self, path=ALERTS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def send(self, event):
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as file:
+            file.write(line)
+
+class WebhookSink:
+    """
+    POSTs each event as JSON to a URL.
+    """
+    def __init__(self, url, timeout=WEBHOOK_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, event):
+        response = requests.post(self.url, json=event, timeout=self.timeout)
+        response.raise_for_status()
+
+class MemorySink:
+    """
+    Keeps the latest events in memory, for the dashboard's notification panel.
+    """
+    def __init__(self, maxlen=MEMORY_EVENTS):
+        self.events = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def send(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    def latest(self, count=None):
+        """
+        Events, newest first.
+        """
+        with self._lock:
+            events = list(self.events)[::-1]
+        return events[:count] if count else events
+
+    def since(self, timestamp):
+        """
+        Events newer than a timestamp, oldest first.
+        """
+        with self._lock:
+            return [event for event in self.events if event["time"] > timestamp]
+
+def default_sinks():
+    """
+    The JSON Lines file, plus the webhook in BOURSTAD_ALERT_WEBHOOK if set.
+    """
+    sinks = [JsonlSink()]
+    if os.getenv("BOURSTAD_ALERT_WEBHOOK"):
+        sinks.append(WebhookSink(os.environ["BOURSTAD_ALERT_WEBHOOK"]))
+    return sinks
+
+def read_alerts(path=ALERTS_FILE, limit=None):
+    """
+    Events saved by JsonlSink, newest first.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as file:
+        events = [json.loads(line) for line in file if line.strip()]
+    events.reverse()
+    return events[:limit] if limit else events
@@ -1,48 +1,82 @@
+import numpy as np
+from bourstad.universe import Universe
+from bourstad.profiling import profiled
+
+# Price as a multiple of the 52-week low/high at which recommendations change
+NEAR_LOW = 1.1
+APPROACHING_LOW = 1.2
+NEAR_HIGH = 0.9
+APPROACHING_HIGH = 0.8
+
+# How far an owned security's price may move from its average price before acting
+AVERAGE_PRICE_BAND = 0.2
+
+# Slider score of each proximity signal
+SIGNAL_SCORES = {"Strong Buy": 100, "Buy": 75, "Hold": 50, "Neutral": 50, "Sell": 25, "Strong Sell": 0}
+
+def _classify(universe):
+    """
+    Proximity and fundamentals recommendation of every row of a universe.
+    """
+    price = universe.column("current_price")
+    high = universe.column("high_52_week")
+    low = universe.column("low_52_week")
+    pe_ratio = universe.column("pe_ratio")
+    dividend_yield = universe.column("dividend_yield")
+
+    # Missing (NaN) or zero prices mean there is nothing to compare against
+    with np.errstate(invalid="ignore"):
+        insufficient = np.isnan(price) | np.isnan(high) | np.isnan(low) | (price == 0) | (high == 0) | (low == 0)
+        proximity = np.select(
+            [insufficient, price <= low * NEAR_LOW, price <= low * APPROACHING_LOW, price >= high * NEAR_HIGH, price >= high * APPROACHING_HIGH],
+            ["Neutral - Insufficient data.",
+             "Strong Buy - Near 52-week low.",
+             "Buy - Approaching 52-week low.",
+             "Strong Sell - Near 52-week high.",
+             "Sell - Approaching 52-week high."],
+            default="Hold - Trading within a stable range.",
+        )
+        fundamentals = np.select(
+            [insufficient, (pe_ratio < 15) & (dividend_yield > 0.03), pe_ratio > 30],
+            ["", "Buy - Strong fundamentals (Low P/E and High Dividend).", "Sell - Overvalued (High P/E)."],
+            default="",
+        )
+    return proximity, fundamentals
+
 def analyze_stocks(stock_data):
     """
     Analyze all stocks and generate recommendations for non-owned securities.
     Args:
-        stock_data (list): List of stock data with metrics.
+        stock_data (Universe | list | DataFrame): Stock data with metrics.
 
     Returns:
         list: Recommendations for non-owned securities.
     """
-    recommendations = []
-    for stock in stock_data:
-        symbol = stock.get("Symbol", "N/A")
-        name = stock.get("Name", "N/A")
-        current_price = stock.get("Current Price", 0)
-        high_52_week = stock.get("52-Week High", 0)
-        low_52_week = stock.get("52-Week Low", 0)
-        pe_ratio = stock.get("P/E Ratio", 0)
-        dividend_yield = stock.get("Dividend Yield", 0)
+    return [line for result in recommendations_by_symbol(stock_data) for line in result[1]["lines"]]
 
-        # Ensure data is valid
-        if current_price == 0 or high_52_week == 0 or low_52_week == 0:
-            recommendations.append(f"{name} ({symbol}): Neutral - Insufficient data.")
-            continue
-
-        # Analyze proximity to 52-week highs/lows
-        if current_price <= low_52_week * 1.1:
-            recommendations.append(f"{name} ({symbol}): Strong Buy - Near 52-week low.")
-        elif current_price <= low_52_week * 1.2:
-            recommendations.append(f"{name} ({symbol}): Buy - Approaching 52-week low.")
-        elif current_price >= high_52_week * 0.9:
-            recommendations.append(f"{name} ({symbol}): Strong Sell - Near 52-week high.")
-        elif current_price >= high_52_week * 0.8:
-            recommendations.append(f"{name} ({symbol}): Sell - Approaching 52-week high.")
-        else:
-            recommendations.append(f"{name} ({symbol}): Hold - Trading within a stable range.")
-
-        # Fundamental analysis
-        if pe_ratio < 15 and dividend_yield > 0.03:
-            recommendations.append(f"{name} ({symbol}): Buy - Strong fundamentals (Low P/E and High Dividend).")
-        elif pe_ratio > 30:
-            recommendations.append(f"{name} ({symbol}): Sell - Overvalued (High P/E).")
+@profiled
+def recommendations_by_symbol(stock_data):
+    """
+    analyze_stocks, grouped by security.
+    Returns:
+        list: (symbol, {"lines", "signal", "score"}) pairs in the order of stock_data,
+        where signal is the proximity recommendation ("Strong Buy", ..., "Neutral").
+    """
+    universe = Universe.from_records(stock_data)
+    proximity, fundamentals = _classify(universe)
 
-    return recommendations
+    results = []
+    for row, symbol in enumerate(universe.symbols):
+        name = universe.names[row]
+        lines = [f"{name} ({symbol}): {proximity[row]}"]
+        if fundamentals[row]:
+            lines.append(f"{name} ({symbol}): {fundamentals[row]}")
+        signal = str(proximity[row]).split(" - ")[0]
+        results.append((symbol, {"lines": lines, "signal": signal, "score": SIGNAL_SCORES[signal]}))
+    return results
 
 
+@profiled
 def analyze_owned_stocks(owned_securities, recommendations):
     """
     Analyze owned stocks and decide whether to buy more, sell, or hold.
@@ -74,9 +108,9 @@ def analyze_owned_stocks(owned_securities, recommendations):
             decisions.append(f"{name} ({symbol}): Consider selling - Negative gains ({gains_losses}).")
 
         # Compare current price to average price
-        if current_price > average_price * 1.2:
+        if current_price > average_price * (1 + AVERAGE_PRICE_BAND):
             decisions.append(f"{name} ({symbol}): Sell - Current price is significantly higher than average price.")
-        elif current_price < average_price * 0.8:
+        elif current_price < average_price * (1 - AVERAGE_PRICE_BAND):
             decisions.append(f"{name} ({symbol}): Buy more - Current price is significantly lower than average price.")
         else:
             decisions.append(f"{name} ({symbol}): Hold - Current price is close to average price.")
@@ -0,0 +1,206 @@
+import os
+import gzip
+import json
+import math
+import hashlib
+import logging
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+from bourstad.scraper import fetch_and_parse_stocks
+from bourstad.portfolio import Portfolio
+from bourstad.services import get_service
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# Responses smaller than this are not worth compressing
+MIN_GZIP_SIZE = 1024
+
+# How long each endpoint's responses are reused, in seconds
+TTLS = {
+    "/quotes": 60,
+    "/recommendations": 300,
+    "/highlights": 3600,
+    "/portfolio": 30,
+}
+
+MAX_SYMBOLS = 100
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def to_json_value(value):
+    """
+    Make values JSON-safe: NaN becomes null, NumPy scalars become Python numbers,
+    DataFrames become lists of records.
+    """
+    if isinstance(value, pd.DataFrame):
+        return [to_json_value(record) for record in value.to_dict(orient="records")]
+    if isinstance(value, dict):
+        return {str(key): to_json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (date, pd.Timestamp)):
+        return value.isoformat()
+    return value
+
+def quote_to_json(quote):
+    return {key: (None if value == "N/A" else value) for key, value in quote.to_dict().items()}
+
+class BourstadApi:
+    """
+    Endpoint implementations. Fetches go through the process-wide FetchService,
+    so the API and dashboard sessions in the same process share one cache.
+    """
+    def __init__(self, email=None, password=None, service=None):
+        self.email = email or os.getenv('BOURSTAD_USERNAME')
+        self.password = password or os.getenv('BOURSTAD_PASSWORD')
+        self.service = service or get_service()
+        self._session = None
+
+    def cached(self, key, ttl, compute):
+        """
+        Reuse a computed payload for ttl seconds; concurrent requests share one computation.
+        """
+        return self.service.cache.get_or_compute(("api",) + key, ttl, compute)
+
+    def quotes(self, params):
+        symbols = [symbol for value in params.get("symbols", []) for symbol in value.split(",") if symbol]
+        if not symbols:
+            raise ApiError(400, "Pass one or more symbols, e.g. /quotes?symbols=AAPL,VNP:CA")
+        if len(symbols) > MAX_SYMBOLS:
+            raise ApiError(400, f"At most {MAX_SYMBOLS} symbols per request")
+
+        def compute():
+            quotes = {symbol: self.service.quote(symbol) for symbol in symbols}
+            return {
+                "quotes": [quote_to_json(quote) for quote in quotes.values() if quote],
+                "missing": [symbol for symbol, quote in quotes.items() if not quote],
+            }
+        return self.cached(("quotes", tuple(sorted(symbols))), TTLS["/quotes"], compute)
+
+    def recommendations(self, params):
+        def compute():
+            return {"recommendations": self.service.recommendations()}
+        return self.cached(("recommendations",), TTLS["/recommendations"], compute)
+
+    def highlights(self, params):
+        value = params.get("date", [None])[0]
+        try:
+            selected_date = pd.Timestamp(value).date() if value else pd.Timestamp.today().date()
+        except ValueError:
+            raise ApiError(400, f"Invalid date: {value}")
+
+        def compute():
+            rankings = self.service.highlights(selected_date)
+            if rankings is None:
+                raise ApiError(404, f"No highlights available for {selected_date}")
+            return {"date": selected_date.isoformat(), **rankings}
+        return self.cached(("highlights", selected_date), TTLS["/highlights"], compute)
+
+    def _login(self):
+        if not self.email or not self.password:
+            raise ApiError(503, "Portfolio requires BOURSTAD_USERNAME and BOURSTAD_PASSWORD")
+        _, suid, aut = fetch_and_parse_stocks(self.email, self.password)
+        if not suid or not aut:
+            raise ApiError(502, "Login to Bourstad failed")
+        self._session = (suid, aut)
+        return self._session
+
+    def portfolio(self, params):
+        def compute():
+            suid, aut = self._session or self._login()
+            owned = self.service.owned_securities(suid, aut)
+            if not owned:
+                # The session may have expired; log in again once
+                suid, aut = self._login()
+                owned = self.service.owned_securities(suid, aut)
+            portfolio = Portfolio(owned)
+            return {"summary": portfolio.summary(), "positions": portfolio.positions_frame()}
+        return self.cached(("portfolio", self.email), TTLS["/portfolio"], compute)
+
+    def health(self, params):
+        return {"status": "ok"}
+
+ROUTES = {
+    "/quotes": BourstadApi.quotes,
+    "/recommendations": BourstadApi.recommendations,
+    "/highlights": BourstadApi.highlights,
+    "/portfolio": BourstadApi.portfolio,
+    "/health": BourstadApi.health,
+}
+
+class ApiHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between requests
+    protocol_version = "HTTP/1.1"
+    server_version = "BourstadAPI/1.0"
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        route = ROUTES.get(parsed.path.rstrip("/") or "/")
+        if route is None:
+            self.send_json(404, {"error": f"Unknown endpoint {parsed.path}", "endpoints": sorted(ROUTES)})
+            return
+        try:
+            payload = route(self.server.api, parse_qs(parsed.query))
+            self.send_json(200, payload, max_age=TTLS.get(parsed.path, 0))
+        except ApiError as e:
+            self.send_json(e.status, {"error": str(e)})
+        except Exception as e:
+            logging.error(f"Error handling {self.path}: {e}")
+            self.send_json(500, {"error": "Internal server error"})
+
+    def send_json(self, status, payload, max_age=0):
+        body = json.dumps(to_json_value(payload), ensure_ascii=False).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+        if status == 200 and etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"max-age={max_age}")
+        self.send_header("Vary", "Accept-Encoding")
+        if len(body) >= MIN_GZIP_SIZE and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=6)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.info(f"API {self.address_string()} {format % args}")
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, api=None):
+        super().__init__(address, ApiHandler)
+        self.api = api or BourstadApi()
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, api=None):
+    """
+    Run the API server until interrupted.
+    """
+    server = ApiServer((host, port), api)
+    print(f"Serving the Bourstad API on http://{host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,173 @@
+import io
+import os
+import gzip
+import time
+import sqlite3
+import hashlib
+import logging
+from contextlib import closing
+
+# Archive database kept inside the pages directory (data/stocks by default)
+ARCHIVE_FILE = "pages.sqlite"
+
+COMPRESSION_LEVEL = 6
+CHUNK_SIZE = 64 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    digest TEXT NOT NULL REFERENCES blobs (digest)
+);
+CREATE INDEX IF NOT EXISTS versions_symbol ON versions (symbol, fetched);
+"""
+
+def archive_path(directory):
+    return os.path.join(directory, ARCHIVE_FILE)
+
+class PageArchive:
+    """
+    Raw Transaction pages, gzip-compressed and stored once per distinct
+    content (sha256), with the list of versions fetched for each symbol.
+
+    All pages live in one SQLite file, so a parse run reads them in order
+    from a single file, and a page that did not change since the last fetch
+    only costs a version row.
+    """
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def put(self, symbol, page, fetched=None):
+        """
+        Archive a version of a symbol's page.
+        Args:
+            symbol (str): Bourstad symbol.
+            page (str): Page HTML.
+            fetched (float): Fetch time as a Unix timestamp; defaults to now.
+
+        Returns:
+            str: The content digest. Fetching the same content again records
+            the fetch time but stores no new blob.
+        """
+        raw = page.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        fetched = fetched if fetched is not None else time.time()
+        with closing(self._connect()) as conn, conn:
+            latest = conn.execute("SELECT digest, fetched FROM versions WHERE symbol = ? ORDER BY fetched DESC, id DESC LIMIT 1",
+                                  (symbol,)).fetchone()
+            # Re-importing the same page adds nothing; a later fetch of it is recorded
+            if latest and latest[0] == digest and latest[1] >= fetched:
+                return digest
+            if conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone() is None:
+                conn.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?, ?)",
+                             (digest, len(raw), gzip.compress(raw, COMPRESSION_LEVEL, mtime=0)))
+            conn.execute("INSERT INTO versions (symbol, fetched, digest) VALUES (?, ?, ?)",
+                         (symbol, fetched, digest))
+        return digest
+
+    def versions(self, symbol):
+        """
+        (fetched, digest) of every archived version of a symbol, oldest first.
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT fetched, digest FROM versions WHERE symbol = ? ORDER BY fetched, id", (symbol,)).fetchall()
+
+    def latest(self, symbol, at=None):
+        """
+        Digest of the symbol's newest page, or of the newest one fetched at or before a timestamp.
+        """
+        sql = "SELECT digest FROM versions WHERE symbol = ?" + (" AND fetched <= ?" if at is not None else "")
+        with closing(self._connect()) as conn:
+            row = conn.execute(sql + " ORDER BY fetched DESC, id DESC LIMIT 1", (symbol,) if at is None else (symbol, at)).fetchone()
+        return row[0] if row else None
+
+    def fetched_times(self):
+        """
+        symbol -> fetch time of its newest archived page.
+        """
+        with closing(self._connect()) as conn:
+            return dict(conn.execute("SELECT symbol, MAX(fetched) FROM versions GROUP BY symbol"))
+
+    def symbols(self):
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT symbol FROM versions ORDER BY symbol")]
+
+    def open(self, digest):
+        """
+        Text stream decompressing a page as it is read.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT data FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        return _page_stream(row[0])
+
+    def read(self, symbol, at=None):
+        """
+        HTML of a symbol's newest page (or the newest one at a timestamp), or None if it was never archived.
+        """
+        digest = self.latest(symbol, at)
+        if digest is None:
+            return None
+        with self.open(digest) as stream:
+            return stream.read()
+
+    def iter_latest(self, symbols=None):
+        """
+        Stream the newest page of each symbol, in storage order.
+        Yields:
+            tuple: (symbol, text stream) pairs; each stream is only valid until the next one is yielded.
+        """
+        wanted = set(symbols) if symbols is not None else None
+        with closing(self._connect()) as conn:
+            rows = conn.execute("""
+                SELECT v.symbol, b.data FROM versions v JOIN blobs b ON b.digest = v.digest
+                WHERE v.id = (SELECT id FROM versions WHERE symbol = v.symbol ORDER BY fetched DESC, id DESC LIMIT 1)
+                ORDER BY b.rowid
+            """)
+            for symbol, data in rows:
+                if wanted is not None and symbol not in wanted:
+                    continue
+                with _page_stream(data) as stream:
+                    yield symbol, stream
+
+    def import_directory(self, directory):
+        """
+        Archive the loose <symbol>.html pages of a directory, stamped with their modification time.
+        Returns:
+            int: Number of pages imported.
+        """
+        count = 0
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".html"):
+                continue
+            filepath = os.path.join(directory, filename)
+            with open(filepath, "r", encoding="utf-8") as file:
+                self.put(filename[:-len(".html")], file.read(), os.path.getmtime(filepath))
+            count += 1
+        logging.info(f"Imported {count} page(s) from {directory} into {self.path}.")
+        return count
+
+    def stats(self):
+        """
+        Versions, distinct pages, and their raw and compressed sizes in bytes.
+        """
+        with closing(self._connect()) as conn:
+            versions, symbols = conn.execute("SELECT COUNT(*), COUNT(DISTINCT symbol) FROM versions").fetchone()
+            blobs, raw, stored = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()
+        return {"symbols": symbols, "versions": versions, "pages": blobs, "raw_bytes": raw, "stored_bytes": stored}
+
+def _page_stream(data):
+    return io.TextIOWrapper(io.BufferedReader(gzip.GzipFile(fileobj=io.BytesIO(data), mode="rb"), CHUNK_SIZE), encoding="utf-8")
@@ -0,0 +1,66 @@
+import os
+import json
+import tempfile
+import threading
+import contextlib
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_thread_locks = {}
+_thread_locks_lock = threading.Lock()
+
+def write_text_atomic(path, text, encoding="utf-8"):
+    """
+    Write a file so readers only ever see the old or the new content.
+    Each writer uses its own temporary file in the same directory, so concurrent
+    writers of the same path never interleave; the last replace wins.
+    Args:
+        path (str): Destination file.
+        text (str): Content to write.
+        encoding (str): Text encoding.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+def write_json_atomic(path, data, **kwargs):
+    """
+    json.dump data to path atomically; keyword arguments go to json.dumps.
+    """
+    write_text_atomic(path, json.dumps(data, **kwargs))
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive lock on path + ".lock", shared by every process using it,
+    around a read-modify-write of path. Without fcntl (Windows) only the
+    threads of this process are serialized.
+    Args:
+        path (str): The file being protected.
+    """
+    lock_path = os.path.abspath(path) + ".lock"
+    with _thread_locks_lock:
+        thread_lock = _thread_locks.setdefault(lock_path, threading.Lock())
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
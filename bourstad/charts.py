@@ -0,0 +1,50 @@
+import math
+import numpy as np
+import pandas as pd
+
+# Points sent to the browser per chart; more than a chart is wide is wasted payload
+MAX_POINTS = 500
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling: keep the points that best
+    preserve the visual shape of a line.
+    Args:
+        x (ndarray): Increasing x values as floats.
+        y (ndarray): y values, without NaNs.
+        threshold (int): Number of points to keep.
+
+    Returns:
+        ndarray: Indices of the kept points, first and last included.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    every = (n - 2) / (threshold - 2)
+    selected = 0
+    for bucket in range(threshold - 2):
+        start = int(math.floor(bucket * every)) + 1
+        end = int(math.floor((bucket + 1) * every)) + 1
+        next_end = min(int(math.floor((bucket + 2) * every)) + 1, n)
+
+        # Average of the next bucket is the third corner of the triangle
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+        areas = np.abs((x[selected] - average_x) * (y[start:end] - y[selected])
+                       - (x[selected] - x[start:end]) * (average_y - y[selected]))
+        selected = start + int(areas.argmax())
+        indices[bucket + 1] = selected
+    return indices
+
+def downsample_series(series, threshold=MAX_POINTS):
+    """
+    Downsample a time-indexed Series with LTTB; short series are returned unchanged.
+    """
+    series = series.dropna()
+    if len(series) <= threshold:
+        return series
+    x = pd.DatetimeIndex(series.index).asi8.astype(np.float64)
+    return series.iloc[lttb(x, series.to_numpy(dtype=np.float64), threshold)]
@@ -1,12 +1,26 @@
 import streamlit as st
 import pandas as pd
 import os
+import sys
 import json
+import math
 import time
-import yfinance as yf  # Add this import
-from scraper import fetch_and_parse_stocks, fetch_owned_securities, fetch_with_cache, fetch_highlights_data, fetch_stock_data, fetch_batch_stock_data
-from bs4 import BeautifulSoup
-import requests
+from concurrent.futures import ThreadPoolExecutor
+
+# `streamlit run bourstad/dashboard.py` only puts bourstad/ on the path; add the
+# project root so the dashboard shares the same bourstad modules as the CLI.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bourstad.scraper import fetch_and_parse_stocks, fetch_stock_detail, stored_pages, parse_stock_page, map_bourstad_to_yfinance, STOCKS_DIR
+from bourstad.archive import PageArchive, archive_path
+from bourstad.portfolio import Portfolio, returns_from_prices
+from bourstad.highlights import compute_rankings, range_highlights, period_changes, period_movers
+from bourstad.screener import ScreenerError, available_columns, RANK_COLUMNS
+from bourstad.services import get_service
+from bourstad.holdings import HoldingsPoller, is_price_only
+from bourstad.securities import SecurityIndex, PAGE_SIZES
+from bourstad.alerts import AlertEngine, MemorySink, read_alerts
+from bourstad.profiling import Profiler, profiling_enabled
 
 CACHE_DIR = "cache"
 os.makedirs(CACHE_DIR, exist_ok=True)
@@ -17,7 +31,6 @@ st.set_page_config(page_title="Bourstad Assistant", page_icon="📈")
 # Filter valid symbols
 def filter_valid_symbols(symbols):
     # Use the centralized map_bourstad_to_yfinance function from scraper.py
-    from scraper import map_bourstad_to_yfinance
     valid_symbols = []
     for symbol in symbols:
         mapped_symbol = map_bourstad_to_yfinance(symbol)
@@ -25,110 +38,12 @@ def filter_valid_symbols(symbols):
             valid_symbols.append(mapped_symbol)
     return valid_symbols
 
-# Fetch securities from Bourstad or load from a local file if login is not available
-def get_bourstad_securities():
-    """
-    Fetch securities from Bourstad or load from a local file if login is not available.
-    Returns:
-        DataFrame: DataFrame containing stock data.
-    """
-    try:
-        # Attempt to fetch stocks using login credentials
-        email = os.getenv('BOURSTAD_USERNAME')
-        password = os.getenv('BOURSTAD_PASSWORD')
-        if email and password:
-            stocks, _, _ = fetch_and_parse_stocks(email, password)
-        else:
-            raise ValueError("No login credentials provided. Falling back to local data.")
-
-    except Exception as e:
-        print(f"Error fetching stocks: {e}")
-        # Fallback: Load stocks from a local file
-        stocks = []
-        extracted_stocks_file = "data/extracted_stocks.txt"
-        if os.path.exists(extracted_stocks_file):
-            with open(extracted_stocks_file, "r", encoding="utf-8") as file:
-                for line in file:
-                    parts = line.split(", ")
-                    if len(parts) > 1 and "ID: " in parts[0]:
-                        stock_id = parts[0].replace("ID: ", "").strip()
-                        stock_name = parts[1].replace("Name: ", "").strip()
-                        if stock_id:  # Skip empty or invalid symbols
-                            stocks.append({"id": stock_id, "name": stock_name})
-        else:
-            print(f"Local stock data file '{extracted_stocks_file}' not found.")
-
-    # Remove the 0th symbol (nonexistent)
-    stocks = [stock for stock in stocks if stock['id'] and stock['id'] != ""]
-    return pd.DataFrame(stocks)
-
 # Generate a recommendation based on real-time data
 def generate_recommendation(real_time_data):
-    current_price = real_time_data.get("Current Price", "N/A")
-    high_52_week = real_time_data.get("52-Week High", "N/A")
-    low_52_week = real_time_data.get("52-Week Low", "N/A")
-
-    # Ensure data is valid
-    if current_price == "N/A" or high_52_week == "N/A" or low_52_week == "N/A":
-        return "Neutral", 50  # Default to Neutral
-
-    # Calculate recommendation based on proximity to 52-week high/low
-    if current_price <= low_52_week * 1.1:
-        return "Strong Buy", 100
-    elif current_price <= low_52_week * 1.2:
-        return "Buy", 75
-    elif current_price >= high_52_week * 0.9:
-        return "Strong Sell", 0
-    elif current_price >= high_52_week * 0.8:
-        return "Sell", 25
-    else:
-        return "Hold", 50
-
-# Analyze stocks and generate recommendations
-def analyze_stocks(stock_data):
-    """
-    Analyze all stocks and generate recommendations for non-owned securities.
-    Args:
-        stock_data (list): List of stock data with metrics.
-
-    Returns:
-        list: Recommendations for non-owned securities.
-    """
-    recommendations = []
-    for stock in stock_data:
-        # Safely access keys with default values
-        symbol = stock.get("Symbol", "Unknown Symbol")
-        name = stock.get("Name", "Unknown Name")
-        current_price = stock.get("Current Price", 0)
-        high_52_week = stock.get("52-Week High", 0)
-        low_52_week = stock.get("52-Week Low", 0)
-        pe_ratio = stock.get("P/E Ratio", 0)
-        dividend_yield = stock.get("Dividend Yield", 0)
-
-        # Ensure data is valid
-        if current_price == 0 or high_52_week == 0 or low_52_week == 0:
-            recommendations.append(f"{name} ({symbol}): Neutral - Insufficient data.")
-            continue
-
-        # Analyze proximity to 52-week highs/lows
-        if current_price <= low_52_week * 1.1:
-            recommendations.append(f"{name} ({symbol}): Strong Buy - Near 52-week low.")
-        elif current_price <= low_52_week * 1.2:
-            recommendations.append(f"{name} ({symbol}): Buy - Approaching 52-week low.")
-        elif current_price >= high_52_week * 0.9:
-            recommendations.append(f"{name} ({symbol}): Strong Sell - Near 52-week high.")
-        elif current_price >= high_52_week * 0.8:
-            recommendations.append(f"{name} ({symbol}): Sell - Approaching 52-week high.")
-        else:
-            recommendations.append(f"{name} ({symbol}): Hold - Trading within a stable range.")
-
-        # Fundamental analysis
-        if pe_ratio < 15 and dividend_yield > 0.03:
-            recommendations.append(f"{name} ({symbol}): Buy - Strong fundamentals (Low P/E and High Dividend).")
-        elif pe_ratio > 30:
-            recommendations.append(f"{name} ({symbol}): Sell - Overvalued (High P/E).")
-
-    return recommendations
+    # Memoized per symbol by the shared fetch service, keyed by the quote's version
+    if isinstance(real_time_data, pd.Series):
+        real_time_data = real_time_data.to_dict()
+    return get_fetch_service().signal(real_time_data)
 
 # Analyze owned stocks and generate decisions
 def analyze_owned_stocks(owned_securities, recommendations):
@@ -139,6 +54,90 @@ def analyze_owned_stocks(owned_securities, recommendations):
         decisions.append(f"{owned['Name']} ({symbol}): {recommendation}")
     return decisions
 
+@st.cache_resource
+def get_fetch_service():
+    """
+    One fetch service per process: every session shares its caches, and
+    concurrent sessions asking for the same data share one in-flight fetch.
+    """
+    return get_service()
+
+service = get_fetch_service()
+# Alerts raised from here on are shown to this session
+st.session_state.setdefault('alerts_seen', time.time())
+
+@st.cache_resource
+def get_executor():
+    """
+    Shared worker threads for fetches that should not block rendering.
+    """
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="dashboard-fetch")
+
+def get_security_index():
+    """
+    Search index over this session's securities list, built once per list.
+    """
+    if 'security_index' not in st.session_state:
+        st.session_state['security_index'] = SecurityIndex(st.session_state['stocks'])
+    return st.session_state['security_index']
+
+def apply_holdings_delta(delta, previous):
+    """
+    Holdings subscriber: reprice the session's Portfolio in place, or drop it
+    so it is rebuilt when a trade added, removed or resized a position.
+    """
+    portfolio = st.session_state.get('portfolio')
+    if portfolio is None:
+        return
+    if is_price_only(delta, previous):
+        for owned in delta["changed"]:
+            portfolio.update_quote(owned['Symbol'], owned['Current Price'])
+    else:
+        st.session_state['portfolio'] = None
+
+def alert_on_holdings(delta, previous):
+    """
+    Holdings subscriber: check repriced and new positions against the session's
+    holding rules. Their events stay in this session, out of the shared alerts.
+    """
+    alerts = st.session_state.get('holding_alerts')
+    poller = st.session_state.get('holdings_poller')
+    if alerts is None:
+        return
+    if poller is not None:
+        alerts.set_holdings(poller.holdings)
+    for owned in delta["added"] + delta["changed"]:
+        alerts.on_quote(owned)
+
+def get_holdings_poller(suid, aut):
+    """
+    One holdings poller per session, so each user only ever polls their own account.
+    """
+    poller = st.session_state.get('holdings_poller')
+    if poller is None or (poller.suid, poller.aut) != (suid, aut):
+        poller = HoldingsPoller(suid, aut)
+        st.session_state['holding_alerts'] = AlertEngine(sinks=[MemorySink()])
+        poller.subscribe(apply_holdings_delta)
+        poller.subscribe(alert_on_holdings)
+        st.session_state['holdings_poller'] = poller
+        st.session_state['portfolio'] = None
+    poller.poll()
+    return poller
+
+def get_portfolio(owned_securities):
+    """
+    Keep one Portfolio per session; holdings deltas update it in place between reruns.
+    """
+    portfolio = st.session_state.get('portfolio')
+    if portfolio is None:
+        portfolio = Portfolio(owned_securities)
+        end = pd.Timestamp.now()
+        symbols = [map_bourstad_to_yfinance(symbol) for symbol in portfolio.symbols]
+        panel = service.panel(symbols, end - pd.Timedelta(days=90), end)
+        portfolio.set_returns(returns_from_prices(panel, portfolio.symbols))
+        st.session_state['portfolio'] = portfolio
+    return portfolio
+
 def update_progress(current, total, message):
     """
     Update the progress bar and display a message.
@@ -155,17 +154,11 @@ def fetch_stock_details_with_progress(stocks, suid, aut):
     """
     Fetch stock details with a progress bar displayed on the dashboard.
     """
-    base_url = "https://bourstad.cirano.qc.ca/Transaction/Transaction"
-    os.makedirs('data/stocks', exist_ok=True)
+    archive = PageArchive(archive_path(STOCKS_DIR))
 
     total_stocks = len(stocks)
     for index, stock in enumerate(stocks):
-        symbol = stock['id']
-        url = f"{base_url}?suid={suid}&aut={aut}&Symbol={symbol}"
-        response = requests.get(url)
-        if response.status_code == 200:
-            with open(f"data/stocks/{symbol}.html", 'w', encoding='utf-8') as file:
-                file.write(response.text)
+        fetch_stock_detail(stock['id'], suid, aut, STOCKS_DIR, archive=archive)
         # Update the progress bar
         update_progress(index + 1, total_stocks, "Fetching stock details")
 
@@ -175,22 +168,13 @@ def parse_all_stocks_with_progress(directory):
     """
     Parse all stock files with a progress bar displayed on the dashboard.
     """
-    stocks_dir = directory
-    stock_files = [f for f in os.listdir(stocks_dir) if f.endswith('.html')]
-    total_files = len(stock_files)
+    symbols = set(PageArchive(archive_path(directory)).symbols())
+    symbols.update(f.replace('.html', '') for f in os.listdir(directory) if f.endswith('.html'))
+    total_files = len(symbols)
 
     all_stock_details = []
-    for index, filename in enumerate(stock_files):
-        filepath = os.path.join(stocks_dir, filename)
-        with open(filepath, 'r', encoding='utf-8') as file:
-            soup = BeautifulSoup(file, 'html.parser')
-            stock_details = {
-                'symbol': filename.replace('.html', ''),
-                'name': soup.find('h1', class_='stock-name').text.strip() if soup.find('h1', class_='stock-name') else 'N/A',
-                'last_price': soup.find('span', class_='last-price').text.strip() if soup.find('span', class_='last-price') else 'N/A',
-                'market_cap': soup.find('div', class_='market-cap').text.strip() if soup.find('div', class_='market-cap') else 'N/A',
-            }
-            all_stock_details.append(stock_details)
+    for index, (symbol, page) in enumerate(stored_pages(directory)):
+        all_stock_details.append(parse_stock_page(page, symbol))
         # Update the progress bar
         update_progress(index + 1, total_files, "Parsing stock files")
 
@@ -199,6 +183,53 @@ def parse_all_stocks_with_progress(directory):
 
     st.success("Stock files parsed successfully!")
 
+def show_security_details(symbol, quote_future, history_future, quote_placeholder, chart_placeholder, slider_placeholder):
+    """
+    Fill the Data tab's placeholders with a security's quote, chart and
+    recommendation once their background fetches finish.
+    """
+    real_time_data = quote_future.result()
+    if not real_time_data:
+        quote_placeholder.error(f"Failed to fetch real-time data for {symbol}. Please try again later.")
+    else:
+        quote_placeholder.json(real_time_data.to_dict())
+
+    # Long periods are downsampled (LTTB) before they reach the chart
+    historical_close = history_future.result()
+    if historical_close is None:
+        chart_placeholder.warning("No historical data available for the selected time period.")
+    else:
+        chart_placeholder.line_chart(historical_close)
+
+    if real_time_data:
+        # Add the recommendation slider with color gradient
+        recommendation, score = generate_recommendation(real_time_data)
+
+        # Map recommendation score to slider position
+        slider_position = {
+            "Strong Buy": 100,
+            "Buy": 75,
+            "Hold": 50,
+            "Sell": 25,
+            "Strong Sell": 0
+        }.get(recommendation, 50)  # Default to "Hold" if recommendation is unknown
+
+        # Create a color gradient bar
+        slider_placeholder.markdown(f"""
+        <div style="width: 100%; height: 20px; background: linear-gradient(to right, red, orange, yellow, lightgreen, green); position: relative; border-radius: 5px;">
+            <div style="position: absolute; left: {slider_position}%; top: -5px; transform: translateX(-50%);">
+                <span style="font-size: 16px; font-weight: bold; color: black;">&#x25B2;</span>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+# BOURSTAD_PROFILE=1 saves a profile of every rerun to data/profiles
+if st.session_state.get('profiler') is not None:
+    # The previous rerun ended early with st.stop()
+    st.session_state.pop('profiler').stop()
+if profiling_enabled():
+    st.session_state['profiler'] = Profiler("dashboard").start()
+
 # Streamlit app
 st.title("Bourstad Assistant 📊")
 st.write("Welcome to the Bourstad Assistant! Use the tabs below to explore data and analysis.")
@@ -224,6 +255,7 @@ if 'suid' not in st.session_state or 'aut' not in st.session_state:
                     st.session_state['suid'] = suid
                     st.session_state['aut'] = aut
                     st.session_state['stocks'] = stocks
+                    st.session_state.pop('security_index', None)
                 else:
                     st.error("Login failed. Please check your credentials.")
 else:
@@ -232,67 +264,50 @@ else:
 
 # Ensure stocks are loaded even without login
 if 'stocks' not in st.session_state:
-    st.session_state['stocks'] = get_bourstad_securities()
+    st.session_state['stocks'] = service.stock_list()
 
 # Create tabs
-tabs = st.tabs(["📈 Data", "🧠 Analysis", "📅 Highlights"])
+pending_details = None
+tabs = st.tabs(["📈 Data", "🧠 Analysis", "📅 Highlights", "🔎 Screener"])
 
 # Tab 1: Data
 with tabs[0]:
     st.header("All Securities")
-    
-    # Load securities data
-    securities_df = pd.DataFrame(st.session_state['stocks'])
-    securities_df = securities_df[securities_df['id'].notnull() & (securities_df['id'] != "")]
 
-    # Display the filtered securities
-    st.dataframe(securities_df)
+    # Search and paging run here; only the visible page is sent to the browser
+    security_index = get_security_index()
+    columns = st.columns([3, 1, 1])
+    search = columns[0].text_input("Search securities", placeholder="Symbol or name, e.g. bank CA")
+    page_size = columns[1].selectbox("Rows per page", PAGE_SIZES)
+    matches = security_index.search(search)
+    page_count = max(1, math.ceil(len(matches) / page_size))
+    page_number = columns[2].number_input("Page", min_value=1, max_value=page_count, value=1)
+    page_df, page_count = SecurityIndex.page(matches, int(page_number), page_size)
+    st.caption(f"{len(matches)} of {len(security_index)} securities, page {int(page_number)} of {page_count}")
+    st.dataframe(page_df, hide_index=True)
 
     # Select a security to view details
-    selected_security = st.selectbox("Select a security to view details", securities_df['id'])
+    selected_security = st.selectbox("Select a security to view details", page_df['id'])
 
     if selected_security:
-        st.header(f"Real-Time Data for {selected_security}")
-        real_time_data = fetch_stock_data(selected_security, securities_df)
+        time_period = st.selectbox("Select a time period for historical data", ["1d", "5d", "1mo", "6mo", "1y", "5y", "max"])
 
-        if not real_time_data:
-            st.error(f"Failed to fetch real-time data for {selected_security}. Please try again later.")
-        else:
-            st.json(real_time_data)
+        # Fetch the quote and history in the background while the layout renders
+        executor = get_executor()
+        quote_future = executor.submit(service.quote, selected_security)
+        history_future = executor.submit(service.history, selected_security, time_period)
 
-            # Fetch historical data for the selected security
-            time_period = st.selectbox("Select a time period for historical data", ["1d", "5d", "1mo", "6mo", "1y", "5y", "max"])
-            stock = yf.Ticker(selected_security.split(":")[0])  # Extract the symbol for yfinance
-            historical_data = stock.history(period=time_period)
+        st.header(f"Real-Time Data for {selected_security}")
+        quote_placeholder = st.empty()
+        quote_placeholder.info("Loading real-time data...")
+        st.subheader(f"Historical Price Chart for {selected_security} ({time_period})")
+        chart_placeholder = st.empty()
+        chart_placeholder.info("Loading historical data...")
+        st.subheader("Recommendation Slider")
+        slider_placeholder = st.empty()
 
-            if historical_data.empty:
-                st.warning("No historical data available for the selected time period.")
-            else:
-                # Display the graph
-                st.subheader(f"Historical Price Chart for {selected_security} ({time_period})")
-                st.line_chart(historical_data['Close'])
-
-            # Add the recommendation slider with color gradient
-            st.subheader("Recommendation Slider")
-            recommendation, score = generate_recommendation(real_time_data)
-
-            # Map recommendation score to slider position
-            slider_position = {
-                "Strong Buy": 100,
-                "Buy": 75,
-                "Hold": 50,
-                "Sell": 25,
-                "Strong Sell": 0
-            }.get(recommendation, 50)  # Default to "Hold" if recommendation is unknown
-
-            # Create a color gradient bar
-            st.markdown(f"""
-            <div style="width: 100%; height: 20px; background: linear-gradient(to right, red, orange, yellow, lightgreen, green); position: relative; border-radius: 5px;">
-                <div style="position: absolute; left: {slider_position}%; top: -5px; transform: translateX(-50%);">
-                    <span style="font-size: 16px; font-weight: bold; color: black;">&#x25B2;</span>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+        # Filled once the other tabs are rendered, so they do not wait for the fetches
+        pending_details = (selected_security, quote_future, history_future, quote_placeholder, chart_placeholder, slider_placeholder)
 
 # Tab 2: Analysis
 with tabs[1]:
@@ -301,17 +316,33 @@ with tabs[1]:
 
     # Fetch owned securities
     if 'suid' in st.session_state and 'aut' in st.session_state:
-        owned_securities = fetch_owned_securities(st.session_state['suid'], st.session_state['aut'])
+        # The table is re-parsed only when it changed since the last poll
+        owned_securities = get_holdings_poller(st.session_state['suid'], st.session_state['aut']).holdings
         if owned_securities:
             st.subheader("Owned Securities")
-            owned_securities_df = pd.DataFrame(owned_securities)
-            st.dataframe(owned_securities_df)
+            portfolio = get_portfolio(owned_securities)
+            summary = portfolio.summary()
+            columns = st.columns(4)
+            columns[0].metric("Market Value", f"{summary['Market Value']:,.2f} $")
+            columns[1].metric("Unrealized P&L", f"{summary['Unrealized P&L']:,.2f} $", f"{summary['Unrealized (%)']:.2f}%")
+            columns[2].metric("Positions", summary['Positions'])
+            columns[3].metric("Volatility (annual)", "N/A" if math.isnan(summary['Volatility']) else f"{summary['Volatility']:.1%}")
+            st.dataframe(portfolio.positions_frame())
+
+            st.subheader("Sector Exposure")
+            st.bar_chart(portfolio.sector_exposure())
+
+            correlation = portfolio.correlation()
+            if not correlation.dropna(how="all").empty:
+                st.subheader("Correlation")
+                st.dataframe(correlation)
 
             # Analyze owned securities
             st.subheader("Owned Securities Decisions")
 
-            # Generate recommendations for all stocks
-            recommendations = analyze_stocks(st.session_state['stocks'])
+            # Recommendations for every security with a cached quote; only the
+            # quotes that changed since the last rerun are analyzed again
+            recommendations = get_fetch_service().recommendations()
 
             # Generate decisions for owned securities
             decisions = analyze_owned_stocks(owned_securities, recommendations)
@@ -343,13 +374,13 @@ with tabs[1]:
         if not valid_symbols:
             st.write("No valid symbols found.")
             st.stop()
-        real_time_data = fetch_batch_stock_data(valid_symbols, stocks_df)
+        real_time_data = service.universe(valid_symbols, stocks_df)
 
         print("Valid symbols:", valid_symbols)
-        print("Real-time data fetched:", real_time_data)
+        print("Real-time data fetched:", len(real_time_data))
 
         # Convert to DataFrame
-        real_time_df = pd.DataFrame(real_time_data)
+        real_time_df = real_time_data.to_frame()
         print("Columns in real_time_df:", real_time_df.columns)
 
         # Ensure required columns exist in real_time_df
@@ -382,39 +413,90 @@ with tabs[2]:
     st.header("📅 Highlights of the Day")
     st.write("View notable changes and honorable mentions for a specific day.")
 
-    # Date picker for selecting a date
-    selected_date = st.date_input("Select a date", value=pd.Timestamp.today())
-    st.write(f"Showing highlights for: {selected_date}")
-
-    # Fetch historical data for all valid symbols
-    stocks_df = pd.DataFrame(st.session_state['stocks'])
-    valid_symbols = filter_valid_symbols(stocks_df['id'].tolist())
-    if not valid_symbols:
-        st.write("No valid symbols found.")
-        st.stop()
-
-    highlights_df = fetch_highlights_data(valid_symbols, selected_date)
-    if highlights_df is None or highlights_df.empty:
-        st.write("No highlights data available for the selected date.")
+    mode = st.radio("Period", ["Single day", "Date range"], horizontal=True)
+
+    if mode == "Date range":
+        today = pd.Timestamp.today().date()
+        date_range = st.date_input("Select a date range", value=(today - pd.Timedelta(days=30), today))
+        frequency = st.selectbox("Movers per", ["Week", "Month"])
+        if len(date_range) == 2:
+            start_date, end_date = date_range
+            stocks_df = pd.DataFrame(st.session_state['stocks'])
+            names = {map_bourstad_to_yfinance(stock_id): name for stock_id, name in zip(stocks_df['id'], stocks_df['name']) if stock_id}
+
+            # Only days missing from the local OHLCV store are downloaded
+            with st.spinner("Loading price history..."):
+                panel = service.panel(list(names), start_date, end_date)
+            range_df = range_highlights(panel, names)
+            if range_df.empty:
+                st.write("No highlights data available for the selected range.")
+            else:
+                rankings = compute_rankings(range_df)
+                st.subheader("📈 Largest Gainers (cumulative)")
+                st.dataframe(rankings["gainers"])
+                st.subheader("📉 Largest Losers (cumulative)")
+                st.dataframe(rankings["losers"])
+                st.subheader("🔥 Highest Average Volume")
+                st.dataframe(rankings["volume"])
+                st.subheader(f"🗓️ Movers per {frequency.lower()}")
+                st.dataframe(period_movers(period_changes(panel, "W" if frequency == "Week" else "ME")))
     else:
-        # Identify notable changes
-        st.subheader("📈 Largest Gainers")
-        gainers = highlights_df.sort_values(by="Change (%)", ascending=False).head(3)
-        st.dataframe(gainers)
+        # Date picker for selecting a date
+        selected_date = st.date_input("Select a date", value=pd.Timestamp.today())
+        st.write(f"Showing highlights for: {selected_date}")
 
-        st.subheader("📉 Largest Losers")
-        losers = highlights_df.sort_values(by="Change (%)", ascending=True).head(3)
-        st.dataframe(losers)
+        # Rankings are persisted per day, so past dates are a pure lookup
+        stocks_df = pd.DataFrame(st.session_state['stocks'])
+        valid_symbols = filter_valid_symbols(stocks_df['id'].tolist())
+        if not valid_symbols:
+            st.write("No valid symbols found.")
+            st.stop()
+        rankings = service.highlights(selected_date, valid_symbols)
 
-        st.subheader("🔥 Highest Volume")
-        highest_volume = highlights_df.sort_values(by="Volume", ascending=False).head(3)
-        st.dataframe(highest_volume)
+        if rankings is None:
+            st.write("No highlights data available for the selected date.")
+        else:
+            # Identify notable changes
+            st.subheader("📈 Largest Gainers")
+            st.dataframe(rankings["gainers"])
+
+            st.subheader("📉 Largest Losers")
+            st.dataframe(rankings["losers"])
+
+            st.subheader("🔥 Highest Volume")
+            st.dataframe(rankings["volume"])
+
+            st.subheader("🎖️ Honorable Mentions")
+            st.write("Stocks with notable performance or activity:")
+            mentions = rankings["mentions"]
+            if not mentions.empty:
+                st.markdown("\n".join(
+                    f"- {name} ({symbol}): {change:.2f}% change, Volume: {volume}"
+                    for name, symbol, change, volume in zip(mentions["Name"], mentions["Symbol"], mentions["Change (%)"], mentions["Volume"])
+                ))
+
+# Tab 4: Screener
+with tabs[3]:
+    st.header("🔎 Screener")
+    st.write("Filter the cached universe, e.g. `pe < 15 and yield > 3 and pct_from_low < 10`.")
+    st.caption("Columns: " + ", ".join(available_columns()))
+
+    query = st.text_input("Query", value="pe < 15 and yield > 3")
+    columns = st.columns(3)
+    sort_by = columns[0].selectbox("Sort by", [None] + RANK_COLUMNS)
+    descending = columns[1].checkbox("Descending", value=True)
+    limit = columns[2].number_input("Limit", min_value=1, max_value=1000, value=50)
 
-        st.subheader("🎖️ Honorable Mentions")
-        st.write("Stocks with notable performance or activity:")
-        for _, row in highlights_df.iterrows():
-            if abs(row["Change (%)"]) > 5 or row["Volume"] > 1_000_000:
-                st.write(f"- {row['Name']} ({row['Symbol']}): {row['Change (%)']:.2f}% change, Volume: {row['Volume']}")
+    try:
+        start = time.perf_counter()
+        results = service.screener().screen(query, sort_by=sort_by, descending=descending, limit=int(limit))
+        st.caption(f"{len(results)} result(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+        st.dataframe(results)
+    except ScreenerError as e:
+        st.error(str(e))
+
+if pending_details is not None:
+    show_security_details(*pending_details)
 
 # Example usage of the progress bar functions
 if st.button("Fetch and Parse Securities"):
@@ -423,6 +505,24 @@ if st.button("Fetch and Parse Securities"):
     stocks, suid, aut = fetch_and_parse_stocks(email, password)
     if stocks:
         fetch_stock_details_with_progress(stocks, suid, aut)
-        parse_all_stocks_with_progress('data/stocks')
+        parse_all_stocks_with_progress(STOCKS_DIR)
+    else:
+        st.error("No stocks found or failed to fetch stocks.")
+# Alerts raised while this session's data was fetched (shared universe alerts
+# and this session's holding alerts), and the latest ones on file
+engines = [service.alerts, st.session_state.get('holding_alerts')]
+notifications = [sink for engine in engines if engine is not None for sink in engine.sinks if isinstance(sink, MemorySink)]
+seen = st.session_state['alerts_seen']
+for event in sorted((event for sink in notifications for event in sink.since(seen)), key=lambda event: event['time']):
+    st.toast(event['message'], icon="🔔")
+    st.session_state['alerts_seen'] = max(st.session_state['alerts_seen'], event['time'])
+with st.sidebar.expander("🔔 Alerts"):
+    recent = read_alerts(limit=20)
+    if recent:
+        st.dataframe(pd.DataFrame(recent)[['time', 'message', 'price', 'threshold']].assign(
+            time=lambda frame: pd.to_datetime(frame['time'], unit='s').dt.strftime('%Y-%m-%d %H:%M')), hide_index=True)
     else:
-        st.error("No stocks found or failed to fetch stocks.")
\ No newline at end of file
+        st.caption("No alerts yet.")
+
+if st.session_state.get('profiler') is not None:
+    st.session_state.pop('profiler').stop()
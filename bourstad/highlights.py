@@ -0,0 +1,143 @@
+import os
+import json
+import logging
+import pandas as pd
+from bourstad.atomic import write_json_atomic
+
+CACHE_DIR = "cache"
+
+TOP_N = 3
+
+# Thresholds for honorable mentions
+MENTION_CHANGE = 5  # Absolute change in percent
+MENTION_VOLUME = 1_000_000
+
+RANKINGS = ["gainers", "losers", "volume", "mentions"]
+
+def compute_rankings(highlights_df, n=TOP_N):
+    """
+    Rank a day of highlights with partial selection instead of full sorts.
+    Args:
+        highlights_df (DataFrame): Rows with Symbol, Name, Change (%) and Volume.
+        n (int): Number of gainers, losers and highest volumes to keep.
+
+    Returns:
+        dict: DataFrames for "gainers", "losers", "volume" and "mentions".
+    """
+    if highlights_df is None or highlights_df.empty:
+        empty = pd.DataFrame(columns=["Symbol", "Name", "Change (%)", "Volume"])
+        return {name: empty for name in RANKINGS}
+
+    change = highlights_df["Change (%)"]
+    volume = highlights_df["Volume"]
+    mentions = (change.abs() > MENTION_CHANGE) | (volume > MENTION_VOLUME)
+    return {
+        "gainers": highlights_df.nlargest(n, "Change (%)"),
+        "losers": highlights_df.nsmallest(n, "Change (%)"),
+        "volume": highlights_df.nlargest(n, "Volume"),
+        "mentions": highlights_df[mentions],
+    }
+
+def rankings_file(selected_date, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"highlights_rankings_{pd.Timestamp(selected_date).strftime('%Y-%m-%d')}.json")
+
+def save_rankings(selected_date, rankings, cache_dir=CACHE_DIR):
+    """
+    Persist the rankings of a day next to its highlights cache.
+    """
+    cache_file = rankings_file(selected_date, cache_dir)
+    data = {name: frame.to_dict(orient="records") for name, frame in rankings.items()}
+    write_json_atomic(cache_file, data)
+    logging.info(f"Saved highlights rankings for {selected_date} to {cache_file}")
+
+def load_rankings(selected_date, cache_dir=CACHE_DIR):
+    """
+    Load the persisted rankings of a day, or None if they were never computed.
+    """
+    cache_file = rankings_file(selected_date, cache_dir)
+    try:
+        with open(cache_file, "r") as file:
+            data = json.load(file)
+        return {name: pd.DataFrame(data.get(name, [])) for name in RANKINGS}
+    except FileNotFoundError:
+        return None
+    except (json.JSONDecodeError, ValueError) as e:
+        # Left in place: the next save_rankings replaces it atomically
+        logging.error(f"Corrupted highlights rankings for {selected_date}: {e}")
+        return None
+
+def get_rankings(selected_date, highlights_df=None, cache_dir=CACHE_DIR):
+    """
+    Persisted rankings of a day, computing and saving them from highlights_df if needed.
+    """
+    rankings = load_rankings(selected_date, cache_dir)
+    if rankings is None and highlights_df is not None and not highlights_df.empty:
+        rankings = compute_rankings(highlights_df)
+        save_rankings(selected_date, rankings, cache_dir)
+    return rankings
+
+def range_highlights(panel, names=None):
+    """
+    Highlights over a date range, computed from a local OHLCV panel.
+    Args:
+        panel (dict): OhlcvStore.panel output for the range.
+        names (dict): Optional symbol -> display name.
+
+    Returns:
+        DataFrame: One row per symbol with the cumulative change over the range,
+        its average daily volume (as "Volume", so compute_rankings applies),
+        total volume and number of trading days.
+    """
+    opens, closes, volumes = panel["Open"], panel["Close"], panel["Volume"]
+    if closes.empty:
+        return pd.DataFrame(columns=["Symbol", "Name", "Change (%)", "Volume", "Total Volume", "Days"])
+
+    first_open = opens.bfill().iloc[0]
+    last_close = closes.ffill().iloc[-1]
+    names = names or {}
+    frame = pd.DataFrame({
+        "Symbol": closes.columns,
+        "Name": [names.get(symbol, symbol) for symbol in closes.columns],
+        "Change (%)": ((last_close - first_open) / first_open * 100).to_numpy(),
+        "Volume": volumes.mean().to_numpy(),
+        "Total Volume": volumes.sum().to_numpy(),
+        "Days": closes.count().to_numpy(),
+    })
+    return frame.dropna(subset=["Change (%)"]).reset_index(drop=True)
+
+def period_changes(panel, freq="W"):
+    """
+    Change (%) of each symbol per period (e.g. "W" for weekly, "ME" for monthly).
+    Args:
+        panel (dict): OhlcvStore.panel output for the range.
+        freq (str): pandas resample frequency.
+
+    Returns:
+        DataFrame: periods x symbols.
+    """
+    if panel["Close"].empty:
+        return pd.DataFrame()
+    first_open = panel["Open"].resample(freq).first()
+    last_close = panel["Close"].resample(freq).last()
+    return (last_close - first_open) / first_open * 100
+
+def period_movers(changes, n=TOP_N):
+    """
+    Top gainers and losers of each period from period_changes.
+    Returns:
+        DataFrame: Period, Rank, Gainer, Gain (%), Loser, Loss (%).
+    """
+    rows = []
+    for period, row in changes.iterrows():
+        row = row.dropna()
+        gainers, losers = row.nlargest(n), row.nsmallest(n)
+        for rank in range(min(n, len(row))):
+            rows.append({
+                "Period": period.date(),
+                "Rank": rank + 1,
+                "Gainer": gainers.index[rank],
+                "Gain (%)": gainers.iloc[rank],
+                "Loser": losers.index[rank],
+                "Loss (%)": losers.iloc[rank],
+            })
+    return pd.DataFrame(rows)
@@ -0,0 +1,178 @@
+import os
+import math
+import sqlite3
+import logging
+from contextlib import closing
+from datetime import datetime
+import pandas as pd
+from bourstad.universe import Universe, FIELDS, NUMERIC_ATTRS
+
+HISTORY_DB = "data/history.sqlite"
+
+HOLDING_COLUMNS = [
+    ("quantity", "Quantity"),
+    ("average_price", "Average Price"),
+    ("current_price", "Current Price"),
+    ("gains", "Gains and Losses"),
+]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS quotes (
+    symbol TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    name TEXT,
+    {", ".join(f"{attr} REAL" for attr in NUMERIC_ATTRS)},
+    PRIMARY KEY (symbol, ts)
+);
+CREATE INDEX IF NOT EXISTS quotes_ts ON quotes (ts);
+CREATE TABLE IF NOT EXISTS holdings (
+    account TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    name TEXT,
+    quantity INTEGER,
+    average_price REAL,
+    current_price REAL,
+    gains TEXT,
+    PRIMARY KEY (account, symbol, ts)
+);
+CREATE INDEX IF NOT EXISTS holdings_ts ON holdings (account, ts);
+CREATE TABLE IF NOT EXISTS holding_snapshots (
+    account TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    PRIMARY KEY (account, ts)
+);
+"""
+
+def _timestamp(ts=None):
+    """
+    Normalize a timestamp (datetime, date, string or None for now) to a sortable ISO string.
+    """
+    if ts is None:
+        ts = datetime.now()
+    return pd.Timestamp(ts).isoformat(timespec="seconds")
+
+class SnapshotStore:
+    """
+    Append-only SQLite store of quote and holdings snapshots, indexed by (symbol, ts).
+    """
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def record_universe(self, universe, ts=None):
+        """
+        Append a snapshot of every quote in the universe.
+        Args:
+            universe (Universe | list | DataFrame): Quotes to store.
+            ts: Snapshot time, defaults to now.
+
+        Returns:
+            str: The snapshot timestamp.
+        """
+        universe = Universe.from_records(universe)
+        ts = _timestamp(ts)
+        columns = [universe.column(attr) for attr in NUMERIC_ATTRS]
+        rows = [
+            (symbol, ts, universe.names[row], *(None if math.isnan(column[row]) else float(column[row]) for column in columns))
+            for row, symbol in enumerate(universe.symbols)
+        ]
+        placeholders = ", ".join("?" * (3 + len(NUMERIC_ATTRS)))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(f"INSERT OR IGNORE INTO quotes (symbol, ts, name, {', '.join(NUMERIC_ATTRS)}) VALUES ({placeholders})", rows)
+        logging.info(f"Recorded {len(rows)} quotes in snapshot {ts}.")
+        return ts
+
+    def record_holdings(self, owned_securities, account="", ts=None):
+        """
+        Append a snapshot of the securities returned by fetch_owned_securities.
+        """
+        ts = _timestamp(ts)
+        rows = [
+            (account, owned.get("Symbol"), ts, owned.get("Name"), *(owned.get(display) for _, display in HOLDING_COLUMNS))
+            for owned in owned_securities
+        ]
+        with closing(self._connect()) as conn, conn:
+            # Snapshots are recorded separately so that selling everything is kept too
+            conn.execute("INSERT OR IGNORE INTO holding_snapshots VALUES (?, ?)", (account, ts))
+            conn.executemany("INSERT OR IGNORE INTO holdings VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        logging.info(f"Recorded {len(rows)} holdings in snapshot {ts}.")
+        return ts
+
+    def _query(self, sql, params):
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    @staticmethod
+    def _symbol_filter(symbols, params, alias="q"):
+        if not symbols:
+            return ""
+        symbols = list(symbols)
+        params.extend(symbols)
+        return f" AND {alias}.symbol IN ({', '.join('?' * len(symbols))})"
+
+    @staticmethod
+    def _quote_frame(frame):
+        # SQLite NULLs come back as None; keep numeric columns as float64 with NaN
+        frame[NUMERIC_ATTRS] = frame[NUMERIC_ATTRS].astype("float64")
+        return frame.rename(columns={"symbol": "Symbol", "name": "Name", "ts": "Timestamp", **{attr: display for attr, display, _ in FIELDS}})
+
+    @staticmethod
+    def _holding_frame(frame):
+        return frame.rename(columns={"symbol": "Symbol", "name": "Name", "ts": "Timestamp", **dict(HOLDING_COLUMNS)}).drop(columns=["account"])
+
+    def quotes_as_of(self, ts, symbols=None):
+        """
+        The latest quote of each symbol recorded at or before ts.
+        """
+        params = [_timestamp(ts)]
+        inner_filter = self._symbol_filter(symbols, params, alias="quotes")
+        sql = (
+            "SELECT q.* FROM quotes q JOIN ("
+            f"SELECT symbol, MAX(ts) AS ts FROM quotes WHERE ts <= ?{inner_filter} GROUP BY symbol"
+            ") latest ON q.symbol = latest.symbol AND q.ts = latest.ts ORDER BY q.symbol"
+        )
+        return self._quote_frame(self._query(sql, params))
+
+    def universe_as_of(self, ts, symbols=None):
+        """
+        Same as quotes_as_of, as a Universe.
+        """
+        return Universe.from_records(self.quotes_as_of(ts, symbols))
+
+    def quotes_between(self, start, end, symbols=None):
+        """
+        Every quote recorded between start and end (inclusive), ordered by symbol and time.
+        """
+        params = [_timestamp(start), _timestamp(end)]
+        sql = f"SELECT * FROM quotes q WHERE q.ts BETWEEN ? AND ?{self._symbol_filter(symbols, params)} ORDER BY q.symbol, q.ts"
+        return self._quote_frame(self._query(sql, params))
+
+    def holdings_as_of(self, ts, account=""):
+        """
+        The most recent holdings snapshot of an account taken at or before ts.
+        """
+        sql = (
+            "SELECT * FROM holdings WHERE account = ? AND ts = ("
+            "SELECT MAX(ts) FROM holding_snapshots WHERE account = ? AND ts <= ?"
+            ") ORDER BY symbol"
+        )
+        return self._holding_frame(self._query(sql, [account, account, _timestamp(ts)]))
+
+    def holdings_between(self, start, end, account=""):
+        """
+        Every holdings snapshot of an account between start and end (inclusive).
+        """
+        sql = "SELECT * FROM holdings WHERE account = ? AND ts BETWEEN ? AND ? ORDER BY ts, symbol"
+        return self._holding_frame(self._query(sql, [account, _timestamp(start), _timestamp(end)]))
+
+    def snapshots(self):
+        """
+        Timestamps of every quote snapshot, oldest first.
+        """
+        return self._query("SELECT DISTINCT ts FROM quotes ORDER BY ts", [])["ts"].tolist()
@@ -0,0 +1,235 @@
+import os
+import re
+import math
+import time
+import hashlib
+import logging
+import threading
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from bourstad.history import SnapshotStore
+from bourstad.upstream import bourstad_url, OWNED_PATH
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # Fall back to BeautifulSoup's built-in parser
+    lxml_html = None
+
+HOLDINGS_TABLE_ID = "editable2"
+
+# Seconds between two fetches of the same poller; polls in between are free
+POLL_INTERVAL = 30
+
+# The holdings table is sliced out of the page before parsing anything. The id
+# attribute must not be part of a longer name (data-id=...), nor the value of a longer id
+TABLE_PATTERN = re.compile(r"<table\b[^>]*(?<![\w-])id\s*=\s*[\"']?%s(?![\w-]).*?</table\s*>" % HOLDINGS_TABLE_ID, re.IGNORECASE | re.DOTALL)
+NESTED_TABLE = re.compile(r"<table\b", re.IGNORECASE)
+
+# Fields that change when a position is bought or sold, rather than repriced
+POSITION_FIELDS = ("Quantity", "Average Price")
+
+def fetch_holdings_page(suid, aut):
+    """
+    Download the dashboard_Part page holding the owned securities table.
+    Returns:
+        str: Page HTML, or None if the request failed.
+    """
+    response = requests.get(f"{bourstad_url(OWNED_PATH)}?suid={suid}&aut={aut}")
+    if response.status_code != 200:
+        print(f"Failed to fetch owned securities. Status code: {response.status_code}")
+        logging.error(f"Failed to fetch owned securities. Status code: {response.status_code}")
+        return None
+    return response.text
+
+def extract_holdings_table(page):
+    """
+    The raw HTML of the holdings table, or None if the page has none.
+    """
+    match = TABLE_PATTERN.search(page)
+    # The lazy match ends at the first </table>, which belongs to a nested table if there is one
+    if match and len(NESTED_TABLE.findall(match.group(0))) == 1:
+        return match.group(0)
+    # Unusual markup: let the parser find the table, parsing nothing else
+    table = BeautifulSoup(page, "html.parser", parse_only=SoupStrainer("table", id=HOLDINGS_TABLE_ID)).find("table")
+    return str(table) if table else None
+
+def table_hash(table_html):
+    return hashlib.sha1(table_html.encode("utf-8")).hexdigest()
+
+def parse_price(text):
+    return float(text.replace('$', '').replace(',', '').replace('\xa0', '').strip())
+
+def _table_rows(table_html):
+    """
+    Cell texts of each body row of the holdings table.
+    """
+    if lxml_html is not None:
+        table = lxml_html.fragment_fromstring(table_html)
+        rows = table.xpath("./tbody/tr") or table.xpath(".//tr[td]")
+        return [[cell.text_content().strip() for cell in row.xpath("./td")] for row in rows]
+    table = BeautifulSoup(table_html, "html.parser").find("table")
+    body = table.find("tbody") or table
+    return [[cell.get_text(strip=True) for cell in row.find_all("td")] for row in body.find_all("tr")]
+
+def parse_holdings_table(table_html):
+    """
+    Parse the holdings table into owned securities.
+    Returns:
+        list: Owned securities with Symbol, Name, Quantity, Average Price,
+        Current Price and Gains and Losses.
+    """
+    owned_securities = []
+    for columns in _table_rows(table_html):
+        if len(columns) < 5:
+            continue  # Skip rows with missing data
+
+        try:
+            owned_securities.append({
+                "Symbol": columns[0],
+                "Name": columns[1],
+                "Quantity": int(columns[2]),
+                "Average Price": parse_price(columns[3]),
+                "Current Price": parse_price(columns[4]),
+                "Gains and Losses": columns[5],
+            })
+            logging.info(f"Parsed owned security: {owned_securities[-1]}")
+        except Exception as e:
+            print(f"Error parsing row: {e}")
+            logging.error(f"Error parsing row: {e}")
+    return owned_securities
+
+def diff_holdings(old, new):
+    """
+    Positions that differ between two holdings lists, matched by symbol.
+    Returns:
+        dict: "added" and "changed" positions (from new) and "removed" positions (from old).
+    """
+    old_by_symbol = {owned["Symbol"]: owned for owned in old}
+    new_by_symbol = {owned["Symbol"]: owned for owned in new}
+    return {
+        "added": [owned for symbol, owned in new_by_symbol.items() if symbol not in old_by_symbol],
+        "changed": [owned for symbol, owned in new_by_symbol.items() if symbol in old_by_symbol and owned != old_by_symbol[symbol]],
+        "removed": [owned for symbol, owned in old_by_symbol.items() if symbol not in new_by_symbol],
+    }
+
+def is_price_only(delta, previous):
+    """
+    True if a delta only reprices existing positions (no trade happened).
+    """
+    if delta["added"] or delta["removed"]:
+        return False
+    old_by_symbol = {owned["Symbol"]: owned for owned in previous}
+    return all(owned[field] == old_by_symbol[owned["Symbol"]][field] for owned in delta["changed"] for field in POSITION_FIELDS)
+
+def account_id(email=None):
+    """
+    Key of a Bourstad account in the holdings history: its login email (from
+    BOURSTAD_USERNAME by default), which unlike the suid survives a new login.
+    """
+    email = os.getenv('BOURSTAD_USERNAME', '') if email is None else email
+    return email.strip().lower()
+
+def _comparable(owned_securities):
+    # Rows read back from SQLite have NaN where a parsed row had None
+    def value(value):
+        return None if value is None or (isinstance(value, float) and math.isnan(value)) else value
+    return [{key: value(owned.get(key)) for key in ("Symbol", "Name", "Quantity", "Average Price", "Current Price", "Gains and Losses")}
+            for owned in owned_securities]
+
+def record_holdings(owned_securities, account, store=None, ts=None):
+    """
+    Save a holdings snapshot of an account, unless no position changed since
+    the account's latest snapshot.
+    Args:
+        owned_securities (list): Holdings as parsed by parse_holdings_table.
+        account (str): Stable account key, see account_id.
+        store (SnapshotStore): Defaults to the history database.
+        ts: Snapshot time, now by default.
+
+    Returns:
+        str: Timestamp of the new snapshot, or None if nothing changed.
+    """
+    store = store or SnapshotStore()
+    latest = store.holdings_as_of(ts, account=account)
+    previous = latest.drop(columns=["Timestamp"]).to_dict("records")
+    if not any(diff_holdings(_comparable(previous), _comparable(owned_securities)).values()):
+        return None
+    return store.record_holdings(owned_securities, account=account, ts=ts)
+
+class HoldingsPoller:
+    """
+    Polls the owned securities of one Bourstad session.
+
+    The holdings table is hashed on every fetch; it is parsed only when the hash
+    changes, and subscribers receive just the positions that changed.
+    Snapshots are recorded under account (see account_id).
+    """
+    def __init__(self, suid, aut, interval=POLL_INTERVAL, fetch_page=fetch_holdings_page, record=True, account=None):
+        self.suid = suid
+        self.aut = aut
+        self.account = account_id(account)
+        self.interval = interval
+        self.fetch_page = fetch_page
+        self.record = record
+        self.holdings = []
+        self.table_hash = None
+        self.last_fetch = None
+        self.fetches = 0
+        self.parses = 0
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """
+        Call callback(delta, previous_holdings) whenever positions change.
+        """
+        self._subscribers.append(callback)
+
+    def poll(self, force=False):
+        """
+        Fetch the holdings if the interval elapsed (or force) and notify subscribers of changes.
+        Returns:
+            dict: The delta, or None when nothing changed or nothing was fetched.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self.last_fetch is not None and now - self.last_fetch < self.interval:
+                return None
+            self.last_fetch = now
+            self.fetches += 1
+
+            try:
+                page = self.fetch_page(self.suid, self.aut)
+            except Exception as e:
+                logging.error(f"Error fetching owned securities: {e}")
+                return None
+            if page is None:
+                return None
+            table_html = extract_holdings_table(page)
+            if table_html is None:
+                logging.warning("No owned securities table found.")
+                return None
+
+            digest = table_hash(table_html)
+            if digest == self.table_hash:
+                return None
+            self.table_hash = digest
+            self.parses += 1
+
+            previous, self.holdings = self.holdings, parse_holdings_table(table_html)
+            delta = diff_holdings(previous, self.holdings)
+            if not any(delta.values()):
+                return None
+
+            if self.record:
+                try:
+                    record_holdings(self.holdings, self.account)
+                except Exception as e:
+                    logging.error(f"Error recording owned securities snapshot: {e}")
+
+        for callback in list(self._subscribers):
+            try:
+                callback(delta, previous)
+            except Exception as e:
+                logging.error(f"Holdings subscriber failed: {e}")
+        return delta
@@ -0,0 +1,236 @@
+import os
+import time
+import random
+import shutil
+import logging
+import tempfile
+import threading
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from bourstad.scraper import get_bourstad_securities, fetch_and_parse_stocks, fetch_stock_data, fetch_highlights_data, fetch_owned_securities, map_bourstad_to_yfinance, CACHE_DIR, EXTRACTED_STOCKS_FILE
+from bourstad.analyzer import analyze_stocks
+from bourstad.services import FetchService
+from bourstad.replay import start_stub, RECORDINGS_DIR
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MODES = ["direct", "service"]
+
+# What one simulated dashboard session looks at
+QUOTES_PER_SESSION = 5
+HIGHLIGHT_SYMBOLS = 20
+
+PERCENTILES = [50, 95, 99]
+
+class LoadRecorder:
+    """
+    Thread-safe latency samples per operation.
+    """
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def measure(self, operation, function, *args):
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        except Exception as e:
+            logging.error(f"Load test {operation} failed: {e}")
+            with self._lock:
+                self.errors[operation] += 1
+            return None
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.samples[operation].append(elapsed)
+
+def latency_summary(samples):
+    """
+    Count, mean and p50/p95/p99 latency of each operation, in milliseconds.
+    """
+    rows = {}
+    for operation, values in sorted(samples.items()):
+        values = np.array(values) * 1000
+        rows[operation] = {"count": len(values), "mean": float(values.mean()),
+                           **{f"p{q}": float(value) for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))}}
+    return rows
+
+class _Session:
+    """
+    The data-fetch and analysis calls one dashboard render makes, either
+    straight through the scraper ("direct") or through a FetchService shared
+    by every simulated user ("service").
+    """
+    def __init__(self, mode, service, recorder, rng, highlights_date):
+        self.mode = mode
+        self.service = service
+        self.recorder = recorder
+        self.rng = rng
+        self.highlights_date = highlights_date
+        self.suid = self.aut = None
+
+    def login(self):
+        _, self.suid, self.aut = self.recorder.measure("login", fetch_and_parse_stocks, os.getenv('BOURSTAD_USERNAME'), os.getenv('BOURSTAD_PASSWORD'))
+
+    def run(self):
+        measure = self.recorder.measure
+        if self.mode == "service":
+            stocks_df = measure("get_bourstad_securities", self.service.stock_list)
+        else:
+            stocks_df = measure("get_bourstad_securities", get_bourstad_securities)
+        if stocks_df is None or stocks_df.empty:
+            return
+
+        symbols = stocks_df['id'].tolist()
+        records = []
+        for symbol in self.rng.sample(symbols, min(QUOTES_PER_SESSION, len(symbols))):
+            if self.mode == "service":
+                quote = measure("fetch_stock_data", self.service.quote, symbol)
+                record = quote.to_dict() if quote else None
+            else:
+                record = measure("fetch_stock_data", fetch_stock_data, symbol, stocks_df)
+            if record:
+                records.append(record)
+
+        highlight_symbols = [map_bourstad_to_yfinance(symbol) for symbol in symbols[:HIGHLIGHT_SYMBOLS]]
+        if self.mode == "service":
+            measure("fetch_highlights_data", self.service.highlights, self.highlights_date, highlight_symbols)
+            measure("analyze_stocks", self.service.recommendations)
+            if self.suid:
+                measure("fetch_owned_securities", self.service.owned_securities, self.suid, self.aut)
+        else:
+            measure("fetch_highlights_data", fetch_highlights_data, highlight_symbols, self.highlights_date)
+            measure("analyze_stocks", analyze_stocks, records)
+            if self.suid:
+                measure("fetch_owned_securities", fetch_owned_securities, self.suid, self.aut)
+
+def run_load(users=10, iterations=3, mode="direct", think_time=0.0, latency=0.05, jitter=0.0, error_rate=0.0,
+             warm_cache=False, trace_memory=True, seed=0, recordings_dir=RECORDINGS_DIR):
+    """
+    Simulate concurrent dashboard users against the local stub server.
+    Args:
+        users (int): Concurrent simulated users, one thread each.
+        iterations (int): Dashboard renders per user.
+        mode (str): "direct" calls the scraper like today's dashboard;
+            "service" shares one FetchService between users.
+        think_time (float): Pause between two renders of a user, in seconds.
+        latency, jitter, error_rate: Stub server behaviour.
+        warm_cache (bool): Start from a copy of the quote cache instead of an empty one.
+        trace_memory (bool): Track Python allocations with tracemalloc (slower).
+        seed (int): Seed of the symbols each user looks at.
+        recordings_dir (str): Recordings replayed by the stub.
+
+    Returns:
+        dict: Latency per operation, throughput, upstream requests and memory.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}; choose from {', '.join(MODES)}")
+
+    root = os.getcwd()
+    environment = dict(os.environ)
+    workdir = tempfile.mkdtemp(prefix="bourstad-load-")
+    server = None
+    try:
+        # Relative paths (cache/, data/) resolve inside the scratch directory, so
+        # the run starts cold and never touches the real caches or stores
+        os.makedirs(os.path.join(workdir, os.path.dirname(EXTRACTED_STOCKS_FILE)))
+        shutil.copy(os.path.join(root, EXTRACTED_STOCKS_FILE), os.path.join(workdir, EXTRACTED_STOCKS_FILE))
+        if warm_cache:
+            shutil.copytree(os.path.join(root, CACHE_DIR), os.path.join(workdir, CACHE_DIR))
+        else:
+            os.makedirs(os.path.join(workdir, CACHE_DIR))
+
+        server = start_stub(latency=latency, jitter=jitter, error_rate=error_rate, seed=seed,
+                            recordings_dir=os.path.join(root, recordings_dir),
+                            stocks_file=os.path.join(root, EXTRACTED_STOCKS_FILE),
+                            cache_dir=os.path.join(root, CACHE_DIR))
+        os.environ.setdefault('BOURSTAD_USERNAME', "loadtest@example.com")
+        os.environ.setdefault('BOURSTAD_PASSWORD', "loadtest")
+        os.chdir(workdir)
+
+        recorder = LoadRecorder()
+        service = FetchService() if mode == "service" else None
+        highlights_date = (pd.Timestamp.today() - pd.offsets.BDay(1)).normalize()
+
+        def user(index):
+            session = _Session(mode, service, recorder, random.Random(seed + index), highlights_date)
+            session.login()
+            for iteration in range(iterations):
+                session.run()
+                if think_time and iteration < iterations - 1:
+                    time.sleep(think_time)
+
+        if trace_memory:
+            tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+        upstream_before = sum(server.requests[kind] for kind in ("bourstad", "yahoo"))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            list(executor.map(user, range(users)))
+        elapsed = time.perf_counter() - start
+
+        report = {
+            "mode": mode,
+            "users": users,
+            "iterations": iterations,
+            "elapsed": elapsed,
+            "sessions_per_second": users * iterations / elapsed,
+            "operations": latency_summary(recorder.samples),
+            "errors": dict(recorder.errors),
+        }
+        calls = sum(len(values) for values in recorder.samples.values())
+        upstream = sum(server.requests[kind] for kind in ("bourstad", "yahoo")) - upstream_before
+        report["throughput"] = calls / elapsed
+        report["upstream"] = {"bourstad": server.requests["bourstad"], "yahoo": server.requests["yahoo"], "errors": server.requests["errors"],
+                              "per_session": upstream / (users * iterations), "amplification": upstream / calls if calls else 0.0}
+        if trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report["memory"] = {"growth_mb": (current - memory_before) / 2**20, "peak_mb": peak / 2**20}
+        else:
+            report["memory"] = {}
+        if resource is not None:
+            report["memory"]["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        if service is not None:
+            report["cache"] = service.stats()
+        return report
+    finally:
+        os.chdir(root)
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        os.environ.clear()
+        os.environ.update(environment)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def format_report(report):
+    """
+    Human-readable lines for a run_load report.
+    """
+    lines = [
+        f"Mode: {report['mode']}, {report['users']} users x {report['iterations']} renders in {report['elapsed']:.2f} s",
+        f"Sessions: {report['sessions_per_second']:.2f}/s, calls: {report['throughput']:.1f}/s",
+        "",
+        f"{'Operation':<26}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)",
+    ]
+    for operation, stats in report["operations"].items():
+        lines.append(f"{operation:<26}{stats['count']:>7}{stats['mean']:>10.1f}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}")
+    upstream = report["upstream"]
+    lines += [
+        "",
+        f"Upstream requests: {upstream['bourstad']} Bourstad, {upstream['yahoo']} Yahoo Finance ({upstream['errors']} failed)",
+        f"Upstream requests per session: {upstream['per_session']:.1f}, per call (amplification): {upstream['amplification']:.2f}",
+        "Memory: " + ", ".join(f"{name.replace('_mb', '')} {value:.1f} MB" for name, value in report["memory"].items()),
+    ]
+    if report["errors"]:
+        lines.append("Errors: " + ", ".join(f"{name} {count}" for name, count in report["errors"].items()))
+    if "cache" in report:
+        lines.append("Shared cache: " + ", ".join(f"{name} {value}" for name, value in report["cache"].items()))
+    return "\n".join(lines)
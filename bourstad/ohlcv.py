@@ -0,0 +1,209 @@
+import os
+import math
+import sqlite3
+import logging
+from contextlib import closing
+import pandas as pd
+import yfinance as yf
+from bourstad.upstream import yahoo_base_url, yahoo_history
+
+OHLCV_DB = "data/ohlcv.sqlite"
+
+OHLCV_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ohlcv (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    PRIMARY KEY (symbol, date)
+);
+CREATE INDEX IF NOT EXISTS ohlcv_date ON ohlcv (date);
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT PRIMARY KEY,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL
+);
+"""
+
+def _day(value):
+    return pd.Timestamp(value).normalize()
+
+def download_history(symbols, start, end):
+    """
+    Download daily OHLCV for several Yahoo Finance symbols in one request.
+    Args:
+        symbols (list): Yahoo Finance symbols.
+        start, end: Inclusive date range.
+
+    Returns:
+        dict: symbol -> DataFrame indexed by date with the OHLCV_FIELDS columns.
+    """
+    if yahoo_base_url():
+        # The Yahoo stand-in serves one symbol per request
+        histories = {symbol: yahoo_history(symbol, start=_day(start), end=_day(end) + pd.Timedelta(days=1)) for symbol in symbols}
+        return {symbol: frame for symbol, frame in histories.items() if not frame.empty}
+    data = yf.download(list(symbols), start=_day(start), end=_day(end) + pd.Timedelta(days=1),
+                       group_by="ticker", auto_adjust=False, progress=False, threads=True)
+    histories = {}
+    for symbol in symbols:
+        try:
+            frame = data[symbol] if isinstance(data.columns, pd.MultiIndex) else data
+        except KeyError:
+            continue
+        frame = frame[OHLCV_FIELDS].dropna(how="all")
+        if not frame.empty:
+            histories[symbol] = frame
+    return histories
+
+class OhlcvStore:
+    """
+    Local daily OHLCV history. Each symbol remembers the date range already
+    fetched, so only the missing days are downloaded.
+
+    With a PricePanel attached, downloaded bars are also appended to it and
+    panel() reads from the memory-mapped file instead of SQLite. An empty
+    panel is filled from the database when the store is opened.
+    """
+    def __init__(self, path=OHLCV_DB, fetch=download_history, prices=None):
+        self.path = path
+        self.fetch = fetch
+        self.prices = prices
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+        if prices is not None and len(prices) == 0:
+            stored = self.coverage()
+            if stored:
+                prices.append(self.histories(stored))
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def coverage(self, symbols=None):
+        """
+        symbol -> (start, end) of the days already fetched.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT symbol, start, end FROM coverage").fetchall()
+        wanted = set(symbols) if symbols is not None else None
+        return {symbol: (_day(start), _day(end)) for symbol, start, end in rows if wanted is None or symbol in wanted}
+
+    def missing_ranges(self, symbol, start, end, coverage=None):
+        """
+        Date ranges between start and end that were never fetched for a symbol.
+        """
+        start, end = _day(start), _day(end)
+        covered = (coverage if coverage is not None else self.coverage([symbol])).get(symbol)
+        if covered is None:
+            return [(start, end)] if start <= end else []
+        ranges = []
+        if start < covered[0]:
+            ranges.append((start, min(end, covered[0] - pd.Timedelta(days=1))))
+        if end > covered[1]:
+            ranges.append((max(start, covered[1] + pd.Timedelta(days=1)), end))
+        return [(first, last) for first, last in ranges if first <= last]
+
+    def ensure(self, symbols, start, end):
+        """
+        Download whatever part of [start, end] is missing for each symbol.
+        Symbols missing the same range are fetched together.
+
+        Returns:
+            int: Number of symbols that needed a download.
+        """
+        # Today's bar is still moving, so it is never marked as covered
+        end = min(_day(end), _day(pd.Timestamp.today()) - pd.Timedelta(days=1))
+        start = _day(start)
+        if start > end:
+            return 0
+
+        coverage = self.coverage(symbols)
+        groups = {}
+        for symbol in symbols:
+            for missing in self.missing_ranges(symbol, start, end, coverage):
+                groups.setdefault(missing, []).append(symbol)
+
+        fetched, failed = set(), set()
+        for (first, last), group in groups.items():
+            try:
+                histories = self.fetch(group, first, last)
+            except Exception as e:
+                logging.error(f"Error fetching OHLCV for {len(group)} symbols ({first.date()} to {last.date()}): {e}")
+                failed.update(group)
+                continue
+            # yfinance reports network errors as empty results; when nothing in the
+            # group came back, retry next time instead of marking the range covered
+            if not histories:
+                logging.warning(f"No OHLCV returned for {len(group)} symbols ({first.date()} to {last.date()}).")
+                failed.update(group)
+                continue
+            self._store(histories)
+            fetched.update(group)
+
+        # Extend coverage only for symbols whose missing ranges were all fetched:
+        # coverage is a single span, so it must not grow across a failed gap
+        updates = []
+        for symbol in fetched - failed:
+            old = coverage.get(symbol)
+            new_start = min(start, old[0]) if old else start
+            new_end = max(end, old[1]) if old else end
+            updates.append((symbol, new_start.strftime("%Y-%m-%d"), new_end.strftime("%Y-%m-%d")))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO coverage VALUES (?, ?, ?)", updates)
+        if groups:
+            logging.info(f"Fetched missing OHLCV for {len(fetched)} symbols in {len(groups)} request(s).")
+        return len(fetched)
+
+    def _store(self, histories):
+        rows = []
+        for symbol, frame in histories.items():
+            dates = pd.DatetimeIndex(frame.index).tz_localize(None).strftime("%Y-%m-%d")
+            values = frame[OHLCV_FIELDS].astype("float64").to_numpy()
+            rows.extend((symbol, day, *(None if math.isnan(value) else float(value) for value in row)) for day, row in zip(dates, values))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO ohlcv VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        if self.prices is not None:
+            self.prices.append(histories)
+
+    def load(self, symbols, start, end):
+        """
+        Stored bars between start and end as a long DataFrame (Symbol, Date, OHLCV).
+        """
+        symbols = list(symbols)
+        params = [_day(start).strftime("%Y-%m-%d"), _day(end).strftime("%Y-%m-%d")]
+        sql = "SELECT symbol, date, open, high, low, close, volume FROM ohlcv WHERE date BETWEEN ? AND ?"
+        if symbols:
+            sql += f" AND symbol IN ({', '.join('?' * len(symbols))})"
+            params.extend(symbols)
+        with closing(self._connect()) as conn:
+            frame = pd.read_sql_query(sql, conn, params=params)
+        frame.columns = ["Symbol", "Date", *OHLCV_FIELDS]
+        frame["Date"] = pd.to_datetime(frame["Date"])
+        return frame
+
+    def histories(self, symbols, start="1900-01-01", end="2100-12-31"):
+        """
+        Stored bars per symbol, in the form download_history returns them.
+        """
+        frame = self.load(symbols, start, end)
+        return {symbol: bars.set_index("Date")[OHLCV_FIELDS] for symbol, bars in frame.groupby("Symbol")}
+
+    def panel(self, symbols, start, end, fetch_missing=True):
+        """
+        Wide dates x symbols frames, one per OHLCV field.
+        Returns:
+            dict: field -> DataFrame.
+        """
+        if fetch_missing:
+            self.ensure(symbols, start, end)
+        if self.prices is not None:
+            self.prices.refresh()
+            if set(symbols) <= set(self.prices.symbols):
+                return self.prices.panel(symbols, start, end)
+        frame = self.load(symbols, start, end)
+        return {field: frame.pivot(index="Date", columns="Symbol", values=field) for field in OHLCV_FIELDS}
@@ -0,0 +1,283 @@
+import os
+import json
+import logging
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+from bourstad.atomic import write_json_atomic, file_lock
+
+PANEL_DIR = "data/panel"
+INDEX_FILE = "index.json"
+
+PANEL_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+DTYPE = "float64"
+
+# Room reserved when the data file is created or grown, so most appends
+# write into the existing mapping instead of rewriting the file
+MIN_DAYS = 256
+MIN_SYMBOLS = 64
+
+class PricePanel:
+    """
+    Days x symbols x fields float matrix in a memory-mapped file, with the
+    symbols and dates kept in a JSON index next to it.
+
+    Readers map the file read-only, so every process reading the panel shares
+    the same pages and array() / field() are views, not copies. Writers (run_all
+    and every worker process) take turns through a lock file: append() fills
+    new days and symbols in place, and only rewrites the file (under a new
+    name) when it runs out of room, a day has to be inserted before the last
+    one, or a bar readers can already see changes. The index is replaced after the data is flushed, so readers never see
+    days that are not written yet; call refresh() to pick up what was appended
+    since the panel was opened.
+    """
+    def __init__(self, directory=PANEL_DIR, fields=PANEL_FIELDS):
+        self.directory = directory
+        self.fields = list(fields)
+        self._lock = threading.Lock()
+        # (index, mapping, symbol positions), replaced as a whole so that
+        # readers on other threads never pair an index with the wrong file
+        self._state = None
+        self.refresh()
+
+    @property
+    def symbols(self):
+        return self._state[0]["symbols"]
+
+    @property
+    def dates(self):
+        return pd.DatetimeIndex(self._state[0]["dates"])
+
+    def __len__(self):
+        return len(self._state[0]["dates"])
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_index(self):
+        try:
+            with open(self._path(INDEX_FILE), encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {"version": 0, "data": None, "fields": self.fields, "capacity": [0, 0], "symbols": [], "dates": []}
+
+    def refresh(self):
+        """
+        Reload the index and remap the data file if a writer replaced it.
+        """
+        for _ in range(3):
+            index = self._read_index()
+            if index["fields"] != self.fields:
+                raise ValueError(f"Panel in {self.directory} has fields {index['fields']}, expected {self.fields}")
+            if self._state is not None and index["data"] == self._state[0]["data"]:
+                data = self._state[1]
+            else:
+                try:
+                    data = self._map(index, "r")
+                except FileNotFoundError:
+                    # A writer replaced the file between reading the index and mapping it
+                    continue
+            positions = {symbol: position for position, symbol in enumerate(index["symbols"])}
+            self._state = (index, data, positions)
+            return
+        raise RuntimeError(f"Could not open the price panel in {self.directory}")
+
+    def _map(self, index, mode):
+        if index["data"] is None:
+            return np.full((0, 0, len(self.fields)), np.nan)
+        shape = (*index["capacity"], len(self.fields))
+        return np.memmap(self._path(index["data"]), dtype=DTYPE, mode=mode, shape=shape)
+
+    @staticmethod
+    def _filled(state):
+        index, data, _ = state
+        return data[:len(index["dates"]), :len(index["symbols"])]
+
+    def array(self):
+        """
+        Read-only days x symbols x fields view of the filled part of the panel.
+        """
+        return self._filled(self._state)
+
+    def field(self, name):
+        """
+        Read-only days x symbols view of one field.
+        """
+        return self.array()[:, :, self.fields.index(name)]
+
+    def positions(self, symbols):
+        """
+        Column of each symbol in array(); KeyError for symbols not in the panel.
+        """
+        positions = self._state[2]
+        return [positions[symbol] for symbol in symbols]
+
+    def day_range(self, start=None, end=None, dates=None):
+        """
+        Slice of rows between two inclusive dates.
+        """
+        dates = self.dates if dates is None else dates
+        first = 0 if start is None else dates.searchsorted(pd.Timestamp(start).normalize(), side="left")
+        last = len(dates) if end is None else dates.searchsorted(pd.Timestamp(end).normalize(), side="right")
+        return slice(first, last)
+
+    def panel(self, symbols, start, end):
+        """
+        Wide dates x symbols frames, one per field, in the same form as
+        OhlcvStore.panel. Symbols the panel does not hold are left out.
+        Returns:
+            dict: field -> DataFrame.
+        """
+        state = self._state
+        index, _, positions = state
+        held = sorted(set(symbols) & set(positions))
+        dates = pd.DatetimeIndex(index["dates"])
+        rows = self.day_range(start, end, dates)
+        block = self._filled(state)[rows][:, [positions[symbol] for symbol in held]]
+        dates = dates[rows]
+        # Days on which none of these symbols traded are not part of their history
+        keep = ~np.isnan(block).all(axis=(1, 2)) if held else np.zeros(len(dates), dtype=bool)
+        return {field: pd.DataFrame(block[keep, :, k], index=pd.DatetimeIndex(dates[keep], name="Date"),
+                                    columns=pd.Index(held, name="Symbol"))
+                for k, field in enumerate(self.fields)}
+
+    def append(self, histories):
+        """
+        Write new or updated daily bars.
+        Args:
+            histories (dict): symbol -> DataFrame indexed by date with the panel fields.
+
+        Returns:
+            int: Number of days added to the panel.
+        """
+        histories = {symbol: frame for symbol, frame in histories.items() if frame is not None and not frame.empty}
+        if not histories:
+            return 0
+        # Appends from other processes land between two refreshes, so the
+        # index is re-read once the lock is held
+        with self._lock, file_lock(self._path(INDEX_FILE)):
+            self.refresh()
+            return self._write(histories, self._state[0])
+
+    def _write(self, histories, index):
+        """
+        Write bars on top of a panel index and publish the new index; the
+        caller holds the locks.
+        """
+        symbols = list(index["symbols"])
+        known = set(symbols)
+        symbols.extend(symbol for symbol in histories if symbol not in known)
+
+        old_dates = pd.DatetimeIndex(index["dates"])
+        incoming = pd.DatetimeIndex(np.concatenate([_days(frame.index).values for frame in histories.values()])).unique()
+        new_dates = incoming.difference(old_dates)
+        dates = old_dates.append(new_dates).sort_values()
+
+        days, width = index["capacity"]
+        in_order = len(old_dates) == 0 or len(new_dates) == 0 or new_dates.min() > old_dates.max()
+        # Readers may be looking at the filled part, so changed bars of days
+        # already published go to a new file like any other rewrite
+        if in_order and len(dates) <= days and len(symbols) <= width and not self._changes_published(histories, index):
+            data = self._map(index, "r+")
+            data_file = index["data"]
+            version = index["version"]
+        else:
+            version = index["version"] + 1
+            data_file = f"prices-{version}-{uuid.uuid4().hex[:8]}.bin"
+            data = self._rewrite(data_file, dates, old_dates, len(index["symbols"]),
+                                 (max(len(dates), MIN_DAYS, 2 * days if len(dates) > days else days),
+                                  max(len(symbols), MIN_SYMBOLS, 2 * width if len(symbols) > width else width)))
+
+        positions = {symbol: position for position, symbol in enumerate(symbols)}
+        for symbol, frame in histories.items():
+            rows = dates.get_indexer(_days(frame.index))
+            data[rows, positions[symbol]] = frame.reindex(columns=self.fields).to_numpy(dtype=DTYPE)
+        data.flush()
+        capacity = list(data.shape[:2])
+        del data
+
+        write_json_atomic(self._path(INDEX_FILE), {
+            "version": version,
+            "data": data_file,
+            "fields": self.fields,
+            "capacity": capacity,
+            "symbols": symbols,
+            "dates": [day.strftime("%Y-%m-%d") for day in dates],
+        })
+        if data_file != index["data"] and index["data"] is not None:
+            try:
+                os.remove(self._path(index["data"]))
+            except OSError:
+                # Still mapped by a reader on Windows; rebuild_panel clears it later
+                logging.warning(f"Could not remove the old price panel file {index['data']}.")
+        self.refresh()
+        return len(new_dates)
+
+    def _changes_published(self, histories, index):
+        """
+        Whether any bar would change a value on a day and symbol the index already holds.
+        """
+        if index["data"] is None:
+            return False
+        published = self._filled((index, self._map(index, "r"), None))
+        old_dates = pd.DatetimeIndex(index["dates"])
+        for symbol, frame in histories.items():
+            if symbol not in index["symbols"]:
+                continue
+            rows = old_dates.get_indexer(_days(frame.index))
+            held = rows >= 0
+            if held.any():
+                bars = frame.reindex(columns=self.fields).to_numpy(dtype=DTYPE)[held]
+                if not np.array_equal(published[rows[held], index["symbols"].index(symbol)], bars, equal_nan=True):
+                    return True
+        return False
+
+    def _rewrite(self, data_file, dates, old_dates, old_width, capacity):
+        """
+        New data file with the existing days moved to their place among dates.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        data = np.memmap(self._path(data_file), dtype=DTYPE, mode="w+", shape=(*capacity, len(self.fields)))
+        data[:] = np.nan
+        if len(old_dates):
+            data[dates.get_indexer(old_dates), :old_width] = self.array()
+        return data
+
+def _days(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+def rebuild_panel(store, directory=PANEL_DIR):
+    """
+    Replace the panel in a directory with every bar of an OhlcvStore.
+    Args:
+        store (OhlcvStore): Source of the bars.
+        directory (str): Panel directory.
+
+    Returns:
+        PricePanel: The rebuilt panel.
+    """
+    panel = PricePanel(directory)
+    histories = {symbol: frame for symbol, frame in store.histories(store.coverage()).items() if frame is not None and not frame.empty}
+    # Same lock as append: the new data file and index replace the old ones
+    # in one step, so readers and writers never see a half-built panel
+    with panel._lock, file_lock(panel._path(INDEX_FILE)):
+        panel.refresh()
+        current = panel._state[0]
+        empty = dict(current, data=None, capacity=[0, 0], symbols=[], dates=[])
+        if histories:
+            panel._write(histories, empty)
+        elif current["data"] is not None:
+            write_json_atomic(panel._path(INDEX_FILE), empty)
+            panel.refresh()
+        # Data files of the replaced panel
+        for name in os.listdir(directory) if os.path.isdir(directory) else []:
+            if name.startswith("prices-") and name != panel._state[0]["data"]:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+    return panel
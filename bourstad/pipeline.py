@@ -0,0 +1,277 @@
+import os
+import json
+import logging
+from datetime import datetime
+import pandas as pd
+from tqdm import tqdm
+from bourstad.scraper import (
+    fetch_and_parse_stocks,
+    fetch_stock_detail,
+    read_stored_page,
+    save_detailed_stock_data,
+    fetch_enhanced_stock_record,
+    map_bourstad_to_yfinance,
+    STOCKS_DIR,
+)
+from bourstad.history import SnapshotStore, HISTORY_DB
+from bourstad.ohlcv import OhlcvStore, download_history, OHLCV_DB
+from bourstad.panel import PricePanel, PANEL_DIR
+from bourstad.atomic import write_json_atomic
+from bourstad.archive import PageArchive, archive_path
+
+MANIFEST_FILE = "data/run_manifest.json"
+REAL_TIME_DATA_FILE = "data/real_time_stock_data.csv"
+
+# Stages of run_all, in execution order
+STAGES = ["listed", "fetched", "parsed", "enriched"]
+
+# How many symbols are processed between two manifest writes
+SAVE_EVERY = 25
+
+# Days of daily bars each run keeps up to date in the price panel
+PANEL_DAYS = 365
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+def new_manifest():
+    return {"created": _now(), "updated": None, "symbols": {}}
+
+def load_manifest(path=MANIFEST_FILE):
+    """
+    Load the run manifest, or start a new one if it is missing or unreadable.
+    """
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (json.JSONDecodeError, ValueError) as e:
+            logging.error(f"Corrupted run manifest {path}: {e}")
+    return new_manifest()
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    """
+    Write the run manifest atomically so an interrupted run never leaves a torn file.
+    """
+    manifest["updated"] = _now()
+    write_json_atomic(path, manifest, indent=2, ensure_ascii=False)
+
+def mark_stage(manifest, symbol, stage, result=None):
+    """
+    Record that a stage completed for a symbol, along with its output if any.
+    """
+    entry = manifest["symbols"].setdefault(symbol, {"stages": {}})
+    entry["stages"][stage] = _now()
+    if stage in ("parsed", "enriched"):
+        entry[stage] = result
+
+def clear_stages(manifest, stages):
+    """
+    Forget the given stages (and their outputs) for every symbol so they run again.
+    """
+    for entry in manifest["symbols"].values():
+        for stage in stages:
+            entry["stages"].pop(stage, None)
+            entry.pop(stage, None)
+
+def pending_symbols(manifest, stage):
+    """
+    Symbols whose previous stage is done but which still need the given stage.
+    """
+    previous = STAGES[STAGES.index(stage) - 1] if STAGES.index(stage) > 0 else None
+    pending = []
+    for symbol, entry in manifest["symbols"].items():
+        done = entry["stages"]
+        if stage in done:
+            continue
+        if previous and previous not in done:
+            continue
+        pending.append(symbol)
+    return pending
+
+def parse_stages(value):
+    """
+    Parse a comma-separated --stages value into an ordered list of stages.
+    """
+    if not value:
+        return list(STAGES)
+    requested = [stage.strip() for stage in value.split(",") if stage.strip()]
+    unknown = [stage for stage in requested if stage not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown)}. Valid stages: {', '.join(STAGES)}")
+    return [stage for stage in STAGES if stage in requested]
+
+def _login():
+    email = os.getenv('BOURSTAD_USERNAME')
+    password = os.getenv('BOURSTAD_PASSWORD')
+    return fetch_and_parse_stocks(email, password)
+
+def _run_stage(manifest, stage, symbols, work, manifest_file):
+    """
+    Run one per-symbol stage, checkpointing the manifest as it goes.
+    Failed symbols stay pending and are retried by the next --resume.
+    """
+    failed = []
+    try:
+        for count, symbol in enumerate(tqdm(symbols, desc=f"Stage {stage}", unit="stock"), start=1):
+            try:
+                done, result = work(symbol)
+            except Exception as e:
+                logging.error(f"Stage {stage} failed for {symbol}: {e}")
+                done, result = False, None
+            if done:
+                mark_stage(manifest, symbol, stage, result)
+            else:
+                failed.append(symbol)
+            if count % SAVE_EVERY == 0:
+                save_manifest(manifest, manifest_file)
+    finally:
+        save_manifest(manifest, manifest_file)
+
+    if failed:
+        print(f"Stage {stage}: {len(failed)} symbol(s) failed and will be retried with --resume.")
+        logging.warning(f"Stage {stage} failed for: {failed}")
+    return failed
+
+def run_all(resume=False, stages=None, manifest_file=MANIFEST_FILE, stocks_dir=STOCKS_DIR, history_db=HISTORY_DB, alerts=None):
+    """
+    Fetch, parse and enrich the whole universe, checkpointing per symbol and stage.
+    Args:
+        resume (bool): Continue from the existing manifest instead of starting over.
+        stages (list): Stages to run. Selected stages are re-run from scratch
+            unless resume is set, in which case only their pending symbols run.
+        manifest_file (str): Path to the run manifest.
+        stocks_dir (str): Directory holding the fetched Transaction pages.
+        history_db (str): Snapshot store receiving the enriched quotes.
+        alerts (AlertEngine): Checks each enriched quote as it arrives.
+
+    Returns:
+        dict: The final manifest.
+    """
+    stages = list(STAGES) if stages is None else stages
+
+    manifest = load_manifest(manifest_file) if (resume or stages != STAGES) else new_manifest()
+    if not resume:
+        clear_stages(manifest, stages)
+
+    suid = aut = None
+    if "listed" in stages or not manifest["symbols"]:
+        print("Fetching and parsing stock data...")
+        stocks, suid, aut = _login()
+        if not stocks:
+            print("No stocks found. Exiting.")
+            save_manifest(manifest, manifest_file)
+            return manifest
+        for stock in stocks:
+            if not stock['id']:
+                continue
+            entry = manifest["symbols"].setdefault(stock['id'], {"stages": {}})
+            entry["name"] = stock['name']
+            if "listed" not in entry["stages"]:
+                mark_stage(manifest, stock['id'], "listed")
+        save_manifest(manifest, manifest_file)
+
+    if "fetched" in stages:
+        pending = pending_symbols(manifest, "fetched")
+        if pending:
+            print("Fetching detailed stock HTML files...")
+            if not suid or not aut:
+                _, suid, aut = _login()
+            if not suid or not aut:
+                print("Login failed. Run again with --resume once Bourstad is reachable.")
+                return manifest
+            _run_stage(manifest, "fetched", pending, fetch_symbol(stocks_dir, {"suid": suid, "aut": aut}), manifest_file)
+
+    if "parsed" in stages:
+        print("Parsing detailed stock data...")
+        _run_stage(manifest, "parsed", pending_symbols(manifest, "parsed"), parse_symbol(stocks_dir), manifest_file)
+
+    if "enriched" in stages:
+        print("Fetching real-time stock data...")
+        _run_stage(manifest, "enriched", pending_symbols(manifest, "enriched"), enrich_symbol(alerts), manifest_file)
+        print("Updating the price panel...")
+        refresh_prices([symbol for symbol, entry in manifest["symbols"].items() if "enriched" in entry["stages"]])
+
+    write_outputs(manifest, stages, history_db)
+    return manifest
+
+def fetch_symbol(stocks_dir, session):
+    """
+    Work function of the fetched stage: archive a symbol's Transaction page.
+    The login in session ({'suid', 'aut'}) is renewed when it expires; if
+    logging in again fails, the remaining symbols stay pending.
+    """
+    archive = PageArchive(archive_path(stocks_dir))
+
+    def fetch(symbol):
+        if not session.get("suid"):
+            if session.get("login_failed"):
+                return False, None
+            _, session["suid"], session["aut"] = _login()
+            if not session["suid"]:
+                session["login_failed"] = True
+                print("Logging in again failed. Run again with --resume once Bourstad is reachable.")
+                return False, None
+        return fetch_stock_detail(symbol, session["suid"], session["aut"], stocks_dir, archive=archive, session=session), None
+    return fetch
+
+def parse_symbol(stocks_dir):
+    """
+    Work function of the parsed stage: parse a symbol's newest fetched Transaction page.
+    """
+    def parse(symbol):
+        details = read_stored_page(symbol, stocks_dir)
+        return details is not None, details
+    return parse
+
+def enrich_symbol(alerts=None):
+    """
+    Work function of the enriched stage: fetch a symbol's quote record, and
+    check it against the alert rules if an AlertEngine is given.
+    """
+    def enrich(symbol):
+        record = fetch_enhanced_stock_record(symbol)
+        if record is not None and alerts is not None:
+            alerts.on_quote(record)
+        return True, record
+    return enrich
+
+def refresh_prices(symbols, ohlcv_db=OHLCV_DB, panel_dir=PANEL_DIR, days=PANEL_DAYS):
+    """
+    Download the daily bars the OHLCV store is missing for some Bourstad
+    symbols over the last days, and append them to the shared price panel.
+    Workers call this for their own shards, in parallel.
+    Returns:
+        int: Number of symbols for which bars were downloaded.
+    """
+    if not symbols:
+        return 0
+    end = pd.Timestamp.now().normalize()
+    try:
+        store = OhlcvStore(ohlcv_db, fetch=download_history, prices=PricePanel(panel_dir))
+        return store.ensure(sorted({map_bourstad_to_yfinance(symbol) for symbol in symbols}), end - pd.Timedelta(days=days), end)
+    except Exception as e:
+        logging.error(f"Could not update the price panel: {e}")
+        return 0
+
+def write_outputs(manifest, stages, history_db=HISTORY_DB):
+    """
+    Save the parsed details, the real-time CSV and a quote snapshot from the
+    manifest, for the stages that were run.
+    """
+    if "parsed" in stages:
+        save_detailed_stock_data([entry["parsed"] for entry in manifest["symbols"].values() if entry.get("parsed")])
+
+    if "enriched" in stages:
+        records = [entry["enriched"] for entry in manifest["symbols"].values() if entry.get("enriched")]
+        pd.DataFrame(records).to_csv(REAL_TIME_DATA_FILE, index=False)
+        print(f"Real-time stock data saved to {REAL_TIME_DATA_FILE}")
+        if records:
+            ts = SnapshotStore(history_db).record_universe(records)
+            print(f"Quote snapshot {ts} saved to {history_db}")
+
+def summarize(manifest):
+    """
+    Count how many symbols completed each stage.
+    """
+    return {stage: sum(1 for entry in manifest["symbols"].values() if stage in entry["stages"]) for stage in STAGES}
@@ -0,0 +1,167 @@
+import math
+import logging
+import numpy as np
+import pandas as pd
+from bourstad.scraper import read_cached_info, map_bourstad_to_yfinance
+
+TRADING_DAYS = 252
+
+def load_sector_info(symbols):
+    """
+    Look up sector and industry of each symbol in the Yahoo Finance cache.
+    Args:
+        symbols (list): Bourstad symbols.
+
+    Returns:
+        dict: symbol -> (sector, industry), "Unknown" when not cached.
+    """
+    sectors = {}
+    for symbol in symbols:
+        info = read_cached_info(map_bourstad_to_yfinance(symbol)) or {}
+        sectors[symbol] = (info.get("sector") or "Unknown", info.get("industry") or "Unknown")
+    return sectors
+
+def returns_from_prices(panel, symbols):
+    """
+    Daily returns built from the daily closes of an OHLCV panel.
+    Args:
+        panel (dict): Field -> dates x Yahoo symbols DataFrame, as returned by OhlcvStore.panel.
+        symbols (list): Bourstad symbols to include.
+
+    Returns:
+        DataFrame: dates x symbols daily returns.
+    """
+    closes = panel["Close"].reindex(columns=[map_bourstad_to_yfinance(symbol) for symbol in symbols])
+    closes.columns = list(symbols)
+    return closes.pct_change(fill_method=None).iloc[1:]
+
+class Portfolio:
+    """
+    Vectorized view of the owned securities.
+
+    Positions are held in float64 arrays. Totals and sector exposure are kept
+    up to date incrementally, so a single quote change costs O(1).
+    """
+    def __init__(self, owned_securities, sectors=None):
+        owned_securities = list(owned_securities)
+        self.symbols = [owned.get("Symbol") for owned in owned_securities]
+        self.names = [owned.get("Name", "N/A") for owned in owned_securities]
+        self.index = {symbol: row for row, symbol in enumerate(self.symbols)}
+        self.quantity = np.array([owned.get("Quantity", 0) for owned in owned_securities], dtype=np.float64)
+        self.average_price = np.array([owned.get("Average Price", 0) for owned in owned_securities], dtype=np.float64)
+        self.price = np.array([owned.get("Current Price", 0) for owned in owned_securities], dtype=np.float64)
+
+        sectors = sectors if sectors is not None else load_sector_info(self.symbols)
+        self.sectors = [sectors.get(symbol, ("Unknown", "Unknown"))[0] for symbol in self.symbols]
+        self.industries = [sectors.get(symbol, ("Unknown", "Unknown"))[1] for symbol in self.symbols]
+
+        self._returns = None
+        self._covariance = None
+        self._recompute_totals()
+
+    def _recompute_totals(self):
+        self.market_value = self.quantity * self.price
+        self.cost = self.quantity * self.average_price
+        self.total_market_value = float(self.market_value.sum())
+        self.total_cost = float(self.cost.sum())
+        self.sector_value = {}
+        for sector, value in zip(self.sectors, self.market_value):
+            self.sector_value[sector] = self.sector_value.get(sector, 0.0) + float(value)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def update_quote(self, symbol, price):
+        """
+        Apply a new price to one position without recomputing the whole portfolio.
+        Returns:
+            bool: True if the symbol is held and its price changed.
+        """
+        row = self.index.get(symbol)
+        if row is None or price is None or math.isnan(price) or price == self.price[row]:
+            return False
+        delta = self.quantity[row] * (price - self.price[row])
+        self.price[row] = price
+        self.market_value[row] += delta
+        self.total_market_value += delta
+        self.sector_value[self.sectors[row]] += delta
+        return True
+
+    def weights(self):
+        if not self.total_market_value:
+            return np.zeros(len(self))
+        return self.market_value / self.total_market_value
+
+    def unrealized_pnl(self):
+        return self.market_value - self.cost
+
+    def sector_exposure(self):
+        """
+        Share of the portfolio market value held in each sector.
+        """
+        exposure = pd.Series(self.sector_value, dtype="float64").sort_values(ascending=False)
+        return exposure / self.total_market_value if self.total_market_value else exposure
+
+    def set_returns(self, returns):
+        """
+        Attach daily returns (dates x symbols). The covariance matrix is computed
+        once here, so volatility only has to be re-weighted when prices move.
+        """
+        returns = returns.reindex(columns=self.symbols)
+        self._returns = returns
+        self._covariance = returns.cov().fillna(0.0).to_numpy() if len(returns) > 1 else None
+
+    def volatility(self, annualize=True):
+        """
+        Portfolio volatility from the attached daily returns and the current weights.
+        """
+        if self._covariance is None:
+            return math.nan
+        weights = self.weights()
+        variance = float(weights @ self._covariance @ weights)
+        daily = math.sqrt(max(variance, 0.0))
+        return daily * math.sqrt(TRADING_DAYS) if annualize else daily
+
+    def position_volatility(self, annualize=True):
+        if self._covariance is None:
+            return np.full(len(self), np.nan)
+        daily = np.sqrt(np.diag(self._covariance))
+        return daily * math.sqrt(TRADING_DAYS) if annualize else daily
+
+    def correlation(self):
+        """
+        Correlation matrix of the held symbols' daily returns.
+        """
+        if self._returns is None:
+            return pd.DataFrame(index=self.symbols, columns=self.symbols, dtype="float64")
+        return self._returns.corr()
+
+    def positions_frame(self):
+        cost = np.where(self.cost == 0, np.nan, self.cost)
+        return pd.DataFrame({
+            "Symbol": self.symbols,
+            "Name": self.names,
+            "Quantity": self.quantity,
+            "Average Price": self.average_price,
+            "Current Price": self.price,
+            "Market Value": self.market_value,
+            "Weight": self.weights(),
+            "Unrealized P&L": self.unrealized_pnl(),
+            "Unrealized (%)": self.unrealized_pnl() / cost * 100,
+            "Volatility": self.position_volatility(),
+            "Sector": self.sectors,
+            "Industry": self.industries,
+        })
+
+    def summary(self):
+        pnl = self.total_market_value - self.total_cost
+        summary = {
+            "Positions": len(self),
+            "Market Value": self.total_market_value,
+            "Cost": self.total_cost,
+            "Unrealized P&L": pnl,
+            "Unrealized (%)": pnl / self.total_cost * 100 if self.total_cost else math.nan,
+            "Volatility": self.volatility(),
+        }
+        logging.info(f"Portfolio summary: {summary}")
+        return summary
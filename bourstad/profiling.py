@@ -0,0 +1,231 @@
+import io
+import os
+import sys
+import time
+import atexit
+import pstats
+import cProfile
+import logging
+import functools
+import threading
+import contextlib
+import tracemalloc
+from collections import Counter, defaultdict
+from bourstad.atomic import write_text_atomic
+
+PROFILE_DIR = "data/profiles"
+# Set to anything but "", "0", "false" or "no" to profile dashboard reruns and worker processes
+PROFILE_ENV = "BOURSTAD_PROFILE"
+
+# Seconds between two stack samples
+SAMPLE_INTERVAL = 0.005
+TRACEMALLOC_FRAMES = 10
+TOP_N = 15
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Running profilers, fed by the @profiled entry points
+_active = []
+_active_lock = threading.Lock()
+# Whether tracemalloc was started by the profilers (and not e.g. by the load test)
+_owns_tracemalloc = False
+
+def profiling_enabled():
+    return os.getenv(PROFILE_ENV, "").strip().lower() not in ("", "0", "false", "no")
+
+def profiled(function):
+    """
+    Time calls to a scraper, parser or analyzer entry point while a Profiler
+    runs, on every thread. Without a running profiler the call goes straight through.
+    """
+    section = f"{function.__module__.rsplit('.', 1)[-1]}.{function.__name__}"
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _active:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            for profiler in list(_active):
+                profiler.record(section, elapsed)
+    return wrapper
+
+class Profiler:
+    """
+    Profile of one run, saved to the profiles directory when it stops:
+    - <run>.pstats: cProfile statistics of the thread that started the profiler
+      (open with `python -m pstats` or snakeviz);
+    - <run>.collapsed: stacks sampled from every thread running Bourstad code,
+      in the collapsed format of flamegraph.pl and speedscope;
+    - <run>.txt: the summary also logged on stop: time per entry point, hot
+      functions and the largest allocation sites (tracemalloc).
+    """
+    def __init__(self, name, directory=PROFILE_DIR, interval=SAMPLE_INTERVAL, top=TOP_N):
+        self.name = name
+        self.directory = directory
+        self.interval = interval
+        self.top = top
+        self.run_id = f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        # section -> [calls, seconds]
+        self.sections = defaultdict(lambda: [0, 0.0])
+        self.stacks = Counter()
+        self.samples = 0
+        self._profile = None
+        self._sampler = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._started = None
+        self._stopped = False
+        self._roots = (PACKAGE_DIR, os.path.abspath(sys.argv[0]) if sys.argv and sys.argv[0] else PACKAGE_DIR)
+
+    @property
+    def base_path(self):
+        return os.path.join(self.directory, self.run_id)
+
+    def record(self, section, elapsed):
+        with self._lock:
+            entry = self.sections[section]
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def start(self):
+        global _owns_tracemalloc
+        self._started = time.perf_counter()
+        self._profile = cProfile.Profile()
+        try:
+            self._profile.enable()
+        except ValueError as e:
+            # Another profiler is already attached to this thread
+            logging.warning(f"Deterministic profiling unavailable for {self.name}: {e}")
+            self._profile = None
+        with _active_lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                _owns_tracemalloc = True
+            _active.append(self)
+        self._sampler = threading.Thread(target=self._sample, name=f"profiler-{self.name}", daemon=True)
+        self._sampler.start()
+        logging.info(f"Profiling {self.name} into {self.base_path}.*")
+        return self
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                ours = False
+                while frame is not None:
+                    code = frame.f_code
+                    ours = ours or code.co_filename.startswith(self._roots)
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                # Idle server and library threads are left out
+                if ours:
+                    self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        """
+        Stop profiling and save the outputs.
+        Returns:
+            str: The summary, or None if the profiler was not running.
+        """
+        global _owns_tracemalloc
+        if self._started is None or self._stopped:
+            return None
+        self._stopped = True
+        elapsed = time.perf_counter() - self._started
+        self._stop.set()
+        self._sampler.join()
+        if self._profile is not None:
+            self._profile.disable()
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        with _active_lock:
+            if self in _active:
+                _active.remove(self)
+            if not _active and _owns_tracemalloc and tracemalloc.is_tracing():
+                tracemalloc.stop()
+                _owns_tracemalloc = False
+
+        os.makedirs(self.directory, exist_ok=True)
+        if self._profile is not None:
+            self._profile.dump_stats(self.base_path + ".pstats")
+        write_text_atomic(self.base_path + ".collapsed", "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()))
+        summary = self.summary(elapsed, snapshot)
+        write_text_atomic(self.base_path + ".txt", summary)
+        logging.info(summary)
+        return summary
+
+    def summary(self, elapsed, snapshot=None):
+        lines = [f"Profile of {self.name}: {elapsed:.2f}s, {self.samples} stack samples, saved to {self.base_path}.*", ""]
+
+        lines.append("Entry points (all threads):")
+        lines.append(f"{'calls':>8} {'total s':>9} {'mean ms':>9}  function")
+        with self._lock:
+            sections = sorted(self.sections.items(), key=lambda item: item[1][1], reverse=True)
+        for section, (calls, seconds) in sections:
+            lines.append(f"{calls:>8} {seconds:>9.3f} {seconds / calls * 1000:>9.2f}  {section}")
+        if not sections:
+            lines.append("    (none called)")
+
+        if self._profile is not None:
+            for order, title in [("tottime", "Hot functions by own time"), ("cumulative", "Hot functions by cumulative time")]:
+                stream = io.StringIO()
+                stats = pstats.Stats(self._profile, stream=stream)
+                stats.strip_dirs().sort_stats(order).print_stats(self.top)
+                table = stream.getvalue()
+                # Keep the table, without pstats' header lines
+                start = table.find("ncalls")
+                lines += ["", f"{title} (profiled thread):", table[start:].rstrip() if start >= 0 else table.rstrip()]
+
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces([
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            ])
+            lines += ["", "Largest allocation sites still held:"]
+            for stat in snapshot.statistics("lineno")[:self.top]:
+                frame = stat.traceback[0]
+                lines.append(f"{stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  {frame.filename}:{frame.lineno}")
+        return "\n".join(lines) + "\n"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+def profile_from_env(name):
+    """
+    A Profiler for name when BOURSTAD_PROFILE is set, otherwise a no-op context.
+    """
+    return Profiler(name) if profiling_enabled() else contextlib.nullcontext()
+
+def profile_until_exit(name):
+    """
+    Profile the rest of the process and print the summary when it exits.
+    """
+    profiler = Profiler(name).start()
+    atexit.register(lambda: print(profiler.stop() or "", end=""))
+    return profiler
+
+def _forget_parent_profilers():
+    # A forked worker inherits the parent's profilers but must not feed or save them
+    global _owns_tracemalloc, _active_lock
+    _active_lock = threading.Lock()
+    _active.clear()
+    sys.setprofile(None)
+    if _owns_tracemalloc and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _owns_tracemalloc = False
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_parent_profilers)
@@ -0,0 +1,168 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from bourstad.analyzer import recommendations_by_symbol
+from bourstad.universe import QuoteRecord, Universe, NUMERIC_ATTRS
+from bourstad.scraper import read_cached_info, load_local_stocks, map_bourstad_to_yfinance, CACHE_DIR
+from bourstad.atomic import write_json_atomic
+
+RECOMMENDATIONS_FILE = "data/recommendations.json"
+
+def quote_version(quote):
+    """
+    Hash of the quote fields the analysis reads, so an unchanged quote keeps its result.
+    """
+    values = [quote.symbol, quote.name] + [getattr(quote, attr) for attr in NUMERIC_ATTRS]
+    return hashlib.blake2b(repr(values).encode("utf-8"), digest_size=12).hexdigest()
+
+def cache_file_version(path):
+    """
+    Version of a quote cache file: its size and modification time, so an
+    unchanged file is not read again.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+class RecommendationCache:
+    """
+    analyze_stocks results per symbol, kept with the version of the quote
+    they were computed from. Only symbols whose version changed since the
+    last call are analyzed again.
+
+    With a path, the results are saved between runs, so the CLI also only
+    analyzes what changed since its previous run.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        # symbol -> (quote version, result)
+        self._entries = {}
+        # symbol -> (cache file version, quote version) of the last cache file read
+        self._files = {}
+        self._lock = threading.Lock()
+        self.computed = 0
+        self.reused = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    data = json.load(file)
+                self._entries = {symbol: (entry["version"], entry["result"]) for symbol, entry in data["entries"].items()}
+                self._files = {symbol: tuple(versions) for symbol, versions in data["files"].items()}
+            except (json.JSONDecodeError, ValueError, KeyError) as e:
+                logging.error(f"Corrupted recommendations cache {path}: {e}")
+
+    def _results(self, versions, quotes_of):
+        """
+        Results for (symbol, version) pairs, analyzing the stale symbols' quotes together.
+        Args:
+            versions (list): (symbol, version) pairs, in output order.
+            quotes_of (callable): list of stale symbols -> their QuoteRecords.
+        """
+        with self._lock:
+            stale = [symbol for symbol, version in versions if self._entries.get(symbol, (None,))[0] != version]
+        fresh = {}
+        if stale:
+            quotes = quotes_of(stale)
+            fresh = dict(recommendations_by_symbol(Universe.from_quotes(quotes))) if quotes else {}
+        wanted = dict(versions)
+        with self._lock:
+            for symbol in stale:
+                if symbol in fresh:
+                    self._entries[symbol] = (wanted[symbol], fresh[symbol])
+                else:
+                    self._entries.pop(symbol, None)
+            self.computed += len(fresh)
+            self.reused += len(versions) - len(stale)
+            return [(symbol, self._entries[symbol][1]) for symbol, _ in versions if symbol in self._entries]
+
+    def for_quotes(self, quotes):
+        """
+        Recommendation lines for QuoteRecords (or display-column dicts), in order.
+        """
+        quotes = [quote if isinstance(quote, QuoteRecord) else QuoteRecord.from_dict(quote) for quote in quotes]
+        by_symbol = {quote.symbol: quote for quote in quotes}
+        results = self._results([(quote.symbol, quote_version(quote)) for quote in quotes],
+                                lambda stale: [by_symbol[symbol] for symbol in stale])
+        return [line for _, result in results for line in result["lines"]]
+
+    def for_cached_universe(self, stocks=None):
+        """
+        Recommendation lines for every security with a cached Yahoo Finance quote.
+        Only cache files written since the last call are read.
+        Args:
+            stocks (list): {'id', 'name'} dicts; defaults to data/extracted_stocks.txt.
+        """
+        return [line for _, result in self.cached_universe_results(stocks) for line in result["lines"]]
+
+    def cached_universe_results(self, stocks=None):
+        """
+        for_cached_universe, grouped by security.
+        Returns:
+            list: (symbol, {"lines", "signal", "score"}) pairs.
+        """
+        stocks = load_local_stocks() if stocks is None else stocks
+        loaded = {}
+
+        def load(symbol):
+            info = read_cached_info(map_bourstad_to_yfinance(symbol))
+            if info and info.get("currentPrice") is not None:
+                loaded[symbol] = QuoteRecord.from_info(symbol, info)
+            return loaded.get(symbol)
+
+        versions = []
+        for stock in stocks:
+            symbol = stock['id']
+            file_version = cache_file_version(os.path.join(CACHE_DIR, f"{map_bourstad_to_yfinance(symbol)}.json"))
+            if file_version is None:
+                continue
+            with self._lock:
+                known = self._files.get(symbol)
+            if known is not None and known[0] == file_version:
+                versions.append((symbol, known[1]))
+                continue
+            quote = load(symbol)
+            if quote is not None:
+                version = quote_version(quote)
+                with self._lock:
+                    self._files[symbol] = (file_version, version)
+                versions.append((symbol, version))
+
+        return self._results(versions, lambda stale: [quote for quote in (loaded.get(symbol) or load(symbol) for symbol in stale) if quote])
+
+    def signal(self, quote):
+        """
+        (signal, score) of one quote, e.g. ("Strong Buy", 100).
+        """
+        quote = quote if isinstance(quote, QuoteRecord) else QuoteRecord.from_dict(quote)
+        results = self._results([(quote.symbol, quote_version(quote))], lambda stale: [quote])
+        if not results:
+            return "Neutral", 50
+        return results[0][1]["signal"], results[0][1]["score"]
+
+    def invalidate(self, symbols=None):
+        with self._lock:
+            if symbols is None:
+                self._entries.clear()
+                self._files.clear()
+            else:
+                for symbol in symbols:
+                    self._entries.pop(symbol, None)
+                    self._files.pop(symbol, None)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                "entries": {symbol: {"version": version, "result": result} for symbol, (version, result) in self._entries.items()},
+                "files": self._files,
+            }
+        write_json_atomic(self.path, data, ensure_ascii=False)
+
+    def stats(self):
+        with self._lock:
+            return {"symbols": len(self._entries), "computed": self.computed, "reused": self.reused}
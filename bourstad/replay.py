@@ -0,0 +1,431 @@
+import os
+import json
+import time
+import zlib
+import random
+import logging
+import secrets
+import tempfile
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, urlencode
+import numpy as np
+import pandas as pd
+import requests
+from bourstad.atomic import write_text_atomic, write_json_atomic
+from bourstad.scraper import fetch_and_parse_stocks, fetch_stock_detail, load_local_stocks, map_bourstad_to_yfinance, CACHE_DIR, EXTRACTED_STOCKS_FILE
+from bourstad.holdings import fetch_holdings_page
+from bourstad.upstream import yahoo_info, yahoo_history, TRANSACTION_PATH, OWNED_PATH, HISTORY_FIELDS
+
+RECORDINGS_DIR = "data/recordings"
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Paths served by the stub when no recording says otherwise
+LOGIN_PATH = "/Login/Login"
+STOCKS_PATH = "/Transaction/Liste"
+LANDING_PATH = "/Accueil/Accueil"
+YAHOO_PREFIX = "/yahoo"
+# Webhook receiving alert events
+ALERTS_PATH = "/alerts"
+
+# Session tokens are never stored in recordings
+VOLATILE_PARAMS = {"suid", "aut"}
+
+# Days of history served for a yfinance period
+PERIOD_DAYS = {"1d": 1, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 365, "2y": 730, "5y": 1826, "10y": 3652, "max": 7305}
+
+# Number of positions in the synthesized portfolio
+STUB_POSITIONS = 5
+
+def request_key(method, url):
+    """
+    Recording key of a request: method, path and query without session tokens.
+    """
+    parsed = urlparse(url)
+    query = sorted((key, value) for key, values in parse_qs(parsed.query).items() if key not in VOLATILE_PARAMS for value in values)
+    return f"{method.upper()} {parsed.path}" + (f"?{urlencode(query)}" if query else "")
+
+def _index_file(directory):
+    return os.path.join(directory, "bourstad", "index.json")
+
+def load_index(directory=RECORDINGS_DIR):
+    path = _index_file(directory)
+    if not os.path.exists(path):
+        return {"paths": {}, "responses": {}}
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+class Recorder:
+    """
+    Record live Bourstad responses and Yahoo Finance payloads for the stub server.
+
+    Inside the context every requests.Session response is saved under its
+    request_key, with the session tokens scrubbed from the body.
+    """
+    def __init__(self, directory=RECORDINGS_DIR):
+        self.directory = directory
+        self.index = load_index(directory)
+        self._send = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self._send = requests.Session.send
+        recorder = self
+
+        def send(session, request, **kwargs):
+            response = recorder._send(session, request, **kwargs)
+            try:
+                recorder.record(request.method, request.url, response)
+            except Exception as e:
+                logging.error(f"Error recording {request.url}: {e}")
+            return response
+        requests.Session.send = send
+        return self
+
+    def __exit__(self, *exc):
+        requests.Session.send = self._send
+        self.save()
+
+    def record(self, method, url, response):
+        text = response.text
+        for key, values in parse_qs(urlparse(url).query).items():
+            if key in VOLATILE_PARAMS:
+                for value in values:
+                    text = text.replace(value, "replay")
+        key = request_key(method, url)
+        with self._lock:
+            entry = self.index["responses"].get(key) or {"file": f"{len(self.index['responses'])}.html"}
+            entry.update(status=response.status_code, content_type=response.headers.get("Content-Type", "text/html; charset=utf-8"))
+            self.index["responses"][key] = entry
+        write_text_atomic(os.path.join(self.directory, "bourstad", entry["file"]), text)
+
+    def record_path(self, name, url):
+        if url:
+            self.index["paths"][name] = urlparse(url).path
+
+    def record_yahoo(self, symbol, info=None, history=None):
+        if info:
+            write_json_atomic(os.path.join(self.directory, "yahoo", "info", f"{symbol}.json"), info)
+        if history is not None and not history.empty:
+            history = history[HISTORY_FIELDS].astype("float64")
+            write_json_atomic(os.path.join(self.directory, "yahoo", "history", f"{symbol}.json"), {
+                "index": pd.DatetimeIndex(history.index).tz_localize(None).strftime("%Y-%m-%d").tolist(),
+                "data": history.to_numpy().tolist(),
+            })
+
+    def save(self):
+        with self._lock:
+            write_json_atomic(_index_file(self.directory), self.index, indent=2)
+
+def record_session(email, password, directory=RECORDINGS_DIR, limit=None, history_period="1y"):
+    """
+    Log in to the live sites once and record everything the stub needs to replay them.
+    Args:
+        email, password: Bourstad credentials.
+        directory (str): Recordings directory.
+        limit (int): Record details of at most this many securities.
+        history_period (str): Yahoo Finance history period recorded per symbol.
+
+    Returns:
+        int: Number of securities recorded.
+    """
+    with Recorder(directory) as recorder:
+        recorder.record_path("login", os.getenv('BOURSTAD_LOGIN_URL'))
+        recorder.record_path("stocks", os.getenv('BOURSTAD_STOCKS_URL'))
+        stocks, suid, aut = fetch_and_parse_stocks(email, password)
+        if not suid:
+            return 0
+        fetch_holdings_page(suid, aut)
+
+        stocks = [stock for stock in stocks if stock['id']][:limit]
+        with tempfile.TemporaryDirectory() as pages:
+            for stock in stocks:
+                fetch_stock_detail(stock['id'], suid, aut, directory=pages)
+                symbol = map_bourstad_to_yfinance(stock['id'])
+                try:
+                    recorder.record_yahoo(symbol, yahoo_info(symbol), yahoo_history(symbol, period=history_period))
+                except Exception as e:
+                    logging.error(f"Error recording Yahoo Finance data for {symbol}: {e}")
+    print(f"Recorded {len(stocks)} securities to {directory}")
+    return len(stocks)
+
+def synthetic_history(symbol, info, start, end):
+    """
+    Deterministic daily bars for a symbol whose history was never recorded:
+    a random walk seeded by the symbol that ends at its current price.
+    """
+    days = pd.bdate_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize() - pd.Timedelta(days=1))
+    if not len(days):
+        return pd.DataFrame(columns=HISTORY_FIELDS)
+
+    rng = np.random.default_rng(zlib.crc32(symbol.encode("utf-8")))
+    price = float(info.get("currentPrice") or info.get("previousClose") or 100.0)
+    walk = rng.normal(0, 0.02, len(days)).cumsum()
+    close = price * np.exp(walk - walk[-1])
+    open_ = close * np.exp(rng.normal(0, 0.005, len(days)))
+    volume = float(info.get("averageVolume") or 100_000) * rng.lognormal(0, 0.3, len(days))
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * 1.01,
+        "Low": np.minimum(open_, close) * 0.99,
+        "Close": close,
+        "Volume": volume.round(),
+    }, index=days)
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Local stand-in for Bourstad and Yahoo Finance.
+
+    Recorded responses are replayed first. Anything not recorded is synthesized:
+    pages from the saved securities list, Yahoo Finance info from the quote cache,
+    and price history from synthetic_history. Every response can be delayed by
+    latency plus a random jitter, and fail with a 503 at error_rate.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, recordings_dir=RECORDINGS_DIR, latency=0.0, jitter=0.0, error_rate=0.0,
+                 seed=None, credentials=None, stocks_file=EXTRACTED_STOCKS_FILE, cache_dir=CACHE_DIR):
+        super().__init__(address, StubHandler)
+        self.recordings_dir = recordings_dir
+        self.index = load_index(recordings_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.credentials = credentials
+        self.stocks_file = stocks_file
+        self.cache_dir = cache_dir
+        self.login_path = self.index["paths"].get("login", LOGIN_PATH)
+        self.stocks_path = self.index["paths"].get("stocks", STOCKS_PATH)
+        self.requests = Counter()
+        self.alerts = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stocks = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environment(self):
+        """
+        Environment variables pointing the scraper and yfinance calls at this server.
+        """
+        return {
+            "BOURSTAD_BASE_URL": self.url,
+            "BOURSTAD_LOGIN_URL": self.url + self.login_path,
+            "BOURSTAD_STOCKS_URL": self.url + self.stocks_path,
+            "YAHOO_BASE_URL": self.url + YAHOO_PREFIX,
+            "BOURSTAD_ALERT_WEBHOOK": self.url + ALERTS_PATH,
+        }
+
+    def count(self, kind):
+        with self._lock:
+            self.requests[kind] += 1
+
+    def simulate(self):
+        """
+        Apply the configured latency; True if this request should fail.
+        """
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter) if self.jitter else self.latency
+            failed = self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        return failed
+
+    def stocks(self):
+        if self._stocks is None:
+            self._stocks = load_local_stocks(self.stocks_file)
+        return self._stocks
+
+    def recorded(self, key):
+        entry = self.index["responses"].get(key)
+        if entry is None:
+            return None
+        with open(os.path.join(self.recordings_dir, "bourstad", entry["file"]), "r", encoding="utf-8") as file:
+            return entry["status"], entry["content_type"], file.read()
+
+    def info(self, symbol):
+        for path in (os.path.join(self.recordings_dir, "yahoo", "info", f"{symbol}.json"), os.path.join(self.cache_dir, f"{symbol}.json")):
+            if os.path.exists(path):
+                try:
+                    with open(path, "r") as file:
+                        return json.load(file)
+                except (json.JSONDecodeError, ValueError):
+                    continue
+        return None
+
+    def history(self, symbol, params):
+        if "period" in params:
+            end = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+            start = end - pd.Timedelta(days=PERIOD_DAYS.get(params["period"][0], 365))
+        else:
+            start, end = pd.Timestamp(params["start"][0]), pd.Timestamp(params["end"][0])
+
+        path = os.path.join(self.recordings_dir, "yahoo", "history", f"{symbol}.json")
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                data = json.load(file)
+            frame = pd.DataFrame(data["data"], index=pd.DatetimeIndex(data["index"]), columns=HISTORY_FIELDS)
+            return frame[(frame.index >= start) & (frame.index < end)]
+        info = self.info(symbol)
+        return None if info is None else synthetic_history(symbol, info, start, end)
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "BourstadStub/1.0"
+
+    def do_GET(self):
+        self.respond("GET")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        if urlparse(self.path).path == ALERTS_PATH:
+            with self.server._lock:
+                self.server.alerts.append(json.loads(body))
+            self.send(204, "text/plain", "")
+            return
+        self.form = parse_qs(body)
+        self.respond("POST")
+
+    def respond(self, method):
+        server = self.server
+        parsed = urlparse(self.path)
+        kind = "yahoo" if parsed.path.startswith(YAHOO_PREFIX) else "bourstad"
+        server.count(kind)
+        if server.simulate():
+            server.count("errors")
+            self.send(503, "text/plain", "Service unavailable (simulated)")
+            return
+        try:
+            if kind == "yahoo":
+                self.yahoo(parsed)
+            elif method == "POST":
+                self.login()
+            else:
+                recorded = server.recorded(request_key(method, self.path))
+                if recorded:
+                    self.send(*recorded)
+                else:
+                    self.send(200, "text/html; charset=utf-8", self.synthesize(parsed))
+        except Exception as e:
+            logging.error(f"Stub error for {self.path}: {e}")
+            self.send(500, "text/plain", str(e))
+
+    def login(self):
+        server = self.server
+        email = self.form.get("txt_email", [""])[0]
+        password = self.form.get("txt_password", [""])[0]
+        if server.credentials and (email, password) != server.credentials:
+            self.send(200, "text/html; charset=utf-8", login_page())
+            return
+        # Every login gets its own session, like the real site
+        location = f"{LANDING_PATH}?suid={secrets.token_hex(4)}&aut={secrets.token_hex(8)}"
+        self.send(302, "text/html; charset=utf-8", "", {"Location": location})
+
+    def synthesize(self, parsed):
+        server = self.server
+        params = parse_qs(parsed.query)
+        if parsed.path == server.stocks_path:
+            options = "".join(f'<option id="{stock["id"]}">{stock["name"]}</option>' for stock in [{"id": "", "name": "Selectionner un titre"}] + server.stocks())
+            return f'<html><body><select class="select2_demo_3">{options}</select></body></html>'
+        if parsed.path == TRANSACTION_PATH:
+            symbol = params.get("Symbol", [""])[0]
+            info = server.info(map_bourstad_to_yfinance(symbol)) or {}
+            return (f'<html><body><h1 class="stock-name">{info.get("longName", symbol)}</h1>'
+                    f'<span class="last-price">{info.get("currentPrice", "N/A")}</span>'
+                    f'<div class="market-cap">{info.get("marketCap", "N/A")}</div></body></html>')
+        if parsed.path == OWNED_PATH:
+            return holdings_page(server)
+        if parsed.path == LANDING_PATH:
+            return "<html><body><h1>Tableau de bord (replay)</h1></body></html>"
+        return login_page()
+
+    def yahoo(self, parsed):
+        server = self.server
+        route, _, symbol = parsed.path[len(YAHOO_PREFIX):].strip("/").partition("/")
+        if route == "info":
+            info = server.info(symbol)
+            if info is None:
+                self.send(404, "application/json", json.dumps({"error": f"Unknown symbol {symbol}"}))
+            else:
+                self.send(200, "application/json", json.dumps(info))
+        elif route == "history":
+            history = server.history(symbol, parse_qs(parsed.query))
+            if history is None:
+                self.send(404, "application/json", json.dumps({"error": f"Unknown symbol {symbol}"}))
+            else:
+                self.send(200, "application/json", json.dumps({
+                    "index": history.index.strftime("%Y-%m-%d").tolist(),
+                    "data": history[HISTORY_FIELDS].to_numpy().tolist(),
+                }))
+        else:
+            self.send(404, "application/json", json.dumps({"error": f"Unknown endpoint {parsed.path}"}))
+
+    def send(self, status, content_type, body, headers=None):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"Stub {self.address_string()} {format % args}")
+
+def login_page():
+    return ('<html><body><form method="post"><input type="hidden" name="__RequestVerificationToken" value="replay">'
+            '<input name="txt_email"><input name="txt_password" type="password">'
+            '<button>Se connecter</button></form></body></html>')
+
+def holdings_page(server):
+    """
+    dashboard_Part page with a small portfolio of the first cached securities.
+    """
+    rows = []
+    for stock in server.stocks():
+        info = server.info(map_bourstad_to_yfinance(stock['id']))
+        if not info or not info.get("currentPrice"):
+            continue
+        quantity = 10 * (len(rows) + 1)
+        price = float(info["currentPrice"])
+        average = round(price * 0.95, 2)
+        rows.append(f"<tr><td>{stock['id']}</td><td>{stock['name']}</td><td>{quantity}</td>"
+                    f"<td>{average:,.2f} $</td><td>{price:,.2f} $</td><td>{quantity * (price - average):,.2f} $</td></tr>")
+        if len(rows) == STUB_POSITIONS:
+            break
+    return f'<html><body><table id="editable2"><tbody>{"".join(rows)}</tbody></table></body></html>'
+
+def start_stub(host=DEFAULT_HOST, port=0, **options):
+    """
+    Start a StubServer in a background thread and point this process at it.
+    Returns:
+        StubServer: Call shutdown() and server_close() when done.
+    """
+    server = StubServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ.update(server.environment())
+    return server
+
+def serve_stub(host=DEFAULT_HOST, port=DEFAULT_PORT, **options):
+    """
+    Run the stub server until interrupted.
+    """
+    server = StubServer((host, port), **options)
+    print(f"Serving the offline Bourstad and Yahoo Finance stand-in on {server.url} (Ctrl+C to stop)")
+    print("Point the tools at it with:")
+    for name, value in server.environment().items():
+        print(f"  export {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
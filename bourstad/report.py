@@ -0,0 +1,277 @@
+import os
+import re
+import html
+import json
+import hashlib
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from bourstad.atomic import write_text_atomic, write_json_atomic
+from bourstad.api import to_json_value, quote_to_json
+from bourstad.charts import downsample_series, MAX_POINTS
+from bourstad.highlights import get_rankings, RANKINGS, CACHE_DIR
+from bourstad.panel import PricePanel, PANEL_DIR
+from bourstad.recommendations import RecommendationCache, RECOMMENDATIONS_FILE
+from bourstad.screener import load_cached_universe
+from bourstad.universe import DISPLAY_NAMES
+from bourstad.scraper import load_local_stocks, map_bourstad_to_yfinance
+
+# Static report, served next to the documentation in docs/index.html
+REPORT_DIR = "docs/report"
+MANIFEST_FILE = "manifest.json"
+
+# Part of every page's input digest: bump it when the templates change so
+# that the next build renders every page again
+RENDER_VERSION = 1
+
+MAX_WORKERS = 8
+CHART_WIDTH = 720
+CHART_HEIGHT = 240
+
+HIGHLIGHTS_PATTERN = re.compile(r"highlights_(?:rankings_)?(\d{4}-\d{2}-\d{2})\.json$")
+
+RANKING_TITLES = {
+    "gainers": "📈 Largest Gainers",
+    "losers": "📉 Largest Losers",
+    "volume": "🔥 Most Traded (Volume)",
+    "mentions": "🏅 Honorable Mentions",
+}
+
+STYLE = """
+body { font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 0; }
+header { background: #4CAF50; color: white; padding: 1rem 2rem; }
+header a { color: white; margin-right: 1rem; }
+main { padding: 2rem; }
+a { color: #4CAF50; text-decoration: none; }
+a:hover { text-decoration: underline; }
+table { border-collapse: collapse; font-size: 0.9rem; }
+th, td { border: 1px solid #ddd; padding: 0.25rem 0.5rem; text-align: right; }
+th { background: #f4f4f4; }
+td:nth-child(-n+2) { text-align: left; }
+"""
+
+def symbol_file(symbol):
+    """
+    Page name of a symbol; Bourstad symbols such as "Y:CA" are not valid file names everywhere.
+    """
+    return "symbols/" + re.sub(r"[^A-Za-z0-9._-]", "_", symbol)
+
+def input_digest(payload):
+    text = json.dumps([RENDER_VERSION, payload], sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+def format_value(value):
+    if value is None or value == "N/A":
+        return "N/A"
+    if isinstance(value, float):
+        return f"{value:,.0f}" if abs(value) >= 1_000_000 else f"{value:,.2f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return str(value)
+
+def _page(title, body, depth=0):
+    """
+    Full HTML page with the report navigation.
+    Args:
+        depth (int): Directory depth of the page below the report root, for relative links.
+    """
+    root = "../" * depth
+    nav = "".join(f'<a href="{root}{target}">{label}</a>' for target, label in [
+        ("index.html", "Data"), ("highlights.html", "Highlights"), ("recommendations.html", "Recommendations")])
+    return (f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="UTF-8">\n'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+            f'<title>{html.escape(title)}</title>\n<style>{STYLE}</style>\n</head>\n<body>\n'
+            f'<header><h1>{html.escape(title)}</h1>{nav}</header>\n<main>\n{body}\n</main>\n</body>\n</html>\n')
+
+def _table(rows, columns, links=None):
+    """
+    HTML table of dict rows.
+    Args:
+        links (dict): Optional column -> function(row) giving the href of that cell.
+    """
+    links = links or {}
+    head = "".join(f"<th>{html.escape(column)}</th>" for column in columns)
+    body = []
+    for row in rows:
+        cells = []
+        for column in columns:
+            text = html.escape(format_value(row.get(column)))
+            if column in links:
+                text = f'<a href="{html.escape(links[column](row))}">{text}</a>'
+            cells.append(f"<td>{text}</td>")
+        body.append("<tr>" + "".join(cells) + "</tr>")
+    return f"<table>\n<tr>{head}</tr>\n" + "\n".join(body) + "\n</table>"
+
+def svg_chart(dates, values, width=CHART_WIDTH, height=CHART_HEIGHT):
+    """
+    Inline SVG line chart, so symbol pages need no script or chart library.
+    """
+    if len(values) < 2:
+        return "<p>No price history available.</p>"
+    low, high = min(values), max(values)
+    spread = (high - low) or 1.0
+    step = width / (len(values) - 1)
+    points = " ".join(f"{index * step:.1f},{height - (value - low) / spread * height:.1f}" for index, value in enumerate(values))
+    return (f'<svg viewBox="-60 -10 {width + 70} {height + 40}" width="{width + 70}" role="img">'
+            f'<polyline fill="none" stroke="#4CAF50" stroke-width="1.5" points="{points}"/>'
+            f'<text x="-55" y="5" font-size="12">{high:,.2f}</text>'
+            f'<text x="-55" y="{height}" font-size="12">{low:,.2f}</text>'
+            f'<text x="0" y="{height + 25}" font-size="12">{html.escape(dates[0])}</text>'
+            f'<text x="{width}" y="{height + 25}" font-size="12" text-anchor="end">{html.escape(dates[-1])}</text>'
+            f'</svg>')
+
+def render_index(payload):
+    rows = payload["rows"]
+    signals = ", ".join(f"{signal}: {count}" for signal, count in payload["signals"].items())
+    columns = ["Symbol", "Name", "Signal"] + list(DISPLAY_NAMES.values())
+    body = (f"<p>{len(rows)} securities with a cached quote. {html.escape(signals)}</p>\n"
+            + _table(rows, columns, {"Symbol": lambda row: symbol_file(row["Symbol"]) + ".html"}))
+    return _page("Bourstad Assistant 📊", body)
+
+def render_symbol(payload):
+    quote = payload["quote"]
+    summary = [{"Field": column, "Value": value} for column, value in quote.items() if column not in ("Symbol", "Name")]
+    lines = "".join(f"<li>{html.escape(line)}</li>" for line in payload["recommendations"])
+    body = (f"<h2>Recommendation: {html.escape(payload['signal'])} (Score: {payload['score']})</h2>\n<ul>{lines}</ul>\n"
+            f"<h2>Price history</h2>\n{svg_chart(payload['chart']['dates'], payload['chart']['close'])}\n"
+            f"<h2>Quote</h2>\n" + _table(summary, ["Field", "Value"]))
+    return _page(f"{quote['Name']} ({quote['Symbol']})", body, depth=1)
+
+def render_highlights(payload):
+    if payload["date"] is None:
+        return _page("📅 Highlights of the Day", "<p>No highlights data available.</p>")
+    sections = []
+    for name in RANKINGS:
+        rows = payload["rankings"].get(name, [])
+        columns = list(rows[0]) if rows else []
+        sections.append(f"<h2>{RANKING_TITLES[name]}</h2>\n" + (_table(rows, columns) if rows else "<p>None.</p>"))
+    return _page(f"📅 Highlights of {payload['date']}", "\n".join(sections))
+
+def render_recommendations(payload):
+    lines = "".join(f"<li>{html.escape(line)}</li>" for line in payload["lines"])
+    return _page("📈 Recommendations", f"<ul>{lines}</ul>")
+
+def latest_highlights(cache_dir=CACHE_DIR):
+    """
+    Rankings of the most recent day in the highlights cache.
+    Returns:
+        tuple: (day as YYYY-MM-DD, rankings), or (None, None) if no day was cached.
+    """
+    if not os.path.isdir(cache_dir):
+        return None, None
+    days = set()
+    for filename in os.listdir(cache_dir):
+        match = HIGHLIGHTS_PATTERN.match(filename)
+        if match:
+            days.add(match.group(1))
+    for day in sorted(days, reverse=True):
+        highlights_df = None
+        raw_file = os.path.join(cache_dir, f"highlights_{day}.json")
+        if os.path.exists(raw_file):
+            try:
+                with open(raw_file, "r") as file:
+                    highlights_df = pd.DataFrame(json.load(file))
+            except (json.JSONDecodeError, ValueError) as e:
+                logging.error(f"Corrupted highlights cache for {day}: {e}")
+        rankings = get_rankings(day, highlights_df, cache_dir)
+        if rankings is not None:
+            return day, rankings
+    return None, None
+
+def price_chart(panel, symbol, max_points=MAX_POINTS):
+    """
+    Downsampled closing prices of a Bourstad symbol from the price panel.
+    """
+    try:
+        position = panel.positions([map_bourstad_to_yfinance(symbol)])[0]
+    except KeyError:
+        return {"dates": [], "close": []}
+    close = downsample_series(pd.Series(panel.field("Close")[:, position], index=panel.dates), max_points)
+    return {"dates": [day.strftime("%Y-%m-%d") for day in close.index], "close": [float(value) for value in close]}
+
+def _render(output_dir, name, payload, render, previous):
+    """
+    Write a page's JSON and HTML unless its inputs are the same as in the previous build.
+    Returns:
+        tuple: (name, input digest, whether the page was rendered).
+    """
+    digest = input_digest(payload)
+    html_file = os.path.join(output_dir, f"{name}.html")
+    json_file = os.path.join(output_dir, f"{name}.json")
+    if previous.get(name) == digest and os.path.exists(html_file) and os.path.exists(json_file):
+        return name, digest, False
+    write_json_atomic(json_file, payload, ensure_ascii=False)
+    write_text_atomic(html_file, render(payload))
+    return name, digest, True
+
+def build_report(output_dir=REPORT_DIR, stocks=None, workers=MAX_WORKERS, panel_dir=PANEL_DIR, memo_path=RECOMMENDATIONS_FILE):
+    """
+    Render the dashboard views as static HTML and JSON from the local caches only:
+    the Data table (index), one quote summary and chart page per symbol, the
+    latest highlights, and the recommendations.
+
+    Pages are rendered in parallel, and only when their inputs changed since
+    the previous build; pages of securities that left the universe are removed.
+    Args:
+        output_dir (str): Report directory.
+        stocks (list): {'id', 'name'} dicts; defaults to data/extracted_stocks.txt.
+        workers (int): Render threads.
+
+    Returns:
+        dict: Number of pages, and how many were rendered, skipped and removed.
+    """
+    stocks = load_local_stocks() if stocks is None else stocks
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    previous = {}
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as file:
+                previous = json.load(file)
+        except (json.JSONDecodeError, ValueError) as e:
+            logging.error(f"Corrupted report manifest {manifest_path}: {e}")
+
+    memo = RecommendationCache(memo_path)
+    results = dict(memo.cached_universe_results(stocks))
+    memo.save()
+    universe = load_cached_universe(stocks)
+    quotes = {quote.symbol: quote_to_json(quote) for quote in universe}
+    panel = PricePanel(panel_dir)
+
+    rows = [dict(quote, Signal=results[symbol]["signal"]) for symbol, quote in quotes.items() if symbol in results]
+    day, rankings = latest_highlights()
+    pages = [
+        ("index", lambda: to_json_value({"rows": rows, "signals": dict(Counter(row["Signal"] for row in rows).most_common())}), render_index),
+        ("highlights", lambda: to_json_value({"date": day, "rankings": rankings or {}}), render_highlights),
+        ("recommendations", lambda: {"lines": [line for result in results.values() for line in result["lines"]]}, render_recommendations),
+    ]
+    for symbol, quote in quotes.items():
+        if symbol not in results:
+            continue
+        pages.append((symbol_file(symbol), lambda symbol=symbol, quote=quote: to_json_value({
+            "quote": quote,
+            "signal": results[symbol]["signal"],
+            "score": results[symbol]["score"],
+            "recommendations": results[symbol]["lines"],
+            "chart": price_chart(panel, symbol),
+        }), render_symbol))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report") as executor:
+        futures = [executor.submit(lambda name=name, payload=payload, render=render: _render(output_dir, name, payload(), render, previous))
+                   for name, payload, render in pages]
+        built = [future.result() for future in futures]
+
+    removed = 0
+    current = {name for name, _, _ in built}
+    for name in set(previous) - current:
+        for extension in (".html", ".json"):
+            try:
+                os.remove(os.path.join(output_dir, name + extension))
+            except FileNotFoundError:
+                continue
+        removed += 1
+
+    write_json_atomic(manifest_path, {name: digest for name, digest, _ in built})
+    rendered = sum(1 for _, _, was_rendered in built if was_rendered)
+    logging.info(f"Report in {output_dir}: {rendered} page(s) rendered, {len(built) - rendered} unchanged, {removed} removed.")
+    return {"pages": len(built), "rendered": rendered, "skipped": len(built) - rendered, "removed": removed}
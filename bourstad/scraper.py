@@ -4,10 +4,19 @@ from urllib.parse import urlparse, parse_qs
 from dotenv import load_dotenv
 import os
 import json
-import yfinance as yf
 import pandas as pd
 import logging
+import time
+import math
 from tqdm import tqdm  # Add this import for the progress bar
+from bourstad.universe import QuoteRecord, Universe
+from bourstad.highlights import compute_rankings, save_rankings
+from bourstad.singleflight import INFLIGHT
+from bourstad.archive import PageArchive, archive_path
+from bourstad.atomic import write_text_atomic, write_json_atomic
+from bourstad.holdings import fetch_holdings_page, extract_holdings_table, parse_holdings_table, record_holdings, account_id
+from bourstad.upstream import bourstad_url, yahoo_info, yahoo_history, TRANSACTION_PATH
+from bourstad.profiling import profiled
 
 # Configure logging
 LOG_FILE = "debug_log.txt"
@@ -19,6 +28,14 @@ load_dotenv()
 CACHE_DIR = "cache"
 os.makedirs(CACHE_DIR, exist_ok=True)
 
+STOCKS_DIR = "data/stocks"
+DETAILED_DATA_FILE = "detailed_stock_data.json"
+EXTRACTED_STOCKS_FILE = "data/extracted_stocks.txt"
+
+# Bourstad exchange suffixes and their Yahoo Finance equivalents
+EXCHANGE_SUFFIXES = {"CA": ".TO", "EGX": ""}
+
+@profiled
 def fetch_and_parse_stocks(email, password):
     """
     Authenticate with Bourstad and fetch available stocks.
@@ -76,7 +93,7 @@ def fetch_and_parse_stocks(email, password):
 
     # Save stocks to a file
     os.makedirs('data', exist_ok=True)
-    with open('data/extracted_stocks.txt', 'w', encoding='utf-8') as file:
+    with open(EXTRACTED_STOCKS_FILE, 'w', encoding='utf-8') as file:
         for stock in stocks:
             file.write(f"ID: {stock['id']}, Name: {stock['name']}\n")
 
@@ -92,42 +109,126 @@ def fetch_stock_details():
         logging.warning("No stocks found to fetch details.")
         return
 
-    base_url = "https://bourstad.cirano.qc.ca/Transaction/Transaction"
-    os.makedirs('data/stocks', exist_ok=True)
-
     # Add a progress bar for fetching stock details
+    archive = PageArchive(archive_path(STOCKS_DIR))
     for stock in tqdm(stocks, desc="Fetching stock details", unit="stock"):
-        symbol = stock['id']
-        url = f"{base_url}?suid={suid}&aut={aut}&Symbol={symbol}"
-        response = requests.get(url)
-        if response.status_code == 200:
-            with open(f"data/stocks/{symbol}.html", 'w', encoding='utf-8') as file:
-                file.write(response.text)
-            logging.info(f"Fetched stock details for {symbol}.")
-        else:
-            logging.error(f"Failed to fetch stock details for {symbol}. Status code: {response.status_code}")
+        fetch_stock_detail(stock['id'], suid, aut, archive=archive)
+
+@profiled
+def is_transaction_page(page):
+    """
+    Whether a page is a stock's Transaction page. Once the session expires,
+    Bourstad answers with its login form instead, still with status 200.
+    """
+    return "stock-name" in page and "Se connecter" not in page
+
+def fetch_stock_detail(symbol, suid, aut, directory=STOCKS_DIR, archive=None, session=None):
+    """
+    Fetch the Transaction page of a single stock and save it to disk.
+    Args:
+        symbol (str): Bourstad symbol.
+        suid (str): Session user ID.
+        aut (str): Authentication token.
+        directory (str): Directory where the HTML page is saved.
+        archive (PageArchive): Archive receiving the page instead of a loose HTML file.
+        session (dict): Login ({'suid', 'aut'}) of the caller; its suid is cleared
+            when the session expired, so the caller logs in again.
+
+    Returns:
+        bool: True if the page was fetched and saved.
+    """
+    url = f"{bourstad_url(TRANSACTION_PATH)}?suid={suid}&aut={aut}&Symbol={symbol}"
+    os.makedirs(directory, exist_ok=True)
+    response = requests.get(url)
+    if response.status_code != 200:
+        logging.error(f"Failed to fetch stock details for {symbol}. Status code: {response.status_code}")
+        return False
+    if not is_transaction_page(response.text):
+        logging.error(f"Got the login page instead of the stock details of {symbol}; the session expired.")
+        if session is not None:
+            session["suid"] = session["aut"] = None
+        return False
+
+    if archive is not None:
+        archive.put(symbol, response.text)
+    else:
+        write_text_atomic(os.path.join(directory, f"{symbol}.html"), response.text)
+    logging.info(f"Fetched stock details for {symbol}.")
+    return True
+
+def _loose_pages(directory):
+    # symbol -> modification time of its loose <symbol>.html page
+    if not os.path.isdir(directory):
+        return {}
+    return {filename[:-len('.html')]: os.path.getmtime(os.path.join(directory, filename))
+            for filename in os.listdir(directory) if filename.endswith('.html')}
+
+def stored_pages(directory):
+    """
+    Newest saved Transaction page of each symbol: archived pages first, read
+    in order from the archive, then loose HTML files of symbols not archived
+    or saved after their newest archived page.
+    Yields:
+        tuple: (symbol, text stream) pairs; each stream is closed once the next pair is requested.
+    """
+    loose = _loose_pages(directory)
+    archived = set()
+    if os.path.exists(archive_path(directory)):
+        archive = PageArchive(archive_path(directory))
+        fetched = archive.fetched_times()
+        archived = {symbol for symbol, when in fetched.items() if loose.get(symbol, -math.inf) <= when}
+        for symbol, stream in archive.iter_latest(archived):
+            yield symbol, stream
+    for symbol in sorted(set(loose) - archived):
+        with open(os.path.join(directory, f"{symbol}.html"), 'r', encoding='utf-8') as file:
+            yield symbol, file
+
+def read_stored_page(symbol, directory=STOCKS_DIR):
+    """
+    Parsed newest saved page of one symbol, archived or loose, or None if it was never fetched.
+    """
+    filepath = os.path.join(directory, f"{symbol}.html")
+    loose = os.path.getmtime(filepath) if os.path.exists(filepath) else None
+    if os.path.exists(archive_path(directory)):
+        archive = PageArchive(archive_path(directory))
+        versions = archive.versions(symbol)
+        if versions and (loose is None or loose <= versions[-1][0]):
+            return parse_stock_page(archive.read(symbol), symbol)
+    if loose is not None:
+        return parse_stock_file(filepath)
+    return None
 
 def parse_all_stocks(directory):
-    stocks_dir = directory
     all_stock_details = []
+    for symbol, page in tqdm(stored_pages(directory), desc="Parsing stock files", unit="file"):
+        all_stock_details.append(parse_stock_page(page, symbol))
 
-    # List all HTML files and initialize a progress bar
-    stock_files = [f for f in os.listdir(stocks_dir) if f.endswith('.html')]
-    for filename in tqdm(stock_files, desc="Parsing stock files", unit="file"):
-        filepath = os.path.join(stocks_dir, filename)
-        with open(filepath, 'r', encoding='utf-8') as file:
-            soup = BeautifulSoup(file, 'html.parser')
-            stock_details = {
-                'symbol': filename.replace('.html', ''),
-                'name': soup.find('h1', class_='stock-name').text.strip() if soup.find('h1', class_='stock-name') else 'N/A',
-                'last_price': soup.find('span', class_='last-price').text.strip() if soup.find('span', class_='last-price') else 'N/A',
-                'market_cap': soup.find('div', class_='market-cap').text.strip() if soup.find('div', class_='market-cap') else 'N/A',
-            }
-            all_stock_details.append(stock_details)
-
-    with open('detailed_stock_data.json', 'w', encoding='utf-8') as json_file:
+    save_detailed_stock_data(all_stock_details)
+
+def parse_stock_file(filepath):
+    """
+    Parse a saved Transaction page into a stock details dict.
+    """
+    with open(filepath, 'r', encoding='utf-8') as file:
+        return parse_stock_page(file, os.path.basename(filepath).replace('.html', ''))
+
+@profiled
+def parse_stock_page(page, symbol):
+    """
+    Parse a Transaction page (HTML text or a text stream) into a stock details dict.
+    """
+    soup = BeautifulSoup(page, 'html.parser')
+    return {
+        'symbol': symbol,
+        'name': soup.find('h1', class_='stock-name').text.strip() if soup.find('h1', class_='stock-name') else 'N/A',
+        'last_price': soup.find('span', class_='last-price').text.strip() if soup.find('span', class_='last-price') else 'N/A',
+        'market_cap': soup.find('div', class_='market-cap').text.strip() if soup.find('div', class_='market-cap') else 'N/A',
+    }
+
+def save_detailed_stock_data(all_stock_details, output_file=DETAILED_DATA_FILE):
+    with open(output_file, 'w', encoding='utf-8') as json_file:
         json.dump(all_stock_details, json_file, indent=4, ensure_ascii=False)
-    logging.info(f"Parsed all stocks and saved to detailed_stock_data.json.")
+    logging.info(f"Parsed all stocks and saved to {output_file}.")
 
 def fetch_enhanced_stock_data(symbols):
     stock_data = []
@@ -135,39 +236,11 @@ def fetch_enhanced_stock_data(symbols):
 
     for symbol in symbols:
         try:
-            # Reformat symbol if necessary (e.g., remove ":CA" or ":EGX")
-            formatted_symbol = symbol.split(":")[0] if ":" in symbol else symbol
-
-            stock = yf.Ticker(formatted_symbol)
-            info = stock.info
-
-            # Check if timezone metadata exists
-            if not info.get("exchangeTimezoneName"):
-                print(f"{symbol}: No timezone found; possibly delisted.")
-                logging.warning(f"{symbol}: No timezone found; possibly delisted.")
-                invalid_symbols.append(symbol)
-                continue
-
-            # Ensure the data is valid
-            if "currentPrice" not in info or info["currentPrice"] is None:
-                print(f"{symbol}: No data found; possibly delisted.")
-                logging.warning(f"{symbol}: No data found; possibly delisted.")
+            record = fetch_enhanced_stock_record(symbol)
+            if record is None:
                 invalid_symbols.append(symbol)
                 continue
-
-            stock_data.append({
-                "Symbol": symbol,
-                "Name": info.get("longName", "N/A"),
-                "Current Price": info.get("currentPrice", "N/A"),
-                "Market Cap": info.get("marketCap", "N/A"),
-                "P/E Ratio": info.get("trailingPE", "N/A"),
-                "EPS": info.get("trailingEps", "N/A"),
-                "Dividend Yield": info.get("dividendYield", "N/A"),
-                "52-Week High": info.get("fiftyTwoWeekHigh", "N/A"),
-                "52-Week Low": info.get("fiftyTwoWeekLow", "N/A"),
-                "Volume": info.get("volume", "N/A"),
-            })
-            logging.info(f"Fetched enhanced stock data for {symbol}: {stock_data[-1]}")
+            stock_data.append(record)
         except Exception as e:
             print(f"Error fetching data for {symbol}: {e}")
             logging.error(f"Error fetching data for {symbol}: {e}")
@@ -180,57 +253,68 @@ def fetch_enhanced_stock_data(symbols):
             print(f"- {invalid_symbol}")
         logging.warning(f"The following symbols could not be fetched: {invalid_symbols}")
 
-    return pd.DataFrame(stock_data)
+    return Universe.from_records(stock_data).to_frame()
+
+@profiled
+def fetch_enhanced_stock_record(symbol):
+    """
+    Fetch real-time data for a single symbol using yfinance.
+    Args:
+        symbol (str): Bourstad symbol.
+
+    Returns:
+        dict: The stock record, or None if the symbol has no usable data.
+        Network errors are raised so callers can retry later.
+    """
+    info = yahoo_info(map_bourstad_to_yfinance(symbol))
+
+    # Check if timezone metadata exists
+    if not info.get("exchangeTimezoneName"):
+        print(f"{symbol}: No timezone found; possibly delisted.")
+        logging.warning(f"{symbol}: No timezone found; possibly delisted.")
+        return None
+
+    # Ensure the data is valid
+    if "currentPrice" not in info or info["currentPrice"] is None:
+        print(f"{symbol}: No data found; possibly delisted.")
+        logging.warning(f"{symbol}: No data found; possibly delisted.")
+        return None
+
+    record = QuoteRecord.from_info(symbol, info).to_dict()
+    logging.info(f"Fetched enhanced stock data for {symbol}: {record}")
+    return record
 
-def fetch_owned_securities(suid, aut):
+@profiled
+def fetch_owned_securities(suid, aut, email=None):
     """
     Fetch the securities currently owned by the user from Bourstad.
     Args:
         suid (str): Session user ID.
         aut (str): Authentication token.
+        email (str): Login email the holdings history is kept under; defaults to BOURSTAD_USERNAME.
 
     Returns:
         list: A list of owned securities with details.
     """
-    base_url = "https://bourstad.cirano.qc.ca/dashboard_Part/dashboard_Part"
-    url = f"{base_url}?suid={suid}&aut={aut}"
-
     try:
-        response = requests.get(url)
-        if response.status_code != 200:
-            print(f"Failed to fetch owned securities. Status code: {response.status_code}")
-            logging.error(f"Failed to fetch owned securities. Status code: {response.status_code}")
+        page = fetch_holdings_page(suid, aut)
+        if page is None:
             return []
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Parse the owned securities table
-        table = soup.find('table', {'id': 'editable2'})
-        if not table:
+        # Only the holdings table is parsed, not the whole dashboard page
+        table_html = extract_holdings_table(page)
+        if not table_html:
             print("No owned securities table found.")
             logging.warning("No owned securities table found.")
             return []
 
-        owned_securities = []
-        rows = table.find('tbody').find_all('tr')
-        for row in rows:
-            columns = row.find_all('td')
-            if len(columns) < 5:
-                continue  # Skip rows with missing data
+        owned_securities = parse_holdings_table(table_html)
 
-            try:
-                owned_securities.append({
-                    "Symbol": columns[0].text.strip(),
-                    "Name": columns[1].text.strip(),
-                    "Quantity": int(columns[2].text.strip()),
-                    "Average Price": float(columns[3].text.strip().replace('$', '').replace(',', '')),
-                    "Current Price": float(columns[4].text.strip().replace('$', '').replace(',', '')),
-                    "Gains and Losses": columns[5].text.strip(),
-                })
-                logging.info(f"Parsed owned security: {owned_securities[-1]}")
-            except Exception as e:
-                print(f"Error parsing row: {e}")
-                logging.error(f"Error parsing row: {e}")
+        # Keep the history of our holdings when they change; a storage error must not hide them
+        try:
+            record_holdings(owned_securities, account_id(email))
+        except Exception as e:
+            logging.error(f"Error recording owned securities snapshot: {e}")
 
         return owned_securities
 
@@ -239,9 +323,10 @@ def fetch_owned_securities(suid, aut):
         logging.error(f"Error fetching owned securities: {e}")
         return []
 
-def fetch_with_cache(symbol):
+def read_cached_info(symbol):
     """
-    Fetch stock data with caching.
+    Read cached Yahoo Finance info for a symbol without touching the network.
+    Returns None if the symbol is not cached.
     """
     cache_file = os.path.join(CACHE_DIR, f"{symbol}.json")
 
@@ -254,12 +339,36 @@ def fetch_with_cache(symbol):
                 return data
         except (json.JSONDecodeError, ValueError) as e:
             logging.error(f"Corrupted cache file detected for {symbol}: {e}")
-            os.remove(cache_file)  # Delete the corrupted cache file
+            try:
+                os.remove(cache_file)  # Delete the corrupted cache file
+            except FileNotFoundError:
+                pass  # Already removed by a concurrent reader
+        except FileNotFoundError:
+            pass  # Removed between the existence check and the read
+    return None
+
+def fetch_with_cache(symbol):
+    """
+    Fetch stock data with caching.
+    Concurrent callers missing the cache for the same symbol share one request.
+    """
+    data = read_cached_info(symbol)
+    if data is not None:
+        return data
+    # Keyed by (source, symbol, params): concurrent callers of the same request wait for it
+    return INFLIGHT.do(("yahoo-info", symbol), lambda: _fetch_info(symbol))
+
+def _fetch_info(symbol):
+    # The previous in-flight request may have filled the cache since our check
+    data = read_cached_info(symbol)
+    if data is not None:
+        return data
+
+    cache_file = os.path.join(CACHE_DIR, f"{symbol}.json")
 
     # Fetch data from Yahoo Finance
     try:
-        stock = yf.Ticker(symbol)
-        info = stock.info
+        info = yahoo_info(symbol)
 
         # Ensure the fetched data is valid
         if not info or not isinstance(info, dict):
@@ -267,8 +376,7 @@ def fetch_with_cache(symbol):
             return None
 
         # Cache the data
-        with open(cache_file, "w") as file:
-            json.dump(info, file)
+        write_json_atomic(cache_file, info)
         logging.info(f"Fetched and cached data for {symbol}: {info}")
 
         return info
@@ -276,10 +384,17 @@ def fetch_with_cache(symbol):
         logging.error(f"Error fetching data for {symbol}: {e}")
         return None
 
+@profiled
 def fetch_highlights_data(symbols, selected_date):
     """
     Fetch and cache highlights data for a specific day.
+    Concurrent callers asking for the same day and symbols share one fetch.
     """
+    key = ("yahoo-highlights", pd.Timestamp(selected_date).strftime('%Y-%m-%d'), tuple(symbols))
+    # Every caller gets its own copy of the shared result
+    return INFLIGHT.do(key, lambda: _fetch_highlights_data(symbols, selected_date)).copy()
+
+def _fetch_highlights_data(symbols, selected_date):
     try:
         cache_file = os.path.join(CACHE_DIR, f"highlights_{selected_date.strftime('%Y-%m-%d')}.json")
 
@@ -292,30 +407,33 @@ def fetch_highlights_data(symbols, selected_date):
                     return data
             except (json.JSONDecodeError, ValueError) as e:
                 logging.error(f"Corrupted cache file detected for highlights on {selected_date}: {e}")
-                os.remove(cache_file)  # Delete the corrupted cache file
+                try:
+                    os.remove(cache_file)  # Delete the corrupted cache file
+                except FileNotFoundError:
+                    pass
 
         # Fetch historical data for all symbols
         historical_data = []
         for symbol in symbols:
             try:
                 formatted_symbol = map_bourstad_to_yfinance(symbol)
-                stock = yf.Ticker(formatted_symbol)
+                info = yahoo_info(formatted_symbol)
 
                 # Check if timezone metadata exists
-                if not stock.info.get("exchangeTimezoneName"):
+                if not info.get("exchangeTimezoneName"):
                     logging.warning(f"{symbol}: No timezone found; possibly delisted.")
                     continue
 
-                history = stock.history(start=selected_date, end=selected_date + pd.Timedelta(days=1))
+                history = yahoo_history(formatted_symbol, start=selected_date, end=selected_date + pd.Timedelta(days=1))
                 if history.empty:
                     logging.warning(f"{symbol}: No data found; possibly delisted.")
                     continue
 
                 row = {
                     "Symbol": symbol,
-                    "Name": stock.info.get("longName", "N/A"),
+                    "Name": info.get("longName", "N/A"),
                     "Change (%)": ((history['Close'].iloc[-1] - history['Open'].iloc[0]) / history['Open'].iloc[0]) * 100,
-                    "Volume": history['Volume'].iloc[-1],
+                    "Volume": int(history['Volume'].iloc[-1]),
                 }
                 historical_data.append(row)
                 logging.info(f"Fetched historical data for {symbol}: {row}")
@@ -324,18 +442,21 @@ def fetch_highlights_data(symbols, selected_date):
 
         # Cache the data
         if historical_data:
-            with open(cache_file, "w") as file:
-                json.dump(historical_data, file)
+            write_json_atomic(cache_file, historical_data)
             logging.info(f"Cached highlights data for {selected_date}: {historical_data}")
 
+            # Rank the day once so the Highlights tab is a pure lookup afterwards
+            save_rankings(selected_date, compute_rankings(pd.DataFrame(historical_data)))
+
         return pd.DataFrame(historical_data)
     except Exception as e:
         logging.error(f"Error in fetch_highlights_data: {e}")
         return pd.DataFrame()  # Return an empty DataFrame on failure
 
-def fetch_stock_data(symbol, stocks_df):
+@profiled
+def fetch_quote(symbol):
     """
-    Fetch real-time stock data with caching.
+    Fetch the real-time quote of a Bourstad symbol as a QuoteRecord, with caching.
     """
     try:
         formatted_symbol = map_bourstad_to_yfinance(symbol)
@@ -348,25 +469,41 @@ def fetch_stock_data(symbol, stocks_df):
             logging.warning(f"No valid data for {formatted_symbol}. Skipping.")
             return None
 
-        stock_data = {
-            "Symbol": symbol,
-            "Name": info.get("longName", "N/A"),
-            "Current Price": info.get("currentPrice", "N/A"),
-            "Market Cap": info.get("marketCap", "N/A"),
-            "52-Week High": info.get("fiftyTwoWeekHigh", "N/A"),
-            "52-Week Low": info.get("fiftyTwoWeekLow", "N/A"),
-        }
-        logging.info(f"Fetched stock data for {symbol}: {stock_data}")
-        return stock_data
+        quote = QuoteRecord.from_info(symbol, info)
+        logging.info(f"Fetched stock data for {symbol}: {quote}")
+        return quote
     except Exception as e:
         logging.error(f"Error fetching stock data for {symbol}: {e}")
         return None
 
+def fetch_stock_data(symbol, stocks_df):
+    """
+    Fetch real-time stock data with caching.
+    """
+    quote = fetch_quote(symbol)
+    return quote.to_dict() if quote else None
+
+@profiled
 def fetch_batch_stock_data(symbols, stocks_df, delay=0.05):
     """
     Fetch real-time stock data for a batch of symbols.
+    Args:
+        symbols (list): Symbols to fetch.
+        stocks_df (DataFrame): Securities list (unused, kept for compatibility).
+        delay (float): Pause after each symbol that was not already cached.
+
+    Returns:
+        Universe: Quotes for every symbol with valid data.
     """
-    # ...existing code...
+    quotes = []
+    for symbol in symbols:
+        cached = os.path.exists(os.path.join(CACHE_DIR, f"{map_bourstad_to_yfinance(symbol)}.json"))
+        quote = fetch_quote(symbol)
+        if quote:
+            quotes.append(quote)
+        if not cached and delay:
+            time.sleep(delay)
+    return Universe.from_quotes(quotes)
 
 def map_bourstad_to_yfinance(bourstad_symbol):
     """
@@ -378,7 +515,58 @@ def map_bourstad_to_yfinance(bourstad_symbol):
         "VNP:CA": "VNP.TO",  # Example mapping for Canadian stocks
         # Add more mappings as needed
     }
-    return mappings.get(bourstad_symbol, bourstad_symbol)  # Default to the same symbol
+    if not bourstad_symbol or bourstad_symbol in mappings:
+        return mappings.get(bourstad_symbol, bourstad_symbol)
+
+    # Otherwise translate the Bourstad exchange suffix (e.g. "AAV:CA" -> "AAV.TO")
+    symbol, _, exchange = bourstad_symbol.partition(":")
+    if exchange in EXCHANGE_SUFFIXES:
+        # Yahoo Finance writes share classes with a dash (e.g. "AGF.B" -> "AGF-B")
+        return symbol.replace(".", "-") + EXCHANGE_SUFFIXES[exchange]
+    return bourstad_symbol  # Default to the same symbol
+
+def load_local_stocks(path=EXTRACTED_STOCKS_FILE):
+    """
+    Load the securities list saved by fetch_and_parse_stocks.
+    Returns:
+        list: Stocks as {'id', 'name'} dicts, without the empty placeholder entry.
+    """
+    stocks = []
+    if not os.path.exists(path):
+        print(f"Local stock data file '{path}' not found.")
+        return stocks
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            stock_id, _, stock_name = line.rstrip("\n").partition(", Name: ")
+            stock_id = stock_id.replace("ID: ", "").strip()
+            if stock_id:  # Skip empty or invalid symbols
+                stocks.append({"id": stock_id, "name": stock_name.strip()})
+    return stocks
+
+@profiled
+def get_bourstad_securities():
+    """
+    Fetch securities from Bourstad or load from a local file if login is not available.
+    Returns:
+        DataFrame: DataFrame containing stock data.
+    """
+    try:
+        # Attempt to fetch stocks using login credentials
+        email = os.getenv('BOURSTAD_USERNAME')
+        password = os.getenv('BOURSTAD_PASSWORD')
+        if email and password:
+            stocks, _, _ = fetch_and_parse_stocks(email, password)
+        else:
+            raise ValueError("No login credentials provided. Falling back to local data.")
+
+    except Exception as e:
+        print(f"Error fetching stocks: {e}")
+        # Fallback: Load stocks from a local file
+        stocks = load_local_stocks()
+
+    # Remove the 0th symbol (nonexistent)
+    stocks = [stock for stock in stocks if stock['id'] and stock['id'] != ""]
+    return pd.DataFrame(stocks)
 
 def output_security_mappings(email, password):
     """
@@ -0,0 +1,317 @@
+import re
+import time
+import logging
+import operator
+import threading
+from collections import OrderedDict
+import numpy as np
+from bourstad.universe import Universe, QuoteRecord, NUMERIC_ATTRS, DISPLAY_NAMES
+from bourstad.scraper import read_cached_info, map_bourstad_to_yfinance, load_local_stocks
+
+# Short names accepted in queries, on top of the universe attribute names
+ALIASES = {
+    "price": "current_price",
+    "pe": "pe_ratio",
+    "yield": "dividend_yield",
+    "high": "high_52_week",
+    "low": "low_52_week",
+    "cap": "market_cap",
+}
+
+# Columns computed from the universe columns (percentages, like Yahoo's dividend yield)
+DERIVED = {
+    "pct_from_low": lambda c: (c["current_price"] / c["low_52_week"] - 1) * 100,
+    "pct_from_high": lambda c: (1 - c["current_price"] / c["high_52_week"]) * 100,
+    "volume_ratio": lambda c: c["volume"] / c["average_volume_10d"],
+}
+
+# Compiled queries kept per screener
+MAX_COMPILED = 256
+
+# Columns whose sort order is computed up front
+RANK_COLUMNS = ["current_price", "market_cap", "pe_ratio", "dividend_yield", "volume", "pct_from_low", "pct_from_high"]
+
+COMPARISONS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+ARITHMETIC = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+}
+
+TOKEN_PATTERN = re.compile(r"\s*(?:(\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|\.\d+)|([A-Za-z_][A-Za-z0-9_]*)|(<=|>=|==|!=|[<>()+\-*/]))")
+
+class ScreenerError(ValueError):
+    """
+    Raised for queries that cannot be parsed or refer to unknown columns.
+    """
+
+def tokenize(query):
+    tokens = []
+    position = 0
+    query = query.rstrip()
+    while position < len(query):
+        match = TOKEN_PATTERN.match(query, position)
+        if not match:
+            raise ScreenerError(f"Unexpected character at position {position}: {query[position:position + 10]!r}")
+        number, name, symbol = match.groups()
+        if number is not None:
+            tokens.append(("number", float(number)))
+        elif name is not None:
+            lowered = name.lower()
+            tokens.append(("keyword", lowered) if lowered in ("and", "or", "not") else ("name", lowered))
+        else:
+            tokens.append(("op", symbol))
+        position = match.end()
+    return tokens
+
+def resolve_column(name):
+    name = ALIASES.get(name, name)
+    if name not in NUMERIC_ATTRS and name not in DERIVED:
+        raise ScreenerError(f"Unknown column {name!r}. Available: {', '.join(available_columns())}")
+    return name
+
+def available_columns():
+    return sorted(set(NUMERIC_ATTRS) | set(DERIVED) | set(ALIASES))
+
+class _Parser:
+    """
+    Recursive-descent parser turning a query into a function of the column arrays.
+
+        expr       := and_expr ("or" and_expr)*
+        and_expr   := not_expr ("and" not_expr)*
+        not_expr   := "not" not_expr | comparison
+        comparison := sum [("<" | "<=" | ">" | ">=" | "==" | "!=") sum]
+        sum        := term (("+" | "-") term)*
+        term       := factor (("*" | "/") factor)*
+        factor     := number | column | "-" factor | "(" expr ")"
+    """
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+        # Columns read so far, so "not" knows which values its operand depends on
+        self.referenced = []
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def accept(self, kind, value=None):
+        token = self.peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.position += 1
+            return token
+        return None
+
+    def expect(self, kind, value):
+        if not self.accept(kind, value):
+            raise ScreenerError(f"Expected {value!r} but found {self.peek()[1]!r}")
+
+    def parse(self):
+        node = self.expr()
+        if self.position != len(self.tokens):
+            raise ScreenerError(f"Unexpected {self.peek()[1]!r} in query")
+        return node
+
+    def expr(self):
+        node = self.and_expr()
+        while self.accept("keyword", "or"):
+            left, right = node, self.and_expr()
+            node = lambda c, left=left, right=right: _as_mask(left(c)) | _as_mask(right(c))
+        return node
+
+    def and_expr(self):
+        node = self.not_expr()
+        while self.accept("keyword", "and"):
+            left, right = node, self.not_expr()
+            node = lambda c, left=left, right=right: _as_mask(left(c)) & _as_mask(right(c))
+        return node
+
+    def not_expr(self):
+        if self.accept("keyword", "not"):
+            mark = len(self.referenced)
+            operand = self.not_expr()
+            columns = sorted(set(self.referenced[mark:]))
+            # Negating would turn a comparison against a missing value into a match
+            return lambda c: ~_as_mask(operand(c)) & _defined(c, columns)
+        return self.comparison()
+
+    def comparison(self):
+        mark = len(self.referenced)
+        node = self.sum()
+        token = self.peek()
+        if token[0] == "op" and token[1] in COMPARISONS:
+            self.position += 1
+            compare, right = COMPARISONS[token[1]], self.sum()
+            if token[1] == "!=":
+                # NaN != x is true; missing values never match
+                columns = sorted(set(self.referenced[mark:]))
+                return lambda c, left=node: compare(left(c), right(c)) & _defined(c, columns)
+            return lambda c, left=node: compare(left(c), right(c))
+        return node
+
+    def sum(self):
+        node = self.term()
+        while self.peek()[0] == "op" and self.peek()[1] in ("+", "-"):
+            apply = ARITHMETIC[self.tokens[self.position][1]]
+            self.position += 1
+            right = self.term()
+            node = lambda c, left=node, right=right, apply=apply: apply(left(c), right(c))
+        return node
+
+    def term(self):
+        node = self.factor()
+        while self.peek()[0] == "op" and self.peek()[1] in ("*", "/"):
+            apply = ARITHMETIC[self.tokens[self.position][1]]
+            self.position += 1
+            right = self.factor()
+            node = lambda c, left=node, right=right, apply=apply: apply(left(c), right(c))
+        return node
+
+    def factor(self):
+        token = self.accept("number")
+        if token:
+            value = token[1]
+            return lambda c: value
+        token = self.accept("name")
+        if token:
+            column = resolve_column(token[1])
+            self.referenced.append(column)
+            return lambda c: c[column]
+        if self.accept("op", "-"):
+            operand = self.factor()
+            return lambda c: -operand(c)
+        if self.accept("op", "("):
+            node = self.expr()
+            self.expect("op", ")")
+            return node
+        raise ScreenerError(f"Unexpected {self.peek()[1]!r} in query" if self.peek()[1] is not None else "Query ended unexpectedly")
+
+def _as_mask(value):
+    if not isinstance(value, np.ndarray) or value.dtype != bool:
+        raise ScreenerError("'and', 'or' and 'not' must combine comparisons (e.g. pe < 15 and yield > 3)")
+    return value
+
+def _defined(columns, names):
+    """
+    Rows where none of the named columns is missing.
+    """
+    mask = np.ones(len(columns["current_price"]), dtype=bool)
+    for name in names:
+        mask &= ~np.isnan(columns[name])
+    return mask
+
+def compile_query(query):
+    """
+    Compile a query into a function mapping the column arrays to a boolean mask.
+    """
+    if not query or not query.strip():
+        return lambda c: np.ones(len(c["current_price"]), dtype=bool)
+    return _Parser(tokenize(query)).parse()
+
+def load_cached_universe(stocks=None):
+    """
+    Build a universe from the Yahoo Finance cache only, without network calls.
+    Args:
+        stocks (list): {'id', 'name'} dicts; defaults to data/extracted_stocks.txt.
+
+    Returns:
+        Universe: One row per Bourstad symbol that has a cached quote.
+    """
+    stocks = load_local_stocks() if stocks is None else stocks
+    quotes = []
+    for stock in stocks:
+        info = read_cached_info(map_bourstad_to_yfinance(stock['id']))
+        if info and info.get("currentPrice") is not None:
+            quotes.append(QuoteRecord.from_info(stock['id'], info))
+    logging.info(f"Loaded {len(quotes)} cached quotes for the screener.")
+    return Universe.from_quotes(quotes)
+
+class Screener:
+    """
+    Evaluates queries as vectorized masks over a universe, with sort indexes
+    for the common ranking columns computed once up front.
+    """
+    def __init__(self, universe):
+        self.universe = universe
+        self.columns = dict(universe.columns)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for name, compute in DERIVED.items():
+                self.columns[name] = compute(self.columns)
+        self._compiled = OrderedDict()
+        self._compiled_lock = threading.Lock()
+        self._sort_index = {}
+        for column in RANK_COLUMNS:
+            self.sort_index(column)
+
+    def sort_index(self, column, descending=False):
+        """
+        Row order for a column, NaN last in both directions. Cached per column.
+        """
+        column = resolve_column(column)
+        key = (column, descending)
+        if key not in self._sort_index:
+            values = self.columns[column]
+            self._sort_index[key] = np.argsort(-values if descending else values, kind="stable")
+            if not descending:
+                self._sort_index[(column, True)] = np.argsort(-values, kind="stable")
+        return self._sort_index[key]
+
+    def mask(self, query):
+        with self._compiled_lock:
+            compiled = self._compiled.get(query)
+            if compiled is not None:
+                self._compiled.move_to_end(query)
+        if compiled is None:
+            compiled = compile_query(query)
+            with self._compiled_lock:
+                self._compiled[query] = compiled
+                # Least recently used queries go first
+                while len(self._compiled) > MAX_COMPILED:
+                    self._compiled.popitem(last=False)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mask = compiled(self.columns)
+        return _as_mask(mask)
+
+    def screen(self, query, sort_by=None, descending=False, limit=None):
+        """
+        Run a query and return the matching rows as a DataFrame.
+        Args:
+            query (str): e.g. "pe < 15 and yield > 3 and pct_from_low < 10".
+            sort_by (str): Column to rank by.
+            descending (bool): Rank from largest to smallest.
+            limit (int): Maximum number of rows.
+
+        Returns:
+            DataFrame: Matching securities with the derived columns.
+        """
+        start = time.perf_counter()
+        mask = self.mask(query)
+        if sort_by:
+            order = self.sort_index(sort_by, descending)
+            rows = order[mask[order]]
+        else:
+            rows = np.flatnonzero(mask)
+        if limit:
+            rows = rows[:limit]
+
+        frame = self.universe.to_frame(rows)
+        for name in DERIVED:
+            frame[name] = self.columns[name][rows]
+        logging.info(f"Screener query {query!r} matched {int(mask.sum())} rows in {(time.perf_counter() - start) * 1000:.1f} ms.")
+        return frame
+
+def describe_columns():
+    """
+    Human-readable list of the columns usable in queries.
+    """
+    lines = [f"{attr}: {DISPLAY_NAMES[attr]}" for attr in NUMERIC_ATTRS]
+    lines += [f"{name}: derived" for name in DERIVED]
+    lines += [f"{alias}: alias of {target}" for alias, target in ALIASES.items()]
+    return lines
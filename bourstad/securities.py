@@ -0,0 +1,47 @@
+import math
+import pandas as pd
+
+PAGE_SIZES = [25, 50, 100]
+
+class SecurityIndex:
+    """
+    Searchable, pageable list of the Bourstad securities, so the dashboard
+    only sends the page being viewed to the browser.
+    """
+    def __init__(self, stocks):
+        frame = pd.DataFrame(stocks, columns=["id", "name"]) if not isinstance(stocks, pd.DataFrame) else stocks
+        frame = frame[frame['id'].notnull() & (frame['id'] != "")]
+        self.frame = frame.reset_index(drop=True)
+        # One lowercase search key per security: "id name"
+        self._keys = (self.frame['id'].astype(str) + " " + self.frame['name'].fillna("").astype(str)).str.lower()
+
+    def __len__(self):
+        return len(self.frame)
+
+    def search(self, query):
+        """
+        Securities whose id or name contains every word of the query.
+        """
+        words = (query or "").lower().split()
+        if not words:
+            return self.frame
+        mask = pd.Series(True, index=self._keys.index)
+        for word in words:
+            mask &= self._keys.str.contains(word, regex=False)
+        return self.frame[mask]
+
+    @staticmethod
+    def page(frame, number, size):
+        """
+        One page of a frame.
+        Args:
+            frame (DataFrame): Usually a search result.
+            number (int): 1-based page number, clamped to the available pages.
+            size (int): Rows per page.
+
+        Returns:
+            tuple: (page DataFrame, page count)
+        """
+        pages = max(1, math.ceil(len(frame) / size))
+        number = min(max(1, number), pages)
+        return frame.iloc[(number - 1) * size:number * size], pages
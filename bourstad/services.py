@@ -0,0 +1,253 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+import pandas as pd
+from bourstad.singleflight import INFLIGHT
+from bourstad.scraper import get_bourstad_securities, fetch_owned_securities, fetch_quote, fetch_batch_stock_data, fetch_highlights_data, map_bourstad_to_yfinance, load_local_stocks
+from bourstad.highlights import load_rankings, get_rankings
+from bourstad.ohlcv import OhlcvStore
+from bourstad.panel import PricePanel
+from bourstad.alerts import AlertEngine, MemorySink, universe_rules, default_sinks, ALERTS_STATE_FILE
+from bourstad.recommendations import RecommendationCache
+from bourstad.screener import Screener, load_cached_universe
+from bourstad.charts import downsample_series, MAX_POINTS
+from bourstad.upstream import yahoo_history
+
+# How long shared results are reused, in seconds
+TTLS = {
+    "stocks": 3600,
+    "quote": 60,
+    "history": 300,
+    "universe": 300,
+    "highlights": 3600,
+    "panel": 3600,
+    "screener": 600,
+    "owned": 30,
+}
+
+MAX_ENTRIES = 10_000
+
+_MISSING = object()
+
+class SharedCache:
+    """
+    Thread-safe TTL cache shared by every session of the process. Entries are
+    evicted least recently used first once max_entries is reached, and
+    concurrent misses on the same key share one computation, through the
+    process-wide SingleFlight the scraper uses too.
+    """
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Keys of different caches must not share a computation
+        self._namespace = ("shared-cache", id(self))
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, ttl, compute):
+        """
+        Cached value of key, computing it at most once across threads when missing.
+        None results are not cached, so failed fetches are retried by the next caller.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        loaded = []
+
+        def load():
+            loaded.append(True)
+            # Another caller may have filled the entry while we were waiting
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            with self._lock:
+                self.misses += 1
+            value = compute()
+            if value is not None:
+                self.set(key, value, ttl)
+            return value
+        value = INFLIGHT.do((self._namespace, key), load)
+        if not loaded:
+            with self._lock:
+                self.coalesced += 1
+        return value
+
+    def invalidate(self, predicate=None):
+        """
+        Drop every entry, or those whose key matches predicate.
+        """
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if predicate(key)]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
+
+class FetchService:
+    """
+    Bourstad and Yahoo Finance fetches shared by every dashboard session and
+    API request of the process.
+
+    Public data (stock list, quotes, highlights, recommendations) is cached under
+    keys that are the same for everyone. Holdings are cached under the session's
+    own suid and aut, so a user only ever gets back the holdings fetched with
+    their credentials. Cached values are shared: callers must not mutate them.
+
+    With an AlertEngine, every newly fetched quote is checked against its
+    rules, which must be the universe rules: its events reach every session.
+    Holding rules belong to one user and are checked by that session's own engine.
+    """
+    def __init__(self, cache=None, alerts=None):
+        self.cache = cache or SharedCache()
+        self.alerts = alerts
+        self.memo = RecommendationCache()
+        self._prices = None
+        self._prices_lock = threading.Lock()
+
+    def stock_list(self):
+        return self.cache.get_or_compute(("stocks",), TTLS["stocks"], get_bourstad_securities)
+
+    def quote(self, symbol):
+        """
+        QuoteRecord for a Bourstad or Yahoo Finance symbol, or None.
+        """
+        def compute():
+            quote = fetch_quote(symbol)
+            if quote is not None and self.alerts is not None:
+                self.alerts.on_quote(quote)
+            return quote
+        return self.cache.get_or_compute(("quote", symbol), TTLS["quote"], compute)
+
+    def history(self, symbol, period, max_points=MAX_POINTS):
+        """
+        Closing prices of a Bourstad symbol over a yfinance period (e.g. "5y"),
+        downsampled to at most max_points. None if no history is available.
+        """
+        def compute():
+            try:
+                history = yahoo_history(map_bourstad_to_yfinance(symbol), period=period)
+            except Exception as e:
+                logging.error(f"Error fetching {period} history for {symbol}: {e}")
+                return None
+            if history.empty or 'Close' not in history:
+                return None
+            return downsample_series(history['Close'], max_points)
+        return self.cache.get_or_compute(("history", symbol, period, max_points), TTLS["history"], compute)
+
+    def universe(self, symbols, stocks_df):
+        """
+        Universe of quotes for a list of Yahoo Finance symbols.
+        """
+        key = ("universe", tuple(symbols))
+        return self.cache.get_or_compute(key, TTLS["universe"], lambda: fetch_batch_stock_data(symbols, stocks_df))
+
+    def recommendations(self):
+        """
+        Recommendation lines for every security with a cached quote. Only the
+        securities whose quote changed since the last call are analyzed again.
+        """
+        return self.memo.for_cached_universe()
+
+    def signal(self, quote):
+        """
+        (signal, score) of a QuoteRecord or display-column dict, e.g. ("Buy", 75).
+        """
+        return self.memo.signal(quote)
+
+    def screener(self):
+        return self.cache.get_or_compute(("screener",), TTLS["screener"], lambda: Screener(load_cached_universe()))
+
+    def highlights(self, selected_date, symbols=None):
+        """
+        Rankings of a day, or None when no data is available.
+        Args:
+            selected_date (date): Day to rank.
+            symbols (list): Yahoo Finance symbols to fetch when the day was never ranked;
+                defaults to the locally saved securities list.
+        """
+        def compute():
+            rankings = load_rankings(selected_date)
+            if rankings is None:
+                wanted = symbols
+                if wanted is None:
+                    wanted = [map_bourstad_to_yfinance(stock['id']) for stock in load_local_stocks()]
+                rankings = get_rankings(selected_date, fetch_highlights_data(wanted, selected_date))
+            return rankings
+        return self.cache.get_or_compute(("highlights", pd.Timestamp(selected_date).date()), TTLS["highlights"], compute)
+
+    def panel(self, symbols, start, end):
+        """
+        OhlcvStore panel for a date range, loaded once for all sessions from
+        the memory-mapped price panel.
+        """
+        key = ("panel", tuple(symbols), pd.Timestamp(start).date(), pd.Timestamp(end).date())
+        return self.cache.get_or_compute(key, TTLS["panel"], lambda: OhlcvStore(prices=self.prices()).panel(list(symbols), start, end))
+
+    def prices(self):
+        """
+        The PricePanel shared by this process, opened on first use.
+        """
+        with self._prices_lock:
+            if self._prices is None:
+                self._prices = PricePanel()
+            return self._prices
+
+    def owned_securities(self, suid, aut):
+        """
+        Holdings of the user owning this session; an empty list if they could not be fetched.
+        """
+        def compute():
+            # An empty result may be an expired session, so it is not cached
+            return fetch_owned_securities(suid, aut) or None
+        owned = self.cache.get_or_compute(("owned", suid, aut), TTLS["owned"], compute)
+        return [dict(security) for security in owned or []]
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats["recommendations"] = self.memo.stats()
+        return stats
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_service():
+    """
+    The process-wide FetchService.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = FetchService(alerts=AlertEngine(universe_rules(), default_sinks() + [MemorySink()], state_path=ALERTS_STATE_FILE))
+            logging.info("Created the shared fetch service.")
+        return _service
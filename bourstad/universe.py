@@ -0,0 +1,173 @@
+import math
+import numpy as np
+import pandas as pd
+
+# Numeric quote fields: (attribute, display column, yfinance info key)
+FIELDS = [
+    ("current_price", "Current Price", "currentPrice"),
+    ("market_cap", "Market Cap", "marketCap"),
+    ("pe_ratio", "P/E Ratio", "trailingPE"),
+    ("eps", "EPS", "trailingEps"),
+    ("dividend_yield", "Dividend Yield", "dividendYield"),
+    ("high_52_week", "52-Week High", "fiftyTwoWeekHigh"),
+    ("low_52_week", "52-Week Low", "fiftyTwoWeekLow"),
+    ("volume", "Volume", "volume"),
+    ("average_volume", "Average Volume", "averageVolume"),
+    ("average_volume_10d", "Average Volume (10d)", "averageVolume10days"),
+]
+
+NUMERIC_ATTRS = [attr for attr, _, _ in FIELDS]
+DISPLAY_NAMES = {attr: display for attr, display, _ in FIELDS}
+
+# Fewest spare rows added when upsert grows the columns
+MIN_CAPACITY = 64
+
+def to_float(value):
+    """
+    Convert a quote value to float, using NaN for missing values and "N/A" sentinels.
+    """
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+class QuoteRecord:
+    """
+    A single quote with NaN for missing numeric values.
+    """
+    __slots__ = ("symbol", "name", *NUMERIC_ATTRS)
+
+    def __init__(self, symbol, name="N/A", **values):
+        self.symbol = symbol
+        self.name = name
+        for attr in NUMERIC_ATTRS:
+            setattr(self, attr, to_float(values.get(attr)))
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a record from a dict (or pandas Series) keyed by display columns.
+        """
+        values = {attr: data.get(display) for attr, display, _ in FIELDS}
+        return cls(data.get("Symbol", "N/A"), data.get("Name", "N/A"), **values)
+
+    @classmethod
+    def from_info(cls, symbol, info):
+        """
+        Build a record from a yfinance info dict, keeping only the fields we use.
+        """
+        values = {attr: info.get(key) for attr, _, key in FIELDS}
+        return cls(symbol, info.get("longName", "N/A"), **values)
+
+    def to_dict(self):
+        """
+        Convert back to the display-keyed dict used by the CLI and dashboard.
+        """
+        data = {"Symbol": self.symbol, "Name": self.name}
+        for attr, display, _ in FIELDS:
+            value = getattr(self, attr)
+            data[display] = "N/A" if math.isnan(value) else value
+        return data
+
+    def __repr__(self):
+        return f"QuoteRecord({self.symbol!r}, price={self.current_price})"
+
+class Universe:
+    """
+    Struct-of-arrays view of many quotes: one float64 array per numeric field,
+    NaN for missing values, and a symbol -> row index.
+
+    The columns are views of buffers with spare rows, doubled when full, so
+    inserting one quote at a time is amortized O(1).
+    """
+    def __init__(self, symbols=None, names=None, columns=None):
+        self.symbols = list(symbols or [])
+        self.names = list(names or ["N/A"] * len(self.symbols))
+        size = len(self.symbols)
+        columns = columns or {}
+        self._buffers = {attr: np.asarray(columns.get(attr, np.full(size, np.nan)), dtype=np.float64) for attr in NUMERIC_ATTRS}
+        self.columns = dict(self._buffers)
+        self.index = {symbol: row for row, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_quotes(cls, quotes):
+        quotes = list(quotes)
+        columns = {attr: np.fromiter((getattr(quote, attr) for quote in quotes), dtype=np.float64, count=len(quotes)) for attr in NUMERIC_ATTRS}
+        return cls([quote.symbol for quote in quotes], [quote.name for quote in quotes], columns)
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build a universe from display-keyed dicts, a DataFrame, or an existing universe.
+        """
+        if isinstance(records, Universe):
+            return records
+        if isinstance(records, pd.DataFrame):
+            records = records.to_dict(orient="records")
+        return cls.from_quotes(QuoteRecord.from_dict(record) for record in records)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def __iter__(self):
+        return (self.get(symbol) for symbol in self.symbols)
+
+    def column(self, attr):
+        return self.columns[attr]
+
+    def get(self, symbol):
+        """
+        Return the QuoteRecord for a symbol, or None if it is not in the universe.
+        """
+        row = self.index.get(symbol)
+        if row is None:
+            return None
+        values = {attr: self.columns[attr][row] for attr in NUMERIC_ATTRS}
+        return QuoteRecord(symbol, self.names[row], **values)
+
+    def upsert(self, quote):
+        """
+        Insert a new quote or update the existing row for its symbol in place.
+        """
+        row = self.index.get(quote.symbol)
+        if row is None:
+            row = len(self.symbols)
+            self.symbols.append(quote.symbol)
+            self.names.append(quote.name)
+            self.index[quote.symbol] = row
+            for attr in NUMERIC_ATTRS:
+                buffer = self._buffers[attr]
+                if row == len(buffer):
+                    buffer = np.concatenate([buffer, np.full(max(row, MIN_CAPACITY), np.nan)])
+                    self._buffers[attr] = buffer
+                buffer[row] = getattr(quote, attr)
+                self.columns[attr] = buffer[:row + 1]
+            return row
+        self.names[row] = quote.name
+        for attr in NUMERIC_ATTRS:
+            self.columns[attr][row] = getattr(quote, attr)
+        return row
+
+    def to_frame(self, rows=None):
+        """
+        Convert to a DataFrame with the display column names and NaN for missing values.
+        Args:
+            rows (array): Optional row positions to keep, in order.
+        """
+        if rows is None:
+            data = {"Symbol": self.symbols, "Name": self.names}
+            for attr, display, _ in FIELDS:
+                data[display] = self.columns[attr]
+            return pd.DataFrame(data)
+        data = {"Symbol": [self.symbols[row] for row in rows], "Name": [self.names[row] for row in rows]}
+        for attr, display, _ in FIELDS:
+            data[display] = self.columns[attr][rows]
+        return pd.DataFrame(data)
+
+    def to_records(self):
+        return [quote.to_dict() for quote in self]
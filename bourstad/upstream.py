@@ -0,0 +1,61 @@
+import os
+import requests
+import pandas as pd
+import yfinance as yf
+
+# Base URLs are read on every call so the replay stub can be switched on at runtime:
+# BOURSTAD_BASE_URL replaces the Bourstad host, YAHOO_BASE_URL replaces yfinance
+DEFAULT_BOURSTAD_BASE_URL = "https://bourstad.cirano.qc.ca"
+
+TRANSACTION_PATH = "/Transaction/Transaction"
+OWNED_PATH = "/dashboard_Part/dashboard_Part"
+
+HISTORY_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+YAHOO_TIMEOUT = 30
+
+def bourstad_url(path):
+    """
+    Absolute URL of a Bourstad page on the configured host.
+    """
+    return os.getenv("BOURSTAD_BASE_URL", DEFAULT_BOURSTAD_BASE_URL).rstrip("/") + path
+
+def yahoo_base_url():
+    """
+    Base URL of the Yahoo Finance stand-in, or None to use yfinance.
+    """
+    base_url = os.getenv("YAHOO_BASE_URL")
+    return base_url.rstrip("/") if base_url else None
+
+def yahoo_info(symbol):
+    """
+    Yahoo Finance info dict of a symbol (yf.Ticker(symbol).info).
+    """
+    base_url = yahoo_base_url()
+    if base_url is None:
+        return yf.Ticker(symbol).info
+    response = requests.get(f"{base_url}/info/{symbol}", timeout=YAHOO_TIMEOUT)
+    if response.status_code == 404:
+        return {}
+    response.raise_for_status()
+    return response.json()
+
+def yahoo_history(symbol, period=None, start=None, end=None):
+    """
+    Daily OHLCV of a symbol (yf.Ticker(symbol).history), either for a period
+    such as "1y" or between start (inclusive) and end (exclusive).
+    Returns:
+        DataFrame: Indexed by date with the HISTORY_FIELDS columns; empty if unknown.
+    """
+    base_url = yahoo_base_url()
+    if base_url is None:
+        ticker = yf.Ticker(symbol)
+        return ticker.history(period=period) if period else ticker.history(start=start, end=end)
+
+    params = {"period": period} if period else {"start": pd.Timestamp(start).strftime("%Y-%m-%d"), "end": pd.Timestamp(end).strftime("%Y-%m-%d")}
+    response = requests.get(f"{base_url}/history/{symbol}", params=params, timeout=YAHOO_TIMEOUT)
+    if response.status_code == 404:
+        return pd.DataFrame(columns=HISTORY_FIELDS)
+    response.raise_for_status()
+    data = response.json()
+    return pd.DataFrame(data["data"], index=pd.DatetimeIndex(data["index"], name="Date"), columns=HISTORY_FIELDS)
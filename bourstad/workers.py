@@ -0,0 +1,377 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import multiprocessing
+from contextlib import closing
+from bourstad.scraper import fetch_and_parse_stocks, fetch_stock_detail, load_local_stocks, STOCKS_DIR
+from bourstad.history import HISTORY_DB
+from bourstad.profiling import profile_from_env
+from bourstad.archive import PageArchive, archive_path
+from bourstad.alerts import AlertEngine, universe_rules, default_sinks, ALERTS_STATE_FILE
+from bourstad.pipeline import (
+    STAGES,
+    MANIFEST_FILE,
+    new_manifest,
+    load_manifest,
+    save_manifest,
+    mark_stage,
+    clear_stages,
+    parse_symbol,
+    enrich_symbol,
+    refresh_prices,
+    write_outputs,
+)
+
+QUEUE_DB = "data/work_queue.sqlite"
+
+# Symbols per shard, and how long a worker owns a shard without a heartbeat
+SHARD_SIZE = 25
+LEASE_SECONDS = 300
+# A shard whose lease expired this many times is given up on; its symbols
+# stay pending in the manifest for the next --resume
+MAX_ATTEMPTS = 3
+POLL_INTERVAL = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run TEXT NOT NULL,
+    stages TEXT NOT NULL,
+    symbols TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    merged INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS shards_status ON shards (status, run);
+"""
+
+class WorkQueue:
+    """
+    Shards of run_all work in a SQLite database that every worker opens,
+    whether it is a local process or another machine sharing the filesystem
+    (which then needs working file locks, as SQLite does).
+
+    A worker leases a shard for LEASE_SECONDS and extends the lease while it
+    works. If it dies, the lease runs out and the shard goes to the next worker
+    asking for work.
+    """
+    def __init__(self, path=QUEUE_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(self, run, stages, symbols, shard_size=SHARD_SIZE):
+        """
+        Split symbols into shards of a run.
+        Returns:
+            int: Number of shards added.
+        """
+        shards = [symbols[start:start + shard_size] for start in range(0, len(symbols), shard_size)]
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN")
+            conn.executemany("INSERT INTO shards (run, stages, symbols) VALUES (?, ?, ?)",
+                             [(run, json.dumps(stages), json.dumps(shard)) for shard in shards])
+            conn.execute("COMMIT")
+        return len(shards)
+
+    def lease(self, worker, lease_seconds=LEASE_SECONDS, run=None):
+        """
+        Take the oldest pending shard, or one whose worker stopped renewing its lease.
+        Returns:
+            dict: The shard (id, run, stages, symbols, attempts), or None if there is nothing to do.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            # IMMEDIATE takes the write lock up front, so two workers never lease the same shard
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("UPDATE shards SET status = 'failed', error = 'lease expired too many times' "
+                             "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?", (now, MAX_ATTEMPTS))
+                sql = ("SELECT * FROM shards WHERE (status = 'pending' OR (status = 'leased' AND lease_until < ?))"
+                       + (" AND run = ?" if run else "") + " ORDER BY id LIMIT 1")
+                row = conn.execute(sql, (now, run) if run else (now,)).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                if row["status"] == "leased":
+                    logging.warning(f"Shard {row['id']} lease of {row['worker']} expired; reassigning it to {worker}.")
+                conn.execute("UPDATE shards SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                             (worker, now + lease_seconds, row["id"]))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return {"id": row["id"], "run": row["run"], "stages": json.loads(row["stages"]),
+                "symbols": json.loads(row["symbols"]), "attempts": row["attempts"] + 1}
+
+    def _update_owned(self, shard_id, worker, sql, params):
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(sql + " WHERE id = ? AND worker = ? AND status = 'leased'", (*params, shard_id, worker))
+            return cursor.rowcount == 1
+
+    def heartbeat(self, shard_id, worker, lease_seconds=LEASE_SECONDS):
+        """
+        Extend a lease. False if the shard was given to another worker meanwhile.
+        """
+        return self._update_owned(shard_id, worker, "UPDATE shards SET lease_until = ?", (time.time() + lease_seconds,))
+
+    def complete(self, shard_id, worker, results):
+        """
+        Store a shard's results. False if the shard was given to another worker meanwhile.
+        """
+        return self._update_owned(shard_id, worker, "UPDATE shards SET status = 'done', result = ?, lease_until = NULL",
+                                  (json.dumps(results, ensure_ascii=False),))
+
+    def release(self, shard_id, worker, error):
+        """
+        Give a shard back after an error, or give up on it after MAX_ATTEMPTS.
+        """
+        return self._update_owned(shard_id, worker,
+                                  "UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                                  "error = ?, lease_until = NULL", (MAX_ATTEMPTS, str(error)))
+
+    def reclaim(self, run, dead_workers=()):
+        """
+        Give back the shards of a run whose lease ran out, or whose worker is
+        known to be dead, without waiting for another worker to ask for work.
+        Args:
+            run (str): Run whose shards to check.
+            dead_workers (list): Worker name prefixes (see worker_prefix) of exited processes.
+
+        Returns:
+            int: Number of shards put back to pending or given up on.
+        """
+        owners = "".join(" OR worker LIKE ?" for _ in dead_workers)
+        with closing(self._connect()) as conn:
+            cursor = conn.execute("UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                                  "error = 'worker stopped renewing its lease', lease_until = NULL "
+                                  f"WHERE run = ? AND status = 'leased' AND (lease_until < ?{owners})",
+                                  (MAX_ATTEMPTS, run, time.time(), *[f"{prefix}%" for prefix in dead_workers]))
+            return cursor.rowcount
+
+    def unmerged(self, run):
+        """
+        Finished shards of a run whose results were not merged into the manifest yet.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT id, result FROM shards WHERE run = ? AND status = 'done' AND merged = 0", (run,)).fetchall()
+        return [(row["id"], json.loads(row["result"])) for row in rows]
+
+    def mark_merged(self, shard_ids):
+        with closing(self._connect()) as conn:
+            conn.executemany("UPDATE shards SET merged = 1 WHERE id = ?", [(shard_id,) for shard_id in shard_ids])
+
+    def counts(self, run=None):
+        """
+        Number of shards per status, for one run or the whole queue.
+        """
+        sql = "SELECT status, COUNT(*) FROM shards" + (" WHERE run = ?" if run else "") + " GROUP BY status"
+        with closing(self._connect()) as conn:
+            return dict(conn.execute(sql, (run,) if run else ()).fetchall())
+
+def _login():
+    return fetch_and_parse_stocks(os.getenv('BOURSTAD_USERNAME'), os.getenv('BOURSTAD_PASSWORD'))
+
+def worker_prefix(pid):
+    return f"{socket.gethostname()}-{pid}-"
+
+def worker_name():
+    return f"{worker_prefix(os.getpid())}{uuid.uuid4().hex[:6]}"
+
+def process_shard(shard, queue, worker, session, stocks_dir=STOCKS_DIR, alerts=None):
+    """
+    Run a shard's stages for each of its symbols, renewing the lease as it
+    goes, then add the daily bars of the enriched symbols to the price panel.
+    Args:
+        session (dict): Login shared by the shards of this worker ({'suid', 'aut'}), filled on first use.
+        alerts (AlertEngine): Checks each enriched quote as it arrives.
+
+    Returns:
+        dict: symbol -> {stage: result} for the stages that completed, or None if the lease was lost.
+    """
+    parse = parse_symbol(stocks_dir)
+    enrich = enrich_symbol(alerts)
+    archive = PageArchive(archive_path(stocks_dir))
+    results = {}
+    for symbol in shard["symbols"]:
+        done = {}
+        for stage in shard["stages"]:
+            try:
+                if stage == "fetched":
+                    if not session.get("suid"):
+                        _, session["suid"], session["aut"] = _login()
+                    ok = bool(session["suid"]) and fetch_stock_detail(symbol, session["suid"], session["aut"], stocks_dir, archive=archive, session=session)
+                    result = None
+                elif stage == "parsed":
+                    ok, result = parse(symbol)
+                else:
+                    ok, result = enrich(symbol)
+            except Exception as e:
+                logging.error(f"Stage {stage} failed for {symbol}: {e}")
+                ok = False
+            if not ok:
+                # Later stages need this one
+                break
+            done[stage] = result
+        results[symbol] = done
+        if not queue.heartbeat(shard["id"], worker):
+            logging.warning(f"Lost the lease of shard {shard['id']}; another worker is redoing it.")
+            return None
+    # The workers append their shards' bars to the same price panel
+    refresh_prices([symbol for symbol, done in results.items() if "enriched" in done])
+    return results
+
+def run_worker(queue_path=QUEUE_DB, stocks_dir=STOCKS_DIR, wait=False, run=None):
+    """
+    Lease and process shards until the queue is drained.
+    Args:
+        queue_path (str): Queue database, shared by every worker.
+        stocks_dir (str): Directory receiving the fetched Transaction pages.
+        wait (bool): Keep polling for new shards instead of exiting when the queue is empty.
+        run (str): Only work on this run's shards.
+
+    Returns:
+        int: Number of shards completed by this worker.
+    """
+    queue = WorkQueue(queue_path)
+    worker = worker_name()
+    session = {}
+    alerts = AlertEngine(universe_rules(), default_sinks(), state_path=ALERTS_STATE_FILE)
+    completed = 0
+    # BOURSTAD_PROFILE (inherited from run_all --profile) saves one profile per worker
+    with profile_from_env(f"worker-{worker}"):
+        while True:
+            shard = queue.lease(worker, run=run)
+            if shard is None:
+                counts = queue.counts(run)
+                if not wait and not counts.get("pending") and not counts.get("leased"):
+                    break
+                # Shards leased by others may still come back if their worker dies
+                time.sleep(POLL_INTERVAL)
+                continue
+            try:
+                results = process_shard(shard, queue, worker, session, stocks_dir, alerts)
+            except Exception as e:
+                logging.error(f"Worker {worker} failed on shard {shard['id']}: {e}")
+                queue.release(shard["id"], worker, e)
+                continue
+            if results is not None and queue.complete(shard["id"], worker, results):
+                completed += 1
+    logging.info(f"Worker {worker} completed {completed} shard(s).")
+    return completed
+
+def _merge(queue, run, manifest, stages):
+    shards = queue.unmerged(run)
+    for _, results in shards:
+        for symbol, done in results.items():
+            for stage in stages:
+                if stage in done:
+                    mark_stage(manifest, symbol, stage, done[stage])
+    if shards:
+        queue.mark_merged([shard_id for shard_id, _ in shards])
+    return len(shards)
+
+def run_sharded(workers=os.cpu_count(), resume=False, stages=None, manifest_file=MANIFEST_FILE,
+                stocks_dir=STOCKS_DIR, history_db=HISTORY_DB, queue_path=QUEUE_DB, shard_size=SHARD_SIZE):
+    """
+    run_all split into shards processed by worker processes. Workers started
+    with `--action worker` on other machines sharing the queue database and
+    stocks_dir help with the same run.
+    Args:
+        workers (int): Local worker processes to start (0 to rely on other machines).
+        resume, stages, manifest_file, stocks_dir, history_db: As for run_all.
+        queue_path (str): Queue database.
+        shard_size (int): Symbols per shard.
+
+    Returns:
+        dict: The final manifest.
+    """
+    stages = list(STAGES) if stages is None else stages
+    manifest = load_manifest(manifest_file) if (resume or stages != STAGES) else new_manifest()
+    if not resume:
+        clear_stages(manifest, stages)
+
+    if "listed" in stages or not manifest["symbols"]:
+        stocks = load_local_stocks()
+        if not stocks:
+            print("Fetching and parsing stock data...")
+            stocks = [stock for stock in _login()[0] if stock['id']]
+        for stock in stocks:
+            entry = manifest["symbols"].setdefault(stock['id'], {"stages": {}})
+            entry["name"] = stock['name']
+            if "listed" not in entry["stages"]:
+                mark_stage(manifest, stock['id'], "listed")
+        save_manifest(manifest, manifest_file)
+
+    # Group symbols by the stages they still need, which always follow each other
+    work = [stage for stage in stages if stage != "listed"]
+    groups = {}
+    for symbol, entry in manifest["symbols"].items():
+        needed = tuple(stage for stage in work if stage not in entry["stages"])
+        if needed:
+            groups.setdefault(needed, []).append(symbol)
+    if not groups:
+        write_outputs(manifest, stages, history_db)
+        return manifest
+
+    queue = WorkQueue(queue_path)
+    run = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    shards = sum(queue.enqueue(run, list(needed), symbols, shard_size) for needed, symbols in groups.items())
+    print(f"Run {run}: {shards} shard(s) queued in {queue_path} for {workers} local worker(s).")
+
+    def start_worker():
+        process = multiprocessing.Process(target=run_worker, args=(queue_path, stocks_dir, False, run), daemon=True)
+        process.start()
+        return process
+
+    processes = [start_worker() for _ in range(workers)]
+    # Workers only exit on their own once the run is drained, so an exit with
+    # work left is a crash; crashes are replaced up to a bound, in case every
+    # new worker dies as well
+    restarts = workers * MAX_ATTEMPTS
+    try:
+        while True:
+            if _merge(queue, run, manifest, stages):
+                save_manifest(manifest, manifest_file)
+            dead = [process for process in processes if not process.is_alive()]
+            if queue.reclaim(run, [worker_prefix(process.pid) for process in dead]):
+                logging.warning(f"Run {run}: shards of stopped workers were given back.")
+            counts = queue.counts(run)
+            if not counts.get("pending") and not counts.get("leased"):
+                break
+            for process in dead:
+                processes.remove(process)
+                process.join()
+                if counts.get("pending") and restarts > 0:
+                    logging.warning(f"Worker process {process.pid} exited with code {process.exitcode}; starting another.")
+                    restarts -= 1
+                    processes.append(start_worker())
+            if workers and not processes:
+                print(f"All local workers stopped; {counts.get('pending', 0)} shard(s) left for --resume or `--action worker`.")
+                break
+            time.sleep(POLL_INTERVAL)
+    finally:
+        for process in processes:
+            process.join(timeout=POLL_INTERVAL)
+        _merge(queue, run, manifest, stages)
+        save_manifest(manifest, manifest_file)
+
+    failed = queue.counts(run).get("failed", 0)
+    if failed:
+        print(f"{failed} shard(s) failed and will be retried with --resume.")
+    write_outputs(manifest, stages, history_db)
+    return manifest
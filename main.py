@@ -1,49 +1,97 @@
 import argparse
 import csv
 import os
-import json
-from bourstad.scraper import fetch_and_parse_stocks, fetch_stock_details, parse_all_stocks, fetch_enhanced_stock_data
-from bourstad.analyzer import analyze_stocks
+import time
+from bourstad.scraper import fetch_and_parse_stocks
+from bourstad.recommendations import RecommendationCache, RECOMMENDATIONS_FILE
+from bourstad.pipeline import run_all, parse_stages, summarize, STAGES
+from bourstad.screener import Screener, ScreenerError, load_cached_universe, describe_columns
+from bourstad.api import serve, DEFAULT_HOST, DEFAULT_PORT
+from bourstad.replay import serve_stub, start_stub, record_session, RECORDINGS_DIR, DEFAULT_PORT as STUB_PORT
+from bourstad.loadtest import run_load, format_report, MODES
+from bourstad.ohlcv import OhlcvStore
+from bourstad.panel import rebuild_panel, PANEL_DIR
+from bourstad.workers import run_sharded, run_worker, QUEUE_DB
+from bourstad.archive import PageArchive, archive_path
+from bourstad.scraper import STOCKS_DIR
+from bourstad.alerts import AlertEngine, universe_rules, default_sinks, read_alerts, ALERTS_FILE, ALERTS_STATE_FILE
+from bourstad.report import build_report, REPORT_DIR, MAX_WORKERS
+from bourstad.profiling import profile_until_exit, profiling_enabled, PROFILE_ENV, PROFILE_DIR
 
 def main():
     parser = argparse.ArgumentParser(description='Bourstad Assistant Tool')
-    parser.add_argument('--action', type=str, choices=['run_all', 'view_stocks', 'get_recommendations', 'help_actions'], required=True, help='Action to perform')
+    parser.add_argument('--action', type=str, choices=['run_all', 'view_stocks', 'get_recommendations', 'screen', 'serve', 'stub', 'record', 'loadtest', 'build_panel', 'worker', 'archive_pages', 'alerts', 'build_report', 'help_actions'], required=True, help='Action to perform')
+    parser.add_argument('--resume', action='store_true', help='Continue run_all from the last checkpoint')
+    parser.add_argument('--stages', type=str, default=None, help=f"Comma-separated run_all stages to run ({', '.join(STAGES)})")
+    parser.add_argument('--query', type=str, default='', help='Screener query, e.g. "pe < 15 and yield > 3"')
+    parser.add_argument('--sort-by', type=str, default=None, help='Screener column to rank by')
+    parser.add_argument('--descending', action='store_true', help='Rank screener results from largest to smallest')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum number of screener results')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help='Server host')
+    parser.add_argument('--port', type=int, default=None, help=f'Server port (API: {DEFAULT_PORT}, stub: {STUB_PORT})')
+    parser.add_argument('--offline', action='store_true', help='Run the action against an in-process stub instead of Bourstad and Yahoo Finance')
+    parser.add_argument('--recordings', type=str, default=RECORDINGS_DIR, help='Directory of recorded responses for stub and record')
+    parser.add_argument('--latency', type=float, default=0.0, help='Stub response delay in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random extra stub delay in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of stub responses that fail with 503')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent simulated users for loadtest')
+    parser.add_argument('--iterations', type=int, default=3, help='Dashboard renders per simulated user for loadtest')
+    parser.add_argument('--mode', type=str, choices=MODES, default='direct', help='loadtest calls the scraper directly or through the shared fetch service')
+    parser.add_argument('--workers', type=int, default=None, help='Split run_all into shards processed by this many worker processes')
+    parser.add_argument('--queue', type=str, default=QUEUE_DB, help='Work queue database shared by run_all --workers and worker')
+    parser.add_argument('--wait', action='store_true', help='Keep the worker polling for new shards when the queue is empty')
+    parser.add_argument('--profile', action='store_true', help=f'Profile the action; outputs and a summary go to {PROFILE_DIR}')
+    parser.add_argument('--output', type=str, default=REPORT_DIR, help='Directory of the static report written by build_report')
     args = parser.parse_args()
 
+    if args.profile or profiling_enabled():
+        # Worker processes started by this run save their own profiles
+        os.environ[PROFILE_ENV] = "1"
+        profile_until_exit(args.action)
+
     if args.action == 'help_actions':
         print("Available actions:")
-        print("1. run_all: Fetch, parse, and save detailed stock data.")
+        print("1. run_all: Fetch, parse, and save detailed stock data (use --resume to continue, --stages to select stages,")
+        print("   --workers to split the work between processes).")
         print("2. view_stocks: Fetch and parse stock data to view available stocks.")
         print("3. get_recommendations: Analyze stocks and provide recommendations.")
+        print("4. screen: Filter the cached universe with --query (and --sort-by, --descending, --limit).")
+        print("   Columns: " + ", ".join(line.split(":")[0] for line in describe_columns()))
+        print("5. serve: Run the JSON API (/quotes, /recommendations, /highlights, /portfolio) on --host and --port.")
+        print("6. stub: Serve a local Bourstad and Yahoo Finance stand-in (--latency, --jitter, --error-rate, --recordings).")
+        print("7. record: Record live responses for the stub (--limit securities).")
+        print("8. loadtest: Simulate --users dashboard users for --iterations renders against the stub (--mode, --latency, --error-rate).")
+        print(f"9. build_panel: Rebuild the memory-mapped price panel ({PANEL_DIR}) from the local OHLCV history.")
+        print("10. worker: Process shards of a run_all --workers queue (--queue, --wait); the stocks directory must be shared.")
+        print(f"11. archive_pages: Move the loose HTML pages of {STOCKS_DIR} into the compressed page archive.")
+        print(f"12. alerts: Show the latest --limit alerts raised by run_all, workers and the dashboard ({ALERTS_FILE}).")
+        print("13. build_report: Render the Data table, quote pages, highlights and recommendations as static HTML/JSON")
+        print(f"    in --output (default {REPORT_DIR}) from the local caches; only pages whose inputs changed are rendered again.")
+        print("Add --offline to any action to run it against an in-process stub.")
+        print(f"Add --profile to any action to save cProfile stats, flamegraph stacks and a summary to {PROFILE_DIR}.")
         return
 
+    stub_options = {"recordings_dir": args.recordings, "latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate}
+    if args.offline and args.action not in ('stub', 'record', 'loadtest', 'build_panel', 'archive_pages', 'build_report'):
+        server = start_stub(**stub_options)
+        print(f"Offline mode: using the stub at {server.url}")
+
     if args.action == 'run_all':
-        # Step 1: Fetch and parse stock data
-        print("Fetching and parsing stock data...")
-        stocks, suid, aut = fetch_and_parse_stocks()
-        if not stocks:
-            print("No stocks found. Exiting.")
-            return
-
-        # Step 2: Fetch detailed stock HTML files
-        print("Fetching detailed stock HTML files...")
-        fetch_stock_details()
-
-        # Step 3: Parse detailed stock data
-        print("Parsing detailed stock data...")
-        parse_all_stocks('data/stocks')
-
-        # Step 4: Fetch real-time stock data using yfinance
-        print("Fetching real-time stock data...")
-        symbols = [stock['id'] for stock in stocks]
-        df = fetch_enhanced_stock_data(symbols)
-        df.to_csv("data/real_time_stock_data.csv", index=False)
-        print("Real-time stock data saved to data/real_time_stock_data.csv")
+        try:
+            stages = parse_stages(args.stages)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.workers is not None:
+            manifest = run_sharded(workers=args.workers, resume=args.resume, stages=stages, queue_path=args.queue)
+        else:
+            manifest = run_all(resume=args.resume, stages=stages, alerts=AlertEngine(universe_rules(), default_sinks(), state_path=ALERTS_STATE_FILE))
+        for stage, count in summarize(manifest).items():
+            print(f"{stage}: {count}/{len(manifest['symbols'])}")
 
     elif args.action == 'view_stocks':
         # Step 1: Fetch and parse stock data
         print("Fetching and parsing stock data...")
-        stocks, _, _ = fetch_and_parse_stocks()
+        stocks, _, _ = fetch_and_parse_stocks(os.getenv('BOURSTAD_USERNAME'), os.getenv('BOURSTAD_PASSWORD'))
         if stocks:
             print("Stocks fetched and parsed successfully!")
             for stock in stocks:
@@ -52,18 +100,66 @@ def main():
             print("No stocks found.")
 
     elif args.action == 'get_recommendations':
-        # Load the extracted stock data
-        print("Loading extracted stock data...")
-        with open('detailed_stock_data.json', 'r', encoding='utf-8') as json_file:
-            detailed_data = json.load(json_file)
-
-        # Analyze the stocks
+        # Analyze the cached quotes; only the ones that changed since the last run are analyzed again
         print("Analyzing stocks...")
-        recommendations = analyze_stocks(detailed_data)
+        memo = RecommendationCache(RECOMMENDATIONS_FILE)
+        recommendations = memo.for_cached_universe()
+        memo.save()
+        stats = memo.stats()
+        print(f"Analyzed {stats['computed']} changed quote(s), reused {stats['reused']}.")
 
         # Print recommendations
         for recommendation in recommendations:
             print(recommendation)
 
+    elif args.action == 'screen':
+        screener = Screener(load_cached_universe())
+        try:
+            results = screener.screen(args.query, sort_by=args.sort_by, descending=args.descending, limit=args.limit)
+        except ScreenerError as e:
+            parser.error(str(e))
+        print(results.to_string(index=False))
+
+    elif args.action == 'serve':
+        serve(args.host, args.port or DEFAULT_PORT)
+
+    elif args.action == 'stub':
+        serve_stub(args.host, args.port or STUB_PORT, **stub_options)
+
+    elif args.action == 'record':
+        record_session(os.getenv('BOURSTAD_USERNAME'), os.getenv('BOURSTAD_PASSWORD'), args.recordings, limit=args.limit)
+
+    elif args.action == 'loadtest':
+        report = run_load(users=args.users, iterations=args.iterations, mode=args.mode, latency=args.latency,
+                          jitter=args.jitter, error_rate=args.error_rate, recordings_dir=args.recordings)
+        print(format_report(report))
+
+    elif args.action == 'worker':
+        completed = run_worker(args.queue, wait=args.wait)
+        print(f"Worker finished after {completed} shard(s).")
+
+    elif args.action == 'archive_pages':
+        archive = PageArchive(archive_path(STOCKS_DIR))
+        imported = archive.import_directory(STOCKS_DIR)
+        stats = archive.stats()
+        print(f"Archived {imported} page(s): {stats['versions']} version(s) of {stats['symbols']} symbol(s), "
+              f"{stats['raw_bytes'] / 2**20:.1f} MB stored as {stats['stored_bytes'] / 2**20:.1f} MB.")
+        print(f"The loose .html files in {STOCKS_DIR} can now be deleted.")
+
+    elif args.action == 'alerts':
+        events = read_alerts(limit=args.limit)
+        if not events:
+            print("No alerts yet.")
+        for event in events:
+            print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(event['time']))}  {event['message']} (price {event['price']:.2f}, threshold {event['threshold']:.2f})")
+
+    elif args.action == 'build_panel':
+        panel = rebuild_panel(OhlcvStore())
+        print(f"Price panel: {len(panel.symbols)} symbols x {len(panel)} days in {PANEL_DIR}")
+
+    elif args.action == 'build_report':
+        stats = build_report(args.output, workers=args.workers or MAX_WORKERS)
+        print(f"Report in {args.output}: {stats['rendered']} page(s) rendered, {stats['skipped']} unchanged, {stats['removed']} removed.")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
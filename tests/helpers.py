@@ -0,0 +1,20 @@
+import threading
+
+def run_concurrently(function, count):
+    """
+    Call function(index) from count threads released at the same time.
+    Returns:
+        list: The results, by index.
+    """
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(index):
+        barrier.wait()
+        results[index] = function(index)
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
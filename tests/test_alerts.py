@@ -0,0 +1,97 @@
+import os
+import tempfile
+import threading
+import unittest
+from bourstad import alerts
+from bourstad.alerts import AlertEngine, Rule, MemorySink, JsonlSink, WebhookSink, universe_rules
+from bourstad.replay import StubServer
+
+def quote(price, symbol="AAA:CA", low=100.0, high=200.0):
+    return {"Symbol": symbol, "Name": "Alpha", "Current Price": price, "52-Week Low": low, "52-Week High": high}
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestAlertEngine(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.sink = MemorySink()
+        self.engine = AlertEngine([Rule("near-low", alerts.ANY_SYMBOL, "below", 1.1, "Near low.", reference_field="low_52_week")],
+                                  [self.sink], cooldown=60, clock=self.clock)
+
+    def fired(self, *prices):
+        return [len(self.engine.on_quote(quote(price))) for price in prices]
+
+    def test_fires_once_per_crossing_with_hysteresis(self):
+        # Threshold 110; re-arms above 112.2
+        self.assertEqual(self.fired(120, 109, 108, 111, 112, 109), [0, 1, 0, 0, 0, 0])
+        self.clock.now += 120
+        self.assertEqual(self.fired(113, 109), [0, 1])
+        self.assertEqual([event["message"] for event in self.sink.latest()], ["Alpha (AAA:CA): Near low."] * 2)
+
+    def test_cooldown_suppresses_quick_repeats(self):
+        self.assertEqual(self.fired(109, 115, 109), [1, 0, 0])
+        self.clock.now += 61
+        self.assertEqual(self.fired(115, 109), [0, 1])
+
+    def test_rules_are_indexed_by_symbol(self):
+        self.engine.set_holdings([{"Symbol": "BBB:CA", "Average Price": 50.0}, {"Symbol": "CCC:CA", "Average Price": 0}])
+        self.assertEqual(len(self.engine.rules_for("BBB:CA")), 3)
+        self.assertEqual(len(self.engine.rules_for("AAA:CA")), 1)
+
+        events = self.engine.on_quote({"Symbol": "BBB:CA", "Name": "Beta", "Current Price": 61.0})
+        self.assertEqual([event["rule"] for event in events], ["holding-above-average"])
+        # Missing 52-week data or price is skipped rather than compared with NaN
+        self.assertEqual(self.engine.on_quote({"Symbol": "AAA:CA", "Current Price": 1.0}), [])
+
+        self.engine.set_holdings([])
+        self.assertEqual(len(self.engine.rules_for("BBB:CA")), 1)
+
+    def test_universe_rules_follow_the_analyzer(self):
+        engine = AlertEngine(universe_rules(), cooldown=0)
+        # Near the low is also approaching it: only the stronger rule speaks
+        self.assertEqual([event["rule"] for event in engine.on_quote(quote(105))], ["near-low"])
+        self.assertEqual([event["rule"] for event in engine.on_quote(quote(170, symbol="ZZZ:CA"))], ["approaching-high"])
+        self.assertEqual([event["rule"] for event in engine.on_quote(quote(190, symbol="ZZZ:CA"))], ["near-high"])
+        # Back between the two thresholds, the suppressed rule stays quiet
+        self.assertEqual(engine.on_quote(quote(115)), [])
+
+    def test_state_survives_restarts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "alerts_state.json")
+            engine = AlertEngine(universe_rules(), cooldown=60, clock=self.clock, state_path=path)
+            self.assertEqual(len(engine.on_quote(quote(105))), 1)
+            other = AlertEngine(universe_rules(), cooldown=60, clock=self.clock, state_path=path)
+            self.assertEqual(len(other.on_quote(quote(190, symbol="ZZZ:CA"))), 1)
+
+            # A later run neither repeats the low nor forgets the other process's high
+            restarted = AlertEngine(universe_rules(), cooldown=60, clock=self.clock, state_path=path)
+            self.assertEqual(restarted.on_quote(quote(105)) + restarted.on_quote(quote(190, symbol="ZZZ:CA")), [])
+            # Re-armed, but still within the cooldown saved by the first run
+            self.assertEqual(restarted.on_quote(quote(150)), [])
+            self.assertEqual(AlertEngine(universe_rules(), cooldown=60, clock=self.clock, state_path=path).on_quote(quote(105)), [])
+            self.clock.now += 61
+            engine = AlertEngine(universe_rules(), cooldown=60, clock=self.clock, state_path=path)
+            self.assertEqual([len(engine.on_quote(quote(price))) for price in (150, 105)], [0, 1])
+
+class TestSinks(unittest.TestCase):
+    def test_jsonl_and_webhook(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            server = StubServer(("127.0.0.1", 0), recordings_dir=tmp)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.addCleanup(server.server_close)
+            self.addCleanup(server.shutdown)
+
+            path = os.path.join(tmp, "alerts.jsonl")
+            engine = AlertEngine(universe_rules(), [JsonlSink(path), WebhookSink(server.environment()["BOURSTAD_ALERT_WEBHOOK"])])
+            engine.on_quote(quote(190))
+            engine.on_quote(quote(105))
+            self.assertEqual([event["rule"] for event in alerts.read_alerts(path)], ["near-low", "near-high"])
+            self.assertEqual([event["rule"] for event in server.alerts], ["near-high", "near-low"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import gzip
+import json
+import threading
+import unittest
+import http.client
+from unittest.mock import patch
+from bourstad import api, services
+from bourstad.universe import QuoteRecord
+
+def fake_quote(symbol):
+    if symbol == "MISSING":
+        return None
+    return QuoteRecord(symbol, f"{symbol} Inc.", current_price=10.0, high_52_week=20.0, low_52_week=5.0)
+
+class TestApi(unittest.TestCase):
+    def setUp(self):
+        self.server = api.ApiServer(("127.0.0.1", 0), api.BourstadApi(service=services.FetchService()))
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=10)
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path, headers=None):
+        self.connection.request("GET", path, headers=headers or {})
+        response = self.connection.getresponse()
+        return response, response.read()
+
+    @patch.object(services, "fetch_quote", side_effect=fake_quote)
+    def test_quotes_with_keep_alive_and_etag(self, mock_fetch):
+        response, body = self.get("/quotes?symbols=AAA,MISSING")
+        self.assertEqual(response.status, 200)
+        payload = json.loads(body)
+        self.assertEqual(payload["missing"], ["MISSING"])
+        self.assertEqual(payload["quotes"][0]["Current Price"], 10.0)
+        self.assertIsNone(payload["quotes"][0]["Volume"])
+
+        # Same connection, conditional request, served from the response cache
+        response, body = self.get("/quotes?symbols=MISSING,AAA", {"If-None-Match": response.getheader("ETag")})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b"")
+        self.assertEqual(mock_fetch.call_count, 2)
+
+    @patch.object(services, "fetch_quote", side_effect=fake_quote)
+    def test_gzip(self, mock_fetch):
+        symbols = ",".join(f"S{i}" for i in range(50))
+        response, body = self.get(f"/quotes?symbols={symbols}", {"Accept-Encoding": "gzip"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(body))["quotes"]), 50)
+
+    def test_errors(self):
+        response, body = self.get("/quotes")
+        self.assertEqual(response.status, 400)
+        response, body = self.get("/nope")
+        self.assertEqual(response.status, 404)
+        self.assertIn("/quotes", json.loads(body)["endpoints"])
+        response, body = self.get("/highlights?date=not-a-date")
+        self.assertEqual(response.status, 400)
+
+    def test_highlights_from_persisted_rankings(self):
+        rankings = {"gainers": api.pd.DataFrame([{"Symbol": "AAA", "Change (%)": float("nan")}])}
+        with patch.object(services, "load_rankings", return_value=rankings):
+            response, body = self.get("/highlights?date=2025-04-02")
+        payload = json.loads(body)
+        self.assertEqual(payload["date"], "2025-04-02")
+        self.assertIsNone(payload["gainers"][0]["Change (%)"])
+
+    def test_portfolio_requires_credentials(self):
+        self.server.api.email = self.server.api.password = None
+        response, body = self.get("/portfolio")
+        self.assertEqual(response.status, 503)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from bourstad.archive import PageArchive, archive_path
+from bourstad import scraper
+
+PAGE = "<html><h1 class='stock-name'>{name}</h1><span class='last-price'>{price}</span>" + "<p>filler</p>" * 500 + "</html>"
+
+class TestPageArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.archive = PageArchive(archive_path(self.tmp.name))
+
+    def test_versions_are_deduplicated_by_content(self):
+        first = PAGE.format(name="3M", price="100")
+        digest = self.archive.put("MMM:EGX", first, fetched=1.0)
+        self.assertEqual(self.archive.put("MMM:EGX", first, fetched=2.0), digest)
+        self.archive.put("MMM:EGX", PAGE.format(name="3M", price="101"), fetched=3.0)
+        # Another symbol with the same page shares the stored blob
+        self.archive.put("MMM:CA", first, fetched=4.0)
+
+        self.assertEqual([fetched for fetched, _ in self.archive.versions("MMM:EGX")], [1.0, 2.0, 3.0])
+        self.assertIn("101", self.archive.read("MMM:EGX"))
+        self.assertIn("100", self.archive.read("MMM:EGX", at=2.5))
+        self.assertIsNone(self.archive.read("NOPE"))
+        stats = self.archive.stats()
+        self.assertEqual((stats["symbols"], stats["versions"], stats["pages"]), (2, 4, 2))
+        self.assertLess(stats["stored_bytes"] * 10, stats["raw_bytes"])
+
+    def test_stored_pages_stream_archive_then_loose_files(self):
+        self.archive.put("AAA", PAGE.format(name="Old A", price="1"), fetched=1.0)
+        self.archive.put("AAA", PAGE.format(name="New A", price="2"), fetched=2.0)
+        for symbol, name in [("AAA", "Loose A"), ("BBB", "Loose B")]:
+            with open(os.path.join(self.tmp.name, f"{symbol}.html"), "w", encoding="utf-8") as file:
+                file.write(PAGE.format(name=name, price="3"))
+        # A loose page saved before the newest archived version is stale
+        os.utime(os.path.join(self.tmp.name, "AAA.html"), (1.5, 1.5))
+
+        parsed = [scraper.parse_stock_page(page, symbol) for symbol, page in scraper.stored_pages(self.tmp.name)]
+        self.assertEqual([(details["symbol"], details["name"]) for details in parsed], [("AAA", "New A"), ("BBB", "Loose B")])
+        self.assertEqual(scraper.read_stored_page("AAA", self.tmp.name)["last_price"], "2")
+        self.assertEqual(scraper.read_stored_page("BBB", self.tmp.name)["name"], "Loose B")
+        self.assertIsNone(scraper.read_stored_page("CCC", self.tmp.name))
+
+    def test_newer_loose_page_wins(self):
+        self.archive.put("AAA", PAGE.format(name="Archived A", price="1"), fetched=1.0)
+        with open(os.path.join(self.tmp.name, "AAA.html"), "w", encoding="utf-8") as file:
+            file.write(PAGE.format(name="Loose A", price="2"))
+
+        parsed = [scraper.parse_stock_page(page, symbol) for symbol, page in scraper.stored_pages(self.tmp.name)]
+        self.assertEqual([(details["symbol"], details["name"]) for details in parsed], [("AAA", "Loose A")])
+        self.assertEqual(scraper.read_stored_page("AAA", self.tmp.name)["last_price"], "2")
+
+    def test_unchanged_refetch_beats_older_loose_page(self):
+        page = PAGE.format(name="Archived A", price="1")
+        self.archive.put("AAA", page, fetched=1.0)
+        with open(os.path.join(self.tmp.name, "AAA.html"), "w", encoding="utf-8") as file:
+            file.write(PAGE.format(name="Loose A", price="2"))
+        os.utime(os.path.join(self.tmp.name, "AAA.html"), (2.0, 2.0))
+        self.archive.put("AAA", page, fetched=3.0)
+
+        self.assertEqual(self.archive.fetched_times(), {"AAA": 3.0})
+        self.assertEqual(scraper.read_stored_page("AAA", self.tmp.name)["name"], "Archived A")
+
+    def test_import_directory(self):
+        with open(os.path.join(self.tmp.name, "AAA.html"), "w", encoding="utf-8") as file:
+            file.write(PAGE.format(name="A", price="1"))
+        self.assertEqual(self.archive.import_directory(self.tmp.name), 1)
+        self.assertEqual(self.archive.import_directory(self.tmp.name), 1)
+        self.assertEqual(self.archive.symbols(), ["AAA"])
+        self.assertEqual(len(self.archive.versions("AAA")), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+import numpy as np
+import pandas as pd
+from bourstad.charts import lttb, downsample_series
+
+class TestLttb(unittest.TestCase):
+    def test_keeps_endpoints_and_extremes(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.sin(x / 50)
+        y[437] = 10.0  # A spike must survive downsampling
+        indices = lttb(x, y, 100)
+        self.assertEqual(len(indices), 100)
+        self.assertEqual((indices[0], indices[-1]), (0, 999))
+        self.assertIn(437, indices)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_short_input_is_unchanged(self):
+        np.testing.assert_array_equal(lttb(np.arange(5.0), np.arange(5.0), 10), np.arange(5))
+
+    def test_downsample_series(self):
+        index = pd.date_range("2000-01-01", periods=5000, freq="D")
+        series = pd.Series(np.random.default_rng(0).normal(size=5000).cumsum(), index=index)
+        series.iloc[10] = np.nan
+        sampled = downsample_series(series, 500)
+        self.assertEqual(len(sampled), 500)
+        self.assertEqual(sampled.index[0], index[0])
+        self.assertEqual(sampled.index[-1], index[-1])
+        self.assertEqual(sampled.max(), series.max())
+        self.assertTrue(downsample_series(series.iloc[:100], 500).equals(series.iloc[:100].dropna()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+import pandas as pd
+from bourstad.highlights import compute_rankings, load_rankings, get_rankings, rankings_file
+
+HIGHLIGHTS = pd.DataFrame([
+    {"Symbol": "AAA", "Name": "A", "Change (%)": 7.5, "Volume": 10_000},
+    {"Symbol": "BBB", "Name": "B", "Change (%)": -2.0, "Volume": 3_000_000},
+    {"Symbol": "CCC", "Name": "C", "Change (%)": 1.0, "Volume": 500},
+    {"Symbol": "DDD", "Name": "D", "Change (%)": -6.0, "Volume": 20_000},
+    {"Symbol": "EEE", "Name": "E", "Change (%)": 0.5, "Volume": 900_000},
+])
+
+class TestHighlights(unittest.TestCase):
+    def test_compute_rankings_matches_full_sort(self):
+        rankings = compute_rankings(HIGHLIGHTS)
+        self.assertEqual(rankings["gainers"]["Symbol"].tolist(), HIGHLIGHTS.sort_values("Change (%)", ascending=False).head(3)["Symbol"].tolist())
+        self.assertEqual(rankings["losers"]["Symbol"].tolist(), ["DDD", "BBB", "EEE"])
+        self.assertEqual(rankings["volume"]["Symbol"].tolist(), ["BBB", "EEE", "DDD"])
+        self.assertEqual(rankings["mentions"]["Symbol"].tolist(), ["AAA", "BBB", "DDD"])
+
+    def test_empty_highlights(self):
+        rankings = compute_rankings(pd.DataFrame())
+        self.assertTrue(all(frame.empty for frame in rankings.values()))
+
+    def test_rankings_are_persisted_per_day(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            day = date(2025, 4, 2)
+            self.assertIsNone(load_rankings(day, cache_dir))
+            self.assertIsNone(get_rankings(day, None, cache_dir))
+
+            get_rankings(day, HIGHLIGHTS, cache_dir)
+            self.assertTrue(os.path.exists(rankings_file(day, cache_dir)))
+
+            loaded = load_rankings(day, cache_dir)
+            self.assertEqual(loaded["gainers"]["Symbol"].tolist(), ["AAA", "CCC", "EEE"])
+            self.assertEqual(loaded["mentions"]["Volume"].tolist(), [10_000, 3_000_000, 20_000])
+
+    def test_corrupt_rankings_are_recomputed(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            day = date(2025, 4, 2)
+            os.makedirs(os.path.dirname(rankings_file(day, cache_dir)), exist_ok=True)
+            with open(rankings_file(day, cache_dir), "w") as file:
+                file.write("{not json")
+            self.assertIsNone(load_rankings(day, cache_dir))
+            self.assertEqual(get_rankings(day, HIGHLIGHTS, cache_dir)["gainers"]["Symbol"].tolist(), ["AAA", "CCC", "EEE"])
+            self.assertEqual(load_rankings(day, cache_dir)["losers"]["Symbol"].tolist(), ["DDD", "BBB", "EEE"])
+
+if __name__ == '__main__':
+    unittest.main()
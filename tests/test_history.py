@@ -0,0 +1,53 @@
+import os
+import math
+import tempfile
+import unittest
+from bourstad.history import SnapshotStore
+
+def quote(symbol, price):
+    return {"Symbol": symbol, "Name": symbol, "Current Price": price, "52-Week High": "N/A"}
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(os.path.join(self.tmp.name, "history.sqlite"))
+        self.store.record_universe([quote("AAPL", 100), quote("MSFT", 200)], ts="2025-04-01T16:00:00")
+        self.store.record_universe([quote("AAPL", 110)], ts="2025-04-02T16:00:00")
+        self.store.record_universe([quote("AAPL", 120), quote("MSFT", 220)], ts="2025-04-03T16:00:00")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_quotes_as_of(self):
+        frame = self.store.quotes_as_of("2025-04-02T23:59:59")
+        prices = dict(zip(frame["Symbol"], frame["Current Price"]))
+        self.assertEqual(prices, {"AAPL": 110, "MSFT": 200})
+        self.assertTrue(math.isnan(frame["52-Week High"].iloc[0]))
+
+        universe = self.store.universe_as_of("2025-04-01T16:00:00", symbols=["MSFT"])
+        self.assertEqual(universe.symbols, ["MSFT"])
+
+    def test_quotes_between(self):
+        frame = self.store.quotes_between("2025-04-02", "2025-04-04", symbols=["AAPL"])
+        self.assertEqual(frame["Current Price"].tolist(), [110, 120])
+        self.assertEqual(len(self.store.snapshots()), 3)
+
+    def test_snapshots_are_append_only(self):
+        self.store.record_universe([quote("AAPL", 999)], ts="2025-04-01T16:00:00")
+        frame = self.store.quotes_as_of("2025-04-01T16:00:00", symbols=["AAPL"])
+        self.assertEqual(frame["Current Price"].tolist(), [100])
+
+    def test_holdings(self):
+        owned = [{"Symbol": "AAPL", "Name": "Apple", "Quantity": 10, "Average Price": 90.0, "Current Price": 100.0, "Gains and Losses": "success"}]
+        self.store.record_holdings(owned, account="me", ts="2025-04-01")
+        self.store.record_holdings(owned[:0], account="me", ts="2025-04-02")
+        self.store.record_holdings(owned, account="other", ts="2025-04-03")
+
+        first = self.store.holdings_as_of("2025-04-01T12:00:00", account="me")
+        self.assertEqual(first["Quantity"].tolist(), [10])
+        self.assertTrue(self.store.holdings_as_of("2025-04-02T12:00:00", account="me").empty)
+        self.assertEqual(len(self.store.holdings_between("2025-04-01", "2025-04-05", account="me")), 1)
+        self.assertEqual(len(self.store.holdings_as_of("2025-04-05", account="other")), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from bourstad import holdings
+from bourstad.history import SnapshotStore
+from bourstad.holdings import HoldingsPoller, extract_holdings_table, parse_holdings_table, diff_holdings, is_price_only, record_holdings, account_id
+
+def holdings_page(rows):
+    body = "".join(
+        f"<tr><td>{symbol}</td><td>{name}</td><td>{quantity}</td><td>{average:,.2f} $</td><td>{price:,.2f} $</td><td>+0.00 $</td></tr>"
+        for symbol, name, quantity, average, price in rows
+    )
+    return f"""<html><body>
+    <table id="other"><tr><td>ignored</td></tr></table>
+    <table class="table" id="editable2"><thead><tr><th>Symbole</th></tr></thead><tbody>{body}</tbody></table>
+    </body></html>"""
+
+ROWS = [
+    ("AAV:CA", "Advantage Energy", 10, 9.5, 10.0),
+    ("BNS:CA", "Bank of Nova Scotia", 5, 1200.0, 1250.5),
+]
+
+class TestParsing(unittest.TestCase):
+    def test_parse_only_the_holdings_table(self):
+        table = extract_holdings_table(holdings_page(ROWS))
+        self.assertNotIn("ignored", table)
+        owned = parse_holdings_table(table)
+        self.assertEqual([row["Symbol"] for row in owned], ["AAV:CA", "BNS:CA"])
+        self.assertEqual(owned[1]["Average Price"], 1200.0)
+        self.assertEqual(owned[1]["Current Price"], 1250.5)
+        self.assertEqual(owned[0]["Quantity"], 10)
+
+    def test_html_parser_fallback(self):
+        table = extract_holdings_table(holdings_page(ROWS))
+        with patch.object(holdings, "lxml_html", None):
+            fallback = parse_holdings_table(table)
+        self.assertEqual(fallback, parse_holdings_table(table))
+
+    def test_missing_table(self):
+        self.assertIsNone(extract_holdings_table("<html><table id='other'></table></html>"))
+
+    def test_lookalike_ids_and_nested_tables(self):
+        page = holdings_page(ROWS).replace('<table id="other">', '<table data-id="editable2">')
+        self.assertNotIn("ignored", extract_holdings_table(page))
+        self.assertIsNone(extract_holdings_table("<table id='editable2-old'><tr><td>x</td></tr></table>"))
+
+        nested = holdings_page(ROWS).replace("<td>+0.00 $</td></tr>", "<td><table><tr><td>+0.00 $</td></tr></table></td></tr>", 1)
+        table = extract_holdings_table(nested)
+        self.assertIn("BNS:CA", table)
+        self.assertEqual([row["Symbol"] for row in parse_holdings_table(table)], ["AAV:CA", "BNS:CA"])
+
+class TestDeltas(unittest.TestCase):
+    def test_diff_and_price_only(self):
+        old = parse_holdings_table(extract_holdings_table(holdings_page(ROWS)))
+        repriced = parse_holdings_table(extract_holdings_table(holdings_page([ROWS[0][:4] + (11.0,), ROWS[1]])))
+        delta = diff_holdings(old, repriced)
+        self.assertEqual([owned["Symbol"] for owned in delta["changed"]], ["AAV:CA"])
+        self.assertTrue(is_price_only(delta, old))
+
+        traded = parse_holdings_table(extract_holdings_table(holdings_page([ROWS[0][:2] + (20, 9.5, 10.0)])))
+        delta = diff_holdings(old, traded)
+        self.assertEqual([owned["Symbol"] for owned in delta["removed"]], ["BNS:CA"])
+        self.assertFalse(is_price_only(delta, old))
+
+    def test_poller_notifies_only_changes(self):
+        pages = [holdings_page(ROWS), holdings_page(ROWS), holdings_page([ROWS[0][:4] + (11.0,), ROWS[1]])]
+        poller = HoldingsPoller("suid", "aut", interval=0, fetch_page=lambda suid, aut: pages.pop(0), record=False)
+        deltas = []
+        poller.subscribe(lambda delta, previous: deltas.append(delta))
+
+        self.assertEqual(len(poller.poll()["added"]), 2)
+        self.assertIsNone(poller.poll())  # Same table: hashed, not parsed
+        delta = poller.poll()
+        self.assertEqual([owned["Current Price"] for owned in delta["changed"]], [11.0])
+        self.assertEqual(len(deltas), 2)
+        self.assertEqual((poller.fetches, poller.parses), (3, 2))
+
+    def test_snapshots_only_on_change_per_account(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SnapshotStore(os.path.join(tmp, "history.sqlite"))
+            owned = parse_holdings_table(extract_holdings_table(holdings_page(ROWS)))
+            self.assertIsNotNone(record_holdings(owned, "me@example.com", store, ts="2025-04-01"))
+            # Fetched again, e.g. after a new login with another suid: same positions, no snapshot
+            self.assertIsNone(record_holdings(parse_holdings_table(extract_holdings_table(holdings_page(ROWS))), "me@example.com", store, ts="2025-04-02"))
+            self.assertIsNotNone(record_holdings(owned, "other@example.com", store, ts="2025-04-02"))
+
+            repriced = parse_holdings_table(extract_holdings_table(holdings_page([ROWS[0][:4] + (11.0,), ROWS[1]])))
+            self.assertIsNotNone(record_holdings(repriced, "me@example.com", store, ts="2025-04-03"))
+            self.assertIsNotNone(record_holdings([], "me@example.com", store, ts="2025-04-04"))
+            self.assertIsNone(record_holdings([], "me@example.com", store, ts="2025-04-05"))
+            self.assertEqual(store.holdings_between("2025-04-01", "2025-04-05", account="me@example.com")["Timestamp"].nunique(), 2)
+
+        with patch.dict(os.environ, {"BOURSTAD_USERNAME": " Me@Example.com "}):
+            self.assertEqual(account_id(), "me@example.com")
+            self.assertEqual(HoldingsPoller("suid", "aut").account, "me@example.com")
+
+    def test_poll_interval(self):
+        poller = HoldingsPoller("suid", "aut", interval=60, fetch_page=lambda suid, aut: holdings_page(ROWS), record=False)
+        poller.poll()
+        self.assertIsNone(poller.poll())
+        self.assertEqual(poller.fetches, 1)
+        poller.poll(force=True)
+        self.assertEqual(poller.fetches, 2)
+
+if __name__ == '__main__':
+    unittest.main()
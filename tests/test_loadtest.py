@@ -0,0 +1,37 @@
+import os
+import unittest
+from bourstad import loadtest
+
+class TestLoadTest(unittest.TestCase):
+    def test_latency_summary(self):
+        summary = loadtest.latency_summary({"quote": [0.001 * value for value in range(1, 101)]})
+        self.assertEqual(summary["quote"]["count"], 100)
+        self.assertAlmostEqual(summary["quote"]["p50"], 50.5)
+        self.assertAlmostEqual(summary["quote"]["p99"], 99.01)
+
+    def test_recorder_counts_errors(self):
+        recorder = loadtest.LoadRecorder()
+        self.assertIsNone(recorder.measure("broken", lambda: 1 / 0))
+        self.assertEqual(recorder.measure("ok", lambda value: value, 3), 3)
+        self.assertEqual(dict(recorder.errors), {"broken": 1})
+        self.assertEqual(len(recorder.samples["ok"]), 1)
+
+    def test_run_load_against_stub(self):
+        cwd, environment = os.getcwd(), dict(os.environ)
+        for mode in loadtest.MODES:
+            report = loadtest.run_load(users=2, iterations=1, mode=mode, latency=0.0, trace_memory=False)
+            self.assertEqual(set(report["operations"]), {"login", "get_bourstad_securities", "fetch_stock_data",
+                                                         "fetch_highlights_data", "analyze_stocks", "fetch_owned_securities"})
+            self.assertEqual(report["operations"]["fetch_stock_data"]["count"], 2 * loadtest.QUOTES_PER_SESSION)
+            self.assertGreater(report["upstream"]["yahoo"], 0)
+            self.assertGreater(report["upstream"]["amplification"], 0)
+            self.assertIn("p95", loadtest.format_report(report))
+        # The run leaves the working directory and environment as it found them
+        self.assertEqual((os.getcwd(), dict(os.environ)), (cwd, environment))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            loadtest.run_load(mode="nope")
+
+if __name__ == '__main__':
+    unittest.main()
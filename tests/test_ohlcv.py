@@ -0,0 +1,92 @@
+import os
+import time
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from bourstad.ohlcv import OhlcvStore
+from bourstad.highlights import range_highlights, period_changes, period_movers
+
+def fake_history(symbols, start, end):
+    """
+    Deterministic business-day bars: each symbol rises by its own daily step.
+    """
+    dates = pd.bdate_range(start, end)
+    histories = {}
+    for step, symbol in enumerate(sorted(symbols), start=1):
+        close = 100 + step * np.arange(1, len(dates) + 1)
+        histories[symbol] = pd.DataFrame({
+            "Open": close - step, "High": close, "Low": close - step, "Close": close, "Volume": 1000.0 * step,
+        }, index=dates)
+    return histories
+
+class TestOhlcvStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.calls = []
+
+        def fetch(symbols, start, end):
+            self.calls.append((tuple(symbols), start.date().isoformat(), end.date().isoformat()))
+            return fake_history(symbols, start, end)
+        self.store = OhlcvStore(os.path.join(self.tmp.name, "ohlcv.sqlite"), fetch=fetch)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_only_missing_days_are_fetched(self):
+        self.store.ensure(["AAA", "BBB"], "2025-03-03", "2025-03-14")
+        self.assertEqual(self.calls, [(("AAA", "BBB"), "2025-03-03", "2025-03-14")])
+
+        self.store.ensure(["AAA", "BBB"], "2025-03-05", "2025-03-12")
+        self.assertEqual(len(self.calls), 1)
+
+        self.store.ensure(["AAA", "CCC"], "2025-03-10", "2025-03-21")
+        self.assertIn((("AAA",), "2025-03-15", "2025-03-21"), self.calls)
+        self.assertIn((("CCC",), "2025-03-10", "2025-03-21"), self.calls)
+
+    def test_empty_download_is_retried(self):
+        store = OhlcvStore(os.path.join(self.tmp.name, "empty.sqlite"), fetch=lambda symbols, start, end: {})
+        store.ensure(["AAA"], "2025-03-03", "2025-03-07")
+        self.assertEqual(store.coverage(), {})
+
+    def test_failed_gap_is_not_covered(self):
+        self.store.ensure(["AAA"], "2025-03-10", "2025-03-14")
+        fetch = self.store.fetch
+
+        def fail_before(symbols, start, end):
+            if start < pd.Timestamp("2025-03-10"):
+                raise ConnectionError("timeout")
+            return fetch(symbols, start, end)
+        self.store.fetch = fail_before
+        # Missing on both sides: the later range succeeds, the earlier one fails
+        self.store.ensure(["AAA"], "2025-03-03", "2025-03-21")
+        self.assertEqual(self.store.coverage()["AAA"], (pd.Timestamp("2025-03-10"), pd.Timestamp("2025-03-14")))
+
+        self.store.fetch = fetch
+        self.store.ensure(["AAA"], "2025-03-03", "2025-03-21")
+        self.assertIn((("AAA",), "2025-03-03", "2025-03-09"), self.calls)
+        self.assertEqual(self.store.coverage()["AAA"], (pd.Timestamp("2025-03-03"), pd.Timestamp("2025-03-21")))
+
+    def test_range_highlights(self):
+        panel = self.store.panel(["AAA", "BBB"], "2025-03-03", "2025-03-28")
+        frame = range_highlights(panel, names={"AAA": "A Corp"}).set_index("Symbol")
+        # AAA opens at 100 on the first day and closes at 120 on the 20th
+        self.assertAlmostEqual(frame.loc["AAA", "Change (%)"], 20.0)
+        self.assertEqual(frame.loc["AAA", "Name"], "A Corp")
+        self.assertEqual(frame.loc["BBB", "Days"], 20)
+        self.assertEqual(frame.loc["BBB", "Volume"], 2000.0)
+
+        movers = period_movers(period_changes(panel, "W"), n=1)
+        self.assertEqual(len(movers), 4)
+        self.assertTrue((movers["Gainer"] == "BBB").all())
+
+    def test_month_from_disk_is_fast(self):
+        symbols = [f"S{i:03d}" for i in range(678)]
+        self.store.ensure(symbols, "2025-03-01", "2025-03-31")
+        start = time.perf_counter()
+        frame = range_highlights(self.store.panel(symbols, "2025-03-01", "2025-03-31"))
+        self.assertEqual(len(frame), 678)
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
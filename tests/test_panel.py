@@ -0,0 +1,142 @@
+import os
+import tempfile
+import threading
+import multiprocessing
+import unittest
+import numpy as np
+import pandas as pd
+from bourstad.ohlcv import OhlcvStore
+from bourstad.panel import PricePanel, rebuild_panel, INDEX_FILE
+from bourstad.atomic import file_lock
+from tests.test_ohlcv import fake_history
+
+def append_days(directory, symbol):
+    # One symbol per process, a week at a time, so the writers interleave
+    panel = PricePanel(directory)
+    for week in pd.date_range("2025-01-06", periods=8, freq="W-MON"):
+        panel.append(fake_history([symbol], week, week + pd.Timedelta(days=4)))
+
+class TestPricePanel(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.directory = os.path.join(self.tmp.name, "panel")
+
+    def test_append_and_read_back(self):
+        panel = PricePanel(self.directory)
+        self.assertEqual(len(panel), 0)
+        self.assertEqual(panel.append(fake_history(["AAA", "BBB"], "2025-03-03", "2025-03-07")), 5)
+
+        self.assertEqual(panel.symbols, ["AAA", "BBB"])
+        self.assertEqual(panel.array().shape, (5, 2, 5))
+        close = panel.field("Close")
+        self.assertIsInstance(close.base, np.ndarray)
+        self.assertFalse(close.flags.writeable)
+        np.testing.assert_array_equal(close[:, 0], [101, 102, 103, 104, 105])
+
+        frames = panel.panel(["BBB", "ZZZ"], "2025-03-04", "2025-03-05")
+        self.assertEqual(list(frames["Close"].columns), ["BBB"])
+        self.assertEqual(frames["Close"]["BBB"].tolist(), [104.0, 106.0])
+
+    def test_incremental_appends_are_seen_by_other_readers(self):
+        writer = PricePanel(self.directory)
+        writer.append(fake_history(["AAA"], "2025-03-03", "2025-03-07"))
+        reader = PricePanel(self.directory)
+        data_file = reader._state[0]["data"]
+
+        # New days and a new symbol fit in the reserved room: same file, no rewrite
+        writer.append(fake_history(["AAA", "BBB"], "2025-03-10", "2025-03-14"))
+        self.assertEqual(len(reader), 5)
+        reader.refresh()
+        self.assertEqual((len(reader), reader.symbols), (10, ["AAA", "BBB"]))
+        self.assertEqual(reader._state[0]["data"], data_file)
+        self.assertTrue(np.isnan(reader.field("Close")[0, 1]))
+
+    def test_changed_published_bars_go_to_a_new_file(self):
+        writer = PricePanel(self.directory)
+        writer.append(fake_history(["AAA"], "2025-03-03", "2025-03-07"))
+        reader = PricePanel(self.directory)
+        data_file = reader._state[0]["data"]
+
+        # Refetching the same bars leaves the file alone
+        writer.append(fake_history(["AAA"], "2025-03-03", "2025-03-07"))
+        self.assertEqual(writer._state[0]["data"], data_file)
+
+        revised = {"AAA": fake_history(["AAA"], "2025-03-03", "2025-03-07")["AAA"].astype(float)}
+        revised["AAA"].loc["2025-03-07", "Close"] = 105.5
+        writer.append(revised)
+        self.assertNotEqual(writer._state[0]["data"], data_file)
+        # Until it refreshes, the reader keeps the bars it was given
+        self.assertEqual(reader.field("Close")[-1, 0], 105.0)
+        reader.refresh()
+        self.assertEqual(reader.field("Close")[-1, 0], 105.5)
+
+    def test_rebuild_waits_for_writers(self):
+        path = os.path.join(self.tmp.name, "ohlcv.sqlite")
+        OhlcvStore(path, fetch=fake_history).ensure(["AAA"], "2025-03-03", "2025-03-07")
+        PricePanel(self.directory).append(fake_history(["OLD"], "2025-03-03", "2025-03-07"))
+
+        rebuilt = []
+        with file_lock(os.path.join(self.directory, INDEX_FILE)):
+            thread = threading.Thread(target=lambda: rebuilt.append(rebuild_panel(OhlcvStore(path, fetch=fake_history), self.directory)))
+            thread.start()
+            thread.join(0.5)
+            self.assertTrue(thread.is_alive())
+            # The old panel stays readable while the rebuild waits
+            self.assertEqual(PricePanel(self.directory).symbols, ["OLD"])
+        thread.join()
+        self.assertEqual((rebuilt[0].symbols, len(rebuilt[0])), (["AAA"], 5))
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.startswith("prices-")]), 1)
+
+    def test_backfill_rewrites_in_date_order(self):
+        panel = PricePanel(self.directory)
+        panel.append(fake_history(["AAA"], "2025-03-10", "2025-03-14"))
+        panel.append(fake_history(["AAA"], "2025-03-03", "2025-03-07"))
+        self.assertTrue(panel.dates.is_monotonic_increasing)
+        self.assertEqual(len(panel), 10)
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.startswith("prices-")]), 1)
+        self.assertEqual(panel.field("Close")[5, 0], 101.0)
+
+    def test_grows_past_reserved_room(self):
+        panel = PricePanel(self.directory)
+        panel.append(fake_history([f"S{number:03d}" for number in range(100)], "2024-01-01", "2025-03-07"))
+        self.assertEqual(len(panel.symbols), 100)
+        self.assertGreater(len(panel), 256)
+        self.assertEqual(panel.field("Volume")[-1, 99], 100000.0)
+
+    def test_concurrent_writer_processes(self):
+        symbols = [f"P{number}" for number in range(4)]
+        processes = [multiprocessing.Process(target=append_days, args=(self.directory, symbol)) for symbol in symbols]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual([process.exitcode for process in processes], [0] * 4)
+
+        panel = PricePanel(self.directory)
+        self.assertEqual(sorted(panel.symbols), symbols)
+        self.assertEqual(len(panel), 40)
+        self.assertFalse(np.isnan(panel.field("Close")).any())
+
+    def test_ohlcv_store_feeds_and_reads_the_panel(self):
+        path = os.path.join(self.tmp.name, "ohlcv.sqlite")
+        calls = []
+
+        def fetch(symbols, start, end):
+            calls.append(tuple(symbols))
+            return fake_history(symbols, start, end)
+        OhlcvStore(path, fetch=fetch).ensure(["AAA"], "2025-03-03", "2025-03-07")
+
+        # An empty panel is filled from the existing history, then kept up to date
+        store = OhlcvStore(path, fetch=fetch, prices=PricePanel(self.directory))
+        self.assertEqual(store.prices.symbols, ["AAA"])
+        frames = store.panel(["AAA", "BBB"], "2025-03-03", "2025-03-07")
+        expected = OhlcvStore(path, fetch=fetch).panel(["AAA", "BBB"], "2025-03-03", "2025-03-07")
+        pd.testing.assert_frame_equal(frames["Close"], expected["Close"], check_names=False, check_freq=False)
+        self.assertEqual(store.prices.symbols, ["AAA", "BBB"])
+
+        rebuilt = rebuild_panel(OhlcvStore(path, fetch=fetch), self.directory)
+        self.assertEqual((rebuilt.symbols, len(rebuilt)), (["AAA", "BBB"], 5))
+
+if __name__ == '__main__':
+    unittest.main()
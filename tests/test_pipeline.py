@@ -0,0 +1,100 @@
+import os
+import json
+import tempfile
+import unittest
+import pandas as pd
+from unittest.mock import patch
+from bourstad import pipeline
+from bourstad.panel import PricePanel
+from tests.test_ohlcv import fake_history
+
+STOCKS = [{'id': None, 'name': 'Selectionner un titre'}, {'id': 'AAPL', 'name': 'Apple'}, {'id': 'MSFT', 'name': 'Microsoft'}]
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manifest_file = os.path.join(self.tmp.name, 'run_manifest.json')
+        self.stocks_dir = os.path.join(self.tmp.name, 'stocks')
+        os.makedirs(self.stocks_dir)
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.makedirs('data')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def fake_fetch(self, fail=()):
+        calls = []
+
+        def fetch(symbol, suid, aut, directory, archive=None, session=None):
+            calls.append(symbol)
+            if symbol in fail:
+                return False
+            with open(os.path.join(directory, f"{symbol}.html"), 'w', encoding='utf-8') as file:
+                file.write("<html></html>")
+            return True
+        return fetch, calls
+
+    def run_pipeline(self, fetch, **kwargs):
+        with patch.object(pipeline, 'fetch_and_parse_stocks', return_value=(STOCKS, 'suid', 'aut')), \
+             patch.object(pipeline, 'fetch_stock_detail', side_effect=fetch), \
+             patch.object(pipeline, 'fetch_enhanced_stock_record', side_effect=lambda symbol: {'Symbol': symbol, 'Current Price': 1.0}), \
+             patch.object(pipeline, 'download_history', side_effect=fake_history):
+            return pipeline.run_all(manifest_file=self.manifest_file, stocks_dir=self.stocks_dir, **kwargs)
+
+    def test_resume_only_redoes_remaining_work(self):
+        fetch, calls = self.fake_fetch(fail={'MSFT'})
+        manifest = self.run_pipeline(fetch)
+        self.assertEqual(pipeline.summarize(manifest), {'listed': 2, 'fetched': 1, 'parsed': 1, 'enriched': 1})
+
+        fetch, calls = self.fake_fetch()
+        manifest = self.run_pipeline(fetch, resume=True)
+        self.assertEqual(calls, ['MSFT'])
+        self.assertEqual(pipeline.summarize(manifest), {'listed': 2, 'fetched': 2, 'parsed': 2, 'enriched': 2})
+
+        with open(self.manifest_file, encoding='utf-8') as file:
+            self.assertIn('MSFT', json.load(file)['symbols'])
+        # Daily bars of the enriched symbols are appended to the price panel
+        panel = PricePanel()
+        self.assertEqual(sorted(panel.symbols), ['AAPL', 'MSFT'])
+        self.assertEqual(panel.dates[-1], pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=1)[0])
+
+    def test_selected_stages_are_rerun(self):
+        fetch, calls = self.fake_fetch()
+        self.run_pipeline(fetch)
+        fetch, calls = self.fake_fetch()
+        manifest = self.run_pipeline(fetch, stages=['parsed'])
+        self.assertEqual(calls, [])
+        self.assertEqual(manifest['symbols']['AAPL']['parsed']['symbol'], 'AAPL')
+
+    def test_expired_session_logs_in_again(self):
+        calls = []
+
+        def fetch(symbol, suid, aut, directory, archive=None, session=None):
+            calls.append((symbol, suid))
+            if suid == 'suid':
+                # Bourstad answered with its login page
+                session['suid'] = session['aut'] = None
+                return False
+            with open(os.path.join(directory, f"{symbol}.html"), 'w', encoding='utf-8') as file:
+                file.write("<html></html>")
+            return True
+        logins = [(STOCKS, 'suid', 'aut'), (STOCKS, 'suid2', 'aut2')]
+        with patch.object(pipeline, 'fetch_and_parse_stocks', side_effect=lambda email, password: logins.pop(0)), \
+             patch.object(pipeline, 'fetch_stock_detail', side_effect=fetch), \
+             patch.object(pipeline, 'fetch_enhanced_stock_record', side_effect=lambda symbol: {'Symbol': symbol, 'Current Price': 1.0}), \
+             patch.object(pipeline, 'download_history', side_effect=fake_history):
+            manifest = pipeline.run_all(manifest_file=self.manifest_file, stocks_dir=self.stocks_dir)
+        self.assertEqual(calls, [('AAPL', 'suid'), ('MSFT', 'suid2')])
+        # The symbol that got the login page stays pending
+        self.assertEqual(pipeline.pending_symbols(manifest, 'fetched'), ['AAPL'])
+
+    def test_parse_stages(self):
+        self.assertEqual(pipeline.parse_stages('enriched,fetched'), ['fetched', 'enriched'])
+        self.assertEqual(pipeline.parse_stages(None), pipeline.STAGES)
+        with self.assertRaises(ValueError):
+            pipeline.parse_stages('bogus')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import math
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from bourstad.portfolio import Portfolio, load_sector_info, returns_from_prices
+from bourstad.ohlcv import OhlcvStore
+from tests.test_ohlcv import fake_history
+
+OWNED = [
+    {"Symbol": "AAPL", "Name": "Apple", "Quantity": 10, "Average Price": 100.0, "Current Price": 110.0, "Gains and Losses": "success"},
+    {"Symbol": "MSFT", "Name": "Microsoft", "Quantity": 5, "Average Price": 200.0, "Current Price": 180.0, "Gains and Losses": "danger"},
+    {"Symbol": "XOM", "Name": "Exxon", "Quantity": 20, "Average Price": 50.0, "Current Price": 50.0, "Gains and Losses": ""},
+]
+SECTORS = {"AAPL": ("Technology", "Consumer Electronics"), "MSFT": ("Technology", "Software"), "XOM": ("Energy", "Oil & Gas")}
+
+class TestPortfolio(unittest.TestCase):
+    def setUp(self):
+        self.portfolio = Portfolio(OWNED, sectors=SECTORS)
+
+    def test_summary(self):
+        summary = self.portfolio.summary()
+        self.assertEqual(summary["Market Value"], 1100 + 900 + 1000)
+        self.assertEqual(summary["Unrealized P&L"], 100 - 100 + 0)
+        self.assertTrue(math.isnan(summary["Volatility"]))
+        self.assertAlmostEqual(self.portfolio.weights().sum(), 1.0)
+
+    def test_sector_exposure(self):
+        exposure = self.portfolio.sector_exposure()
+        self.assertAlmostEqual(exposure["Technology"], 2000 / 3000)
+        self.assertAlmostEqual(exposure["Energy"], 1000 / 3000)
+
+    def test_update_quote_is_incremental(self):
+        self.assertTrue(self.portfolio.update_quote("MSFT", 200.0))
+        self.assertFalse(self.portfolio.update_quote("MSFT", 200.0))
+        self.assertFalse(self.portfolio.update_quote("TSLA", 10.0))
+        rebuilt = Portfolio([dict(OWNED[0]), dict(OWNED[1], **{"Current Price": 200.0}), dict(OWNED[2])], sectors=SECTORS)
+        self.assertAlmostEqual(self.portfolio.total_market_value, rebuilt.total_market_value)
+        self.assertAlmostEqual(self.portfolio.sector_exposure()["Technology"], rebuilt.sector_exposure()["Technology"])
+        frame = self.portfolio.positions_frame()
+        self.assertEqual(frame.loc[1, "Unrealized P&L"], 0)
+
+    def test_volatility_and_correlation(self):
+        returns = pd.DataFrame({"AAPL": [0.01, -0.02, 0.015, 0.0], "MSFT": [0.02, -0.04, 0.03, 0.0], "XOM": [0.0, 0.01, -0.01, 0.005]})
+        self.portfolio.set_returns(returns)
+        weights = self.portfolio.weights()
+        expected = math.sqrt(weights @ returns.cov().to_numpy() @ weights) * math.sqrt(252)
+        self.assertAlmostEqual(self.portfolio.volatility(), expected)
+        self.assertAlmostEqual(self.portfolio.correlation().loc["AAPL", "MSFT"], 1.0)
+
+    def test_returns_from_prices(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = OhlcvStore(os.path.join(tmp, "ohlcv.sqlite"), fetch=fake_history)
+            panel = store.panel(["AAPL", "SHOP.TO"], "2025-04-01", "2025-04-03")
+            returns = returns_from_prices(panel, ["AAPL", "SHOP:CA"])
+            self.assertEqual(list(returns.columns), ["AAPL", "SHOP:CA"])
+            np.testing.assert_allclose(returns["AAPL"].to_numpy(), [1 / 101, 1 / 102])
+            np.testing.assert_allclose(returns["SHOP:CA"].to_numpy(), [2 / 102, 2 / 104])
+
+    def test_load_sector_info_defaults_to_unknown(self):
+        self.assertEqual(load_sector_info(["NOT-A-CACHED-SYMBOL"]), {"NOT-A-CACHED-SYMBOL": ("Unknown", "Unknown")})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import pstats
+import tempfile
+import threading
+import unittest
+import tracemalloc
+from unittest.mock import patch
+from bourstad import profiling
+from bourstad.profiling import Profiler, profiled, profile_from_env, profiling_enabled
+
+@profiled
+def parse(size):
+    return [str(number) * 4 for number in range(size)]
+
+@profiled
+def busy(seconds):
+    # Stays on the stack, under the profiled wrapper, long enough to be sampled
+    event = threading.Event()
+    while not event.wait(0.001):
+        seconds -= 0.001
+        if seconds <= 0:
+            return parse(1000)
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_profile_outputs(self):
+        profiler = Profiler("test", directory=self.tmp.name, interval=0.001)
+        with profiler:
+            kept = parse(20_000)
+            worker = threading.Thread(target=busy, args=(0.1,))
+            worker.start()
+            worker.join()
+        self.assertEqual(len(kept), 20_000)
+
+        # Entry points are timed on every thread
+        self.assertEqual(profiler.sections["test_profiling.parse"][0], 2)
+        stats = pstats.Stats(profiler.base_path + ".pstats")
+        self.assertTrue(any(function == "parse" for _, _, function in stats.stats))
+
+        with open(profiler.base_path + ".collapsed") as file:
+            lines = file.read().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertGreater(int(count), 0)
+        self.assertTrue(any("busy (test_profiling.py" in line for line in lines))
+
+        with open(profiler.base_path + ".txt") as file:
+            summary = file.read()
+        for heading in ["Entry points", "test_profiling.parse", "Hot functions by own time", "Largest allocation sites", "test_profiling.py:"]:
+            self.assertIn(heading, summary)
+
+        self.assertIsNone(profiler.stop())
+        self.assertFalse(profiling._active)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_profiled_is_a_pass_through_without_profiler(self):
+        self.assertEqual(parse(2), ["0000", "1111"])
+        self.assertEqual(parse.__name__, "parse")
+
+    def test_tracemalloc_started_elsewhere_is_left_running(self):
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        with Profiler("test", directory=self.tmp.name):
+            parse(10)
+        self.assertTrue(tracemalloc.is_tracing())
+
+    def test_env_switch(self):
+        for value, enabled in [("", False), ("0", False), ("no", False), ("1", True), ("yes", True)]:
+            with patch.dict(os.environ, {profiling.PROFILE_ENV: value}):
+                self.assertEqual(profiling_enabled(), enabled, value)
+                self.assertEqual(isinstance(profile_from_env("test"), Profiler), enabled)
+
+if __name__ == "__main__":
+    unittest.main()
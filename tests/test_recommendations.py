@@ -0,0 +1,106 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+from bourstad import recommendations
+from bourstad.analyzer import analyze_stocks
+from bourstad.recommendations import RecommendationCache, quote_version
+from bourstad.universe import QuoteRecord
+
+RECORDS = [
+    {"Symbol": "AAA", "Name": "A", "Current Price": 10, "P/E Ratio": 12, "Dividend Yield": 0.04, "52-Week Low": 9.5, "52-Week High": 20},
+    {"Symbol": "BBB", "Name": "B", "Current Price": 50, "P/E Ratio": 40, "Dividend Yield": 0.01, "52-Week Low": 20, "52-Week High": 55},
+    {"Symbol": "CCC", "Name": "C", "Current Price": 30, "P/E Ratio": "N/A", "Dividend Yield": 0.06, "52-Week Low": 10, "52-Week High": 60},
+]
+
+def info(price, low=10, high=60):
+    return {"longName": "Cached", "currentPrice": price, "fiftyTwoWeekLow": low, "fiftyTwoWeekHigh": high}
+
+class TestRecommendationCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.makedirs("cache")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write_cache(self, symbol, data, mtime):
+        path = os.path.join("cache", f"{symbol}.json")
+        with open(path, "w") as file:
+            json.dump(data, file)
+        os.utime(path, ns=(mtime, mtime))
+
+    def test_same_lines_as_analyze_stocks(self):
+        self.assertEqual(RecommendationCache().for_quotes(RECORDS), analyze_stocks(RECORDS))
+
+    def test_only_changed_quotes_are_analyzed(self):
+        memo = RecommendationCache()
+        memo.for_quotes(RECORDS)
+        changed = [dict(RECORDS[0], **{"Current Price": 19}), RECORDS[1], RECORDS[2]]
+        with patch.object(recommendations, "recommendations_by_symbol", wraps=recommendations.recommendations_by_symbol) as analyze:
+            self.assertEqual(memo.for_quotes(RECORDS), analyze_stocks(RECORDS))
+            analyze.assert_not_called()
+            self.assertEqual(memo.for_quotes(changed), analyze_stocks(changed))
+            self.assertEqual(analyze.call_count, 1)
+            self.assertEqual(analyze.call_args[0][0].symbols, ["AAA"])
+        self.assertEqual(memo.stats(), {"symbols": 3, "computed": 4, "reused": 5})
+
+    def test_signal(self):
+        memo = RecommendationCache()
+        self.assertEqual(memo.signal(RECORDS[0]), ("Strong Buy", 100))
+        self.assertEqual(memo.signal(RECORDS[1]), ("Strong Sell", 0))
+        self.assertEqual(memo.signal({"Symbol": "DDD", "Name": "D", "Current Price": 5}), ("Neutral", 50))
+        self.assertEqual(memo.signal(QuoteRecord.from_dict(RECORDS[0])), ("Strong Buy", 100))
+        self.assertEqual(memo.stats()["reused"], 1)
+
+    def test_version_follows_quote_values(self):
+        quote = QuoteRecord.from_dict(RECORDS[0])
+        self.assertEqual(quote_version(quote), quote_version(QuoteRecord.from_dict(dict(RECORDS[0]))))
+        self.assertNotEqual(quote_version(quote), quote_version(QuoteRecord.from_dict(dict(RECORDS[0], **{"P/E Ratio": 13}))))
+
+    def test_cached_universe_reads_only_rewritten_files(self):
+        stocks = [{"id": "AAA", "name": "A"}, {"id": "BBB", "name": "B"}, {"id": "ZZZ", "name": "Not cached"}]
+        self.write_cache("AAA", info(10.5), 1_000_000_000)
+        self.write_cache("BBB", info(58), 1_000_000_000)
+        memo = RecommendationCache("recommendations.json")
+        self.assertEqual(memo.for_cached_universe(stocks), [
+            "Cached (AAA): Strong Buy - Near 52-week low.",
+            "Cached (BBB): Strong Sell - Near 52-week high.",
+        ])
+
+        with patch.object(recommendations, "read_cached_info", wraps=recommendations.read_cached_info) as read:
+            memo.for_cached_universe(stocks)
+            read.assert_not_called()
+            # A refreshed quote invalidates its symbol only
+            self.write_cache("BBB", info(30), 2_000_000_000)
+            lines = memo.for_cached_universe(stocks)
+            self.assertEqual([call.args[0] for call in read.call_args_list], ["BBB"])
+        self.assertEqual(lines[1], "Cached (BBB): Hold - Trading within a stable range.")
+
+        # Rewriting a file with the same quote reads it but does not analyze it again
+        self.write_cache("AAA", info(10.5), 3_000_000_000)
+        computed = memo.stats()["computed"]
+        memo.for_cached_universe(stocks)
+        self.assertEqual(memo.stats()["computed"], computed)
+
+        # Saved results carry over to the next run
+        memo.save()
+        reloaded = RecommendationCache("recommendations.json")
+        self.assertEqual(reloaded.for_cached_universe(stocks), lines)
+        self.assertEqual(reloaded.stats()["computed"], 0)
+
+    def test_invalidate(self):
+        memo = RecommendationCache()
+        memo.for_quotes(RECORDS)
+        memo.invalidate(["AAA"])
+        memo.for_quotes(RECORDS)
+        self.assertEqual(memo.stats()["computed"], 4)
+        memo.invalidate()
+        self.assertEqual(memo.stats()["symbols"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
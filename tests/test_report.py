@@ -0,0 +1,82 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+from bourstad import report
+from bourstad.panel import PricePanel
+from tests.test_ohlcv import fake_history
+
+STOCKS = [{"id": "AAA", "name": "A"}, {"id": "BBB", "name": "B"}, {"id": "Y:CA", "name": "Y"}]
+
+def info(name, price, low=10, high=60):
+    return {"longName": name, "currentPrice": price, "fiftyTwoWeekLow": low, "fiftyTwoWeekHigh": high}
+
+class TestReport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, self.cwd)
+        os.makedirs("cache")
+        self.write_cache("AAA", info("Alpha", 10.5))
+        self.write_cache("BBB", info("Beta <b>", 58))
+        self.write_cache("Y.TO", info("Yellow", 30))
+        PricePanel("data/panel").append(fake_history(["AAA"], "2025-03-03", "2025-03-07"))
+        with open(os.path.join("cache", "highlights_2025-03-07.json"), "w") as file:
+            json.dump([{"Symbol": "AAA", "Name": "Alpha", "Change (%)": 6.0, "Volume": 2_000_000}], file)
+
+    def write_cache(self, symbol, data):
+        with open(os.path.join("cache", f"{symbol}.json"), "w") as file:
+            json.dump(data, file)
+
+    def build(self, stocks=STOCKS):
+        return report.build_report("report", stocks=stocks, workers=2)
+
+    def read(self, name):
+        with open(os.path.join("report", name), encoding="utf-8") as file:
+            return file.read()
+
+    def test_renders_every_view(self):
+        self.assertEqual(self.build(), {"pages": 6, "rendered": 6, "skipped": 0, "removed": 0})
+
+        index = json.loads(self.read("index.json"))
+        self.assertEqual([row["Symbol"] for row in index["rows"]], ["AAA", "BBB", "Y:CA"])
+        self.assertEqual(index["signals"], {"Strong Buy": 1, "Strong Sell": 1, "Hold": 1})
+        self.assertIn('href="symbols/Y_CA.html"', self.read("index.html"))
+        self.assertIn("Beta &lt;b&gt;", self.read("index.html"))
+
+        page = json.loads(self.read("symbols/AAA.json"))
+        self.assertEqual((page["signal"], page["score"]), ("Strong Buy", 100))
+        self.assertEqual(page["chart"]["dates"][0], "2025-03-03")
+        self.assertEqual(len(page["chart"]["close"]), 5)
+        self.assertIn("<svg", self.read("symbols/AAA.html"))
+        self.assertIn("No price history", self.read("symbols/BBB.html"))
+
+        highlights = json.loads(self.read("highlights.json"))
+        self.assertEqual(highlights["date"], "2025-03-07")
+        self.assertEqual(highlights["rankings"]["gainers"][0]["Symbol"], "AAA")
+        self.assertIn("Alpha (AAA): Strong Buy - Near 52-week low.", json.loads(self.read("recommendations.json"))["lines"])
+
+    def test_only_changed_pages_are_rendered(self):
+        self.build()
+        with patch.object(report, "render_symbol", wraps=report.render_symbol) as render:
+            self.assertEqual(self.build()["rendered"], 0)
+            render.assert_not_called()
+
+            self.write_cache("BBB", info("Beta <b>", 30))
+            stats = self.build()
+            # BBB's page, and the index and recommendations listing its new signal
+            self.assertEqual((stats["rendered"], stats["skipped"]), (3, 3))
+            self.assertEqual([call.args[0]["quote"]["Symbol"] for call in render.call_args_list], ["BBB"])
+        self.assertEqual(json.loads(self.read("symbols/BBB.json"))["signal"], "Hold")
+
+    def test_pages_of_removed_securities_are_deleted(self):
+        self.build()
+        self.assertEqual(self.build(STOCKS[:2])["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join("report", "symbols", "Y_CA.html")))
+        self.assertNotIn("symbols/Y_CA", json.loads(self.read("manifest.json")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,54 +1,132 @@
-from unittest.mock import patch, MagicMock
+import os
+import json
+import tempfile
+import threading
 import unittest
-from bourstad.scraper import fetch_current_stocks
+from unittest.mock import patch, MagicMock
+from bourstad import scraper
+from bourstad.replay import StubServer, Recorder, request_key
+
+STOCKS = "ID: , Name: Choisir\nID: MMM:EGX, Name: 3M Corp.\nID: VNP:CA, Name: 5N Plus\n"
 
 class TestScraper(unittest.TestCase):
-    @patch('bourstad.scraper.requests.Session')
-    def test_fetch_current_stocks(self, MockSession):
-        mock_session = MockSession.return_value
-        mock_session.post.return_value.status_code = 200
-        mock_session.get.return_value.status_code = 200
-        mock_session.get.return_value.content = b'[{"symbol": "AAPL", "price": 150.00, "volume": 1000}]'
-
-        stocks = fetch_current_stocks()
-        self.assertIsInstance(stocks, list)
-        self.assertEqual(len(stocks), 1)
-        self.assertEqual(stocks[0]['symbol'], 'AAPL')
-
-    @patch('bourstad.scraper.requests.Session')
-    def test_fetch_current_stocks_html(self, MockSession):
-        mock_session = MockSession.return_value
-        mock_session.post.return_value.status_code = 200
-        mock_session.get.return_value.status_code = 200
-        mock_session.get.return_value.content = b"""
-        <ul id="select2-ddl_symbols-vd-results">
-            <li id="select2-ddl_symbols-vd-result-jd74-MMM:EGX" class="select2-results__option">3M Corp.</li>
-            <li id="select2-ddl_symbols-vd-result-nj9j-VNP:CA" class="select2-results__option">5N Plus</li>
-        </ul>
-        """
-        stocks = fetch_current_stocks()
-        self.assertEqual(len(stocks), 2)
-        self.assertEqual(stocks[0]['symbol'], 'MMM:EGX')
-        self.assertEqual(stocks[0]['name'], '3M Corp.')
-
-    @patch('bourstad.scraper.requests.Session')
-    def test_fetch_current_stocks_invalid_login(self, MockSession):
-        mock_session = MockSession.return_value
-        mock_session.post.return_value.status_code = 200
-        mock_session.post.return_value.text = "Invalid credentials"
-
-        stocks = fetch_current_stocks()
-        self.assertEqual(stocks, [])  # Expect an empty list on login failure
-
-    @patch('bourstad.scraper.requests.Session')
-    def test_fetch_current_stocks_empty_list(self, MockSession):
-        mock_session = MockSession.return_value
-        mock_session.post.return_value.status_code = 200
-        mock_session.get.return_value.status_code = 200
-        mock_session.get.return_value.content = b'<ul id="select2-ddl_symbols-vd-results"></ul>'
-
-        stocks = fetch_current_stocks()
-        self.assertEqual(stocks, [])  # Expect an empty list if no stocks are found
+    """
+    The scraper against the local Bourstad and Yahoo Finance stand-in.
+    """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.stocks_file = self.path("stocks.txt")
+        with open(self.stocks_file, "w", encoding="utf-8") as file:
+            file.write(STOCKS)
+        os.makedirs(self.path("yahoo"))
+        for symbol, name, price in [("MMM", "3M Company", 147.76), ("VNP.TO", "5N Plus Inc.", 5.41)]:
+            with open(self.path("yahoo", f"{symbol}.json"), "w") as file:
+                json.dump({"longName": name, "currentPrice": price, "exchangeTimezoneName": "America/New_York"}, file)
+
+        for target, value in [("EXTRACTED_STOCKS_FILE", self.path("extracted.txt")), ("CACHE_DIR", self.path("cache")), ("record_holdings", MagicMock())]:
+            patcher = patch.object(scraper, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        os.makedirs(self.path("cache"))
+
+    def path(self, *parts):
+        return os.path.join(self.tmp.name, *parts)
+
+    def start(self, **options):
+        server = StubServer(("127.0.0.1", 0), recordings_dir=self.path("recordings"), stocks_file=self.stocks_file,
+                            cache_dir=self.path("yahoo"), **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        environment = patch.dict(os.environ, server.environment())
+        environment.start()
+        self.addCleanup(environment.stop)
+        return server
+
+    def test_fetch_and_parse_stocks(self):
+        self.start()
+        stocks, suid, aut = scraper.fetch_and_parse_stocks("user@example.com", "password")
+        self.assertEqual(stocks[1], {"id": "MMM:EGX", "name": "3M Corp."})
+        self.assertTrue(suid and aut)
+        self.assertEqual(scraper.load_local_stocks(scraper.EXTRACTED_STOCKS_FILE)[0]["id"], "MMM:EGX")
+
+    def test_invalid_login(self):
+        self.start(credentials=("user@example.com", "password"))
+        self.assertEqual(scraper.fetch_and_parse_stocks("user@example.com", "wrong"), ([], None, None))
+
+    def test_empty_list(self):
+        with open(self.stocks_file, "w", encoding="utf-8") as file:
+            file.write("")
+        self.start()
+        stocks, _, _ = scraper.fetch_and_parse_stocks("user@example.com", "password")
+        self.assertEqual(stocks, [{"id": "", "name": "Selectionner un titre"}])
+
+    def test_owned_securities_and_details(self):
+        self.start()
+        owned = scraper.fetch_owned_securities("suid", "aut")
+        self.assertEqual([security["Symbol"] for security in owned], ["MMM:EGX", "VNP:CA"])
+        self.assertEqual(owned[0]["Current Price"], 147.76)
+
+        self.assertTrue(scraper.fetch_stock_detail("VNP:CA", "suid", "aut", directory=self.path("pages")))
+        details = scraper.parse_stock_file(self.path("pages", "VNP:CA.html"))
+        self.assertEqual((details["name"], details["last_price"]), ("5N Plus Inc.", "5.41"))
+
+        archive = scraper.PageArchive(self.path("archive.sqlite"))
+        self.assertTrue(scraper.fetch_stock_detail("MMM:EGX", "suid", "aut", directory=self.path("pages"), archive=archive))
+        self.assertFalse(os.path.exists(self.path("pages", "MMM:EGX.html")))
+        self.assertEqual(scraper.parse_stock_page(archive.read("MMM:EGX"), "MMM:EGX")["name"], "3M Company")
+
+    def test_login_page_is_not_a_fetched_page(self):
+        self.start()
+        login = MagicMock(status_code=200, text=scraper.requests.get(os.environ["BOURSTAD_LOGIN_URL"]).text)
+        self.assertIn("Se connecter", login.text)
+        archive = scraper.PageArchive(self.path("archive.sqlite"))
+        session = {"suid": "suid", "aut": "aut"}
+        with patch.object(scraper.requests, "get", return_value=login):
+            self.assertFalse(scraper.fetch_stock_detail("MMM:EGX", "suid", "aut", directory=self.path("pages"), archive=archive, session=session))
+        self.assertEqual(archive.symbols(), [])
+        self.assertEqual(session, {"suid": None, "aut": None})
+
+    def test_quotes_and_highlights_offline(self):
+        server = self.start()
+        quote = scraper.fetch_quote("VNP:CA")
+        self.assertEqual(quote.current_price, 5.41)
+        self.assertTrue(os.path.exists(self.path("cache", "VNP.TO.json")))
+        self.assertIsNone(scraper.fetch_quote("NOPE:CA"))
+
+        with patch.object(scraper, "save_rankings"):
+            highlights = scraper.fetch_highlights_data(["MMM:EGX"], scraper.pd.Timestamp("2025-04-01"))
+        self.assertEqual(highlights["Name"].tolist(), ["3M Company"])
+        self.assertGreater(server.requests["yahoo"], 0)
+
+    def test_errors_and_latency(self):
+        self.start(error_rate=1.0)
+        self.assertFalse(scraper.fetch_stock_detail("MMM:EGX", "suid", "aut", directory=self.path("pages")))
+        self.assertEqual(scraper.fetch_owned_securities("suid", "aut"), [])
+
+    def test_replays_recordings_without_session_tokens(self):
+        response = MagicMock(status_code=200, text="<h1 class='stock-name'>Recorded for abc123</h1>", headers={})
+        with Recorder(self.path("recordings")) as recorder:
+            recorder.record("GET", "https://bourstad.example/Transaction/Transaction?suid=abc123&aut=tok&Symbol=MMM:EGX", response)
+        self.assertEqual(request_key("GET", "/Transaction/Transaction?Symbol=MMM:EGX&aut=x"), "GET /Transaction/Transaction?Symbol=MMM%3AEGX")
+
+        self.start()
+        scraper.fetch_stock_detail("MMM:EGX", "other", "session", directory=self.path("pages"))
+        self.assertEqual(scraper.parse_stock_file(self.path("pages", "MMM:EGX.html"))["name"], "Recorded for replay")
+
+    def test_map_bourstad_to_yfinance(self):
+        self.assertEqual(scraper.map_bourstad_to_yfinance("AAV:CA"), "AAV.TO")
+        self.assertEqual(scraper.map_bourstad_to_yfinance("AGF.B:CA"), "AGF-B.TO")
+        self.assertEqual(scraper.map_bourstad_to_yfinance("ADBE:EGX"), "ADBE")
+        self.assertEqual(scraper.map_bourstad_to_yfinance("ABBV"), "ABBV")
+
+    def test_enhanced_record_uses_the_yahoo_symbol(self):
+        info = {"exchangeTimezoneName": "America/Toronto", "currentPrice": 12.5}
+        with patch.object(scraper, "yahoo_info", return_value=info) as yahoo_info:
+            record = scraper.fetch_enhanced_stock_record("AGF.B:CA")
+        yahoo_info.assert_called_once_with("AGF-B.TO")
+        self.assertEqual((record["Symbol"], record["Current Price"]), ("AGF.B:CA", 12.5))
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+from bourstad import screener as screener_module
+from bourstad.universe import Universe
+from bourstad.screener import Screener, ScreenerError, compile_query, tokenize
+
+RECORDS = [
+    {"Symbol": "AAA", "Name": "A", "Current Price": 10, "P/E Ratio": 12, "Dividend Yield": 4.0, "52-Week Low": 9.5, "52-Week High": 20, "Volume": 200, "Average Volume (10d)": 100},
+    {"Symbol": "BBB", "Name": "B", "Current Price": 50, "P/E Ratio": 40, "Dividend Yield": 1.0, "52-Week Low": 20, "52-Week High": 55, "Volume": 50, "Average Volume (10d)": 100},
+    {"Symbol": "CCC", "Name": "C", "Current Price": 30, "P/E Ratio": "N/A", "Dividend Yield": 6.0, "52-Week Low": 29, "52-Week High": 60, "Volume": 300, "Average Volume (10d)": 100},
+    {"Symbol": "DDD", "Name": "D", "Current Price": 5, "P/E Ratio": 8, "Dividend Yield": 3.5, "52-Week Low": 2, "52-Week High": 6, "Volume": 10, "Average Volume (10d)": 100},
+]
+
+class TestScreener(unittest.TestCase):
+    def setUp(self):
+        self.screener = Screener(Universe.from_records(RECORDS))
+
+    def symbols(self, query, **kwargs):
+        return self.screener.screen(query, **kwargs)["Symbol"].tolist()
+
+    def test_predicates(self):
+        self.assertEqual(self.symbols("pe < 15 and yield > 3"), ["AAA", "DDD"])
+        self.assertEqual(self.symbols("pct_from_low < 10"), ["AAA", "CCC"])
+        self.assertEqual(self.symbols("volume > average_volume_10d"), ["AAA", "CCC"])
+        self.assertEqual(self.symbols("not (pe < 15) or price * 2 >= 100"), ["BBB"])
+
+    def test_missing_values_never_match(self):
+        self.assertNotIn("CCC", self.symbols("pe < 100"))
+        self.assertNotIn("CCC", self.symbols("pe >= 0"))
+        self.assertEqual(self.symbols("not pe > 15"), ["AAA", "DDD"])
+        self.assertEqual(self.symbols("not not pe < 10"), ["DDD"])
+        self.assertEqual(self.symbols("pe != 12"), ["BBB", "DDD"])
+        self.assertEqual(self.symbols("not (price > 20 and yield > 3)"), ["AAA", "BBB", "DDD"])
+
+    def test_compiled_queries_are_bounded(self):
+        with patch.object(screener_module, "MAX_COMPILED", 2):
+            for query in ["pe < 1", "pe < 2", "pe < 1", "pe < 3"]:
+                self.screener.screen(query)
+        self.assertEqual(list(self.screener._compiled), ["pe < 1", "pe < 3"])
+
+    def test_sorting_uses_precomputed_indexes(self):
+        self.assertEqual(self.symbols("", sort_by="pe"), ["DDD", "AAA", "BBB", "CCC"])
+        self.assertEqual(self.symbols("", sort_by="pe", descending=True), ["BBB", "AAA", "DDD", "CCC"])
+        self.assertEqual(self.symbols("yield > 2", sort_by="price", descending=True, limit=2), ["CCC", "AAA"])
+        self.assertIn(("current_price", True), self.screener._sort_index)
+
+    def test_errors(self):
+        for query in ["pe <", "price and yield", "unknown > 3", "pe < 3)", "pe $ 3"]:
+            with self.assertRaises(ScreenerError, msg=query):
+                self.screener.screen(query)
+
+    def test_tokenize_and_compile(self):
+        self.assertEqual(tokenize("PE<=1.5e2"), [("name", "pe"), ("op", "<="), ("number", 150.0)])
+        mask = compile_query("-price > -6")({"current_price": np.array([5.0, 7.0])})
+        self.assertEqual(mask.tolist(), [True, False])
+
+if __name__ == '__main__':
+    unittest.main()
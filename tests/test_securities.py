@@ -0,0 +1,34 @@
+import unittest
+from bourstad.securities import SecurityIndex
+
+STOCKS = [
+    {"id": "", "name": "Choisir"},
+    {"id": "BNS:CA", "name": "Bank of Nova Scotia"},
+    {"id": "BAC:EGX", "name": "Bank of America"},
+    {"id": "AAV:CA", "name": "Advantage Energy"},
+]
+
+class TestSecurityIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SecurityIndex(STOCKS)
+
+    def test_empty_ids_are_dropped(self):
+        self.assertEqual(len(self.index), 3)
+
+    def test_search_matches_every_word(self):
+        self.assertEqual(self.index.search("bank")['id'].tolist(), ["BNS:CA", "BAC:EGX"])
+        self.assertEqual(self.index.search("BANK :ca")['id'].tolist(), ["BNS:CA"])
+        self.assertEqual(len(self.index.search("")), 3)
+        self.assertTrue(self.index.search("nothing").empty)
+
+    def test_page(self):
+        page, pages = SecurityIndex.page(self.index.frame, 2, 2)
+        self.assertEqual(pages, 2)
+        self.assertEqual(page['id'].tolist(), ["AAV:CA"])
+        page, pages = SecurityIndex.page(self.index.frame, 9, 2)  # Clamped to the last page
+        self.assertEqual(page['id'].tolist(), ["AAV:CA"])
+        page, pages = SecurityIndex.page(self.index.search("nothing"), 1, 25)
+        self.assertEqual((len(page), pages), (0, 1))
+
+if __name__ == '__main__':
+    unittest.main()
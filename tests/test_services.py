@@ -0,0 +1,77 @@
+import time
+import unittest
+from unittest.mock import patch
+from bourstad import services
+from bourstad.alerts import AlertEngine, MemorySink, universe_rules
+from bourstad.universe import QuoteRecord
+from tests.helpers import run_concurrently
+
+class TestSharedCache(unittest.TestCase):
+    def test_ttl_and_none_results(self):
+        cache = services.SharedCache()
+        self.assertEqual(cache.get_or_compute("a", 60, lambda: 1), 1)
+        self.assertEqual(cache.get_or_compute("a", 60, lambda: 2), 1)
+        cache.set("b", 1, ttl=-1)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNone(cache.get_or_compute("c", 60, lambda: None))
+        self.assertEqual(cache.get_or_compute("c", 60, lambda: 3), 3)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_concurrent_misses_share_one_computation_per_cache(self):
+        caches = [services.SharedCache(), services.SharedCache()]
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return "value"
+        results = run_concurrently(lambda index: caches[index % 2].get_or_compute("key", 60, slow), 8)
+        self.assertEqual(results, ["value"] * 8)
+        # One computation per cache: the same key in another cache is another value
+        self.assertEqual(len(calls), 2)
+        self.assertEqual([cache.stats()["coalesced"] for cache in caches], [3, 3])
+
+    def test_lru_eviction(self):
+        cache = services.SharedCache(max_entries=2)
+        cache.set("a", 1, 60)
+        cache.set("b", 2, 60)
+        cache.get("a")
+        cache.set("c", 3, 60)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+
+class TestFetchService(unittest.TestCase):
+    def test_concurrent_sessions_share_one_quote_fetch(self):
+        def slow_quote(symbol):
+            time.sleep(0.2)
+            return QuoteRecord(symbol, symbol, current_price=1.0)
+        service = services.FetchService()
+        with patch.object(services, "fetch_quote", side_effect=slow_quote) as mock_fetch:
+            results = run_concurrently(lambda index: service.quote("AAV:CA"), 10)
+            service.quote("AAV:CA")
+        self.assertEqual(mock_fetch.call_count, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_holdings_are_isolated_per_session(self):
+        holdings = {
+            ("u1", "t1"): [{"Symbol": "AAA", "Quantity": 1, "Average Price": 10.0, "Current Price": 20.0}],
+            ("u2", "t2"): [{"Symbol": "BBB", "Quantity": 2}],
+        }
+        sink = MemorySink()
+        service = services.FetchService(alerts=AlertEngine(universe_rules(), [sink]))
+        with patch.object(services, "fetch_owned_securities", side_effect=lambda suid, aut: holdings.get((suid, aut), [])) as mock_fetch:
+            self.assertEqual(service.owned_securities("u1", "t1")[0]["Symbol"], "AAA")
+            self.assertEqual(service.owned_securities("u2", "t2")[0]["Symbol"], "BBB")
+            # A session cannot read cached holdings without the matching token
+            self.assertEqual(service.owned_securities("u1", "wrong"), [])
+
+            # Callers get copies, so one session cannot alter another's view
+            service.owned_securities("u1", "t1")[0]["Quantity"] = 99
+            self.assertEqual(service.owned_securities("u1", "t1")[0]["Quantity"], 1)
+        self.assertEqual(mock_fetch.call_count, 3)
+        # Holding rules and their events stay out of the engine shared by every session
+        self.assertEqual(service.alerts.rules_for("AAA"), service.alerts.rules_for("ZZZ"))
+        self.assertEqual(sink.latest(), [])
+
+if __name__ == '__main__':
+    unittest.main()
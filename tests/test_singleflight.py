@@ -0,0 +1,86 @@
+import os
+import json
+import time
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+import pandas as pd
+from bourstad import scraper, upstream
+from bourstad.atomic import write_json_atomic
+from bourstad.singleflight import SingleFlight
+from tests.helpers import run_concurrently
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return "value"
+        results = run_concurrently(lambda index: flight.do("key", slow), 8)
+        self.assertEqual(results, ["value"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.shared, 7)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_errors_are_shared_and_not_remembered(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError("boom")
+        with self.assertRaises(ValueError):
+            flight.do("key", fail)
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+
+class TestFetchCoalescing(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = patch.object(scraper, "CACHE_DIR", self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def slow_ticker(self, symbol):
+        time.sleep(0.2)
+        ticker = MagicMock()
+        ticker.info = {"symbol": symbol, "currentPrice": 10.0}
+        return ticker
+
+    def test_concurrent_cache_misses_share_one_request(self):
+        with patch.object(upstream.yf, "Ticker", side_effect=self.slow_ticker) as mock_ticker:
+            results = run_concurrently(lambda index: scraper.fetch_with_cache("AAV.TO"), 8)
+            # Later callers are served from the cache file
+            self.assertEqual(scraper.fetch_with_cache("AAV.TO")["currentPrice"], 10.0)
+        self.assertEqual(mock_ticker.call_count, 1)
+        self.assertTrue(all(result == {"symbol": "AAV.TO", "currentPrice": 10.0} for result in results))
+        self.assertEqual(os.listdir(self.tmp.name), ["AAV.TO.json"])
+
+    def test_different_symbols_are_not_coalesced(self):
+        with patch.object(upstream.yf, "Ticker", side_effect=self.slow_ticker) as mock_ticker:
+            run_concurrently(lambda index: scraper.fetch_with_cache(f"S{index % 2}"), 4)
+        self.assertEqual(mock_ticker.call_count, 2)
+
+    def test_highlights_callers_get_their_own_frame(self):
+        def slow_fetch(symbols, selected_date):
+            time.sleep(0.2)
+            return pd.DataFrame([{"Symbol": "AAA", "Change (%)": 1.0}])
+        with patch.object(scraper, "_fetch_highlights_data", side_effect=slow_fetch) as mock_fetch:
+            frames = run_concurrently(lambda index: scraper.fetch_highlights_data(["AAA"], pd.Timestamp("2025-04-02")), 4)
+        self.assertEqual(mock_fetch.call_count, 1)
+        frames[0].loc[0, "Change (%)"] = 99.0
+        self.assertEqual(frames[1].loc[0, "Change (%)"], 1.0)
+
+class TestAtomicWrites(unittest.TestCase):
+    def test_concurrent_writers_never_tear_the_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "AAV.TO.json")
+            payloads = [{"writer": index, "data": "x" * 100_000} for index in range(8)]
+            run_concurrently(lambda index: write_json_atomic(path, payloads[index]), 8)
+            with open(path) as file:
+                self.assertIn(json.load(file), payloads)
+            self.assertEqual(os.listdir(tmp), ["AAV.TO.json"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import math
+import unittest
+import numpy as np
+import pandas as pd
+from bourstad.universe import QuoteRecord, Universe
+from bourstad.analyzer import analyze_stocks
+
+RECORDS = [
+    {"Symbol": "AAPL", "Name": "Apple Inc.", "Current Price": 105, "52-Week High": 200, "52-Week Low": 100, "P/E Ratio": 12, "Dividend Yield": 0.04},
+    {"Symbol": "MSFT", "Name": "Microsoft Corp.", "Current Price": 150, "52-Week High": 200, "52-Week Low": 100, "P/E Ratio": 35, "Dividend Yield": "N/A"},
+    {"Symbol": "GOOGL", "Name": "Alphabet Inc.", "Current Price": "N/A", "52-Week High": 200, "52-Week Low": 100},
+]
+
+class TestUniverse(unittest.TestCase):
+    def test_sentinels_become_nan(self):
+        quote = QuoteRecord.from_dict(RECORDS[2])
+        self.assertTrue(math.isnan(quote.current_price))
+        self.assertEqual(quote.to_dict()["Current Price"], "N/A")
+        with self.assertRaises(AttributeError):
+            quote.extra = 1
+
+    def test_from_info_keeps_only_known_fields(self):
+        quote = QuoteRecord.from_info("AAPL", {"longName": "Apple Inc.", "currentPrice": 190.5, "sector": "Technology"})
+        self.assertEqual(quote.name, "Apple Inc.")
+        self.assertEqual(quote.current_price, 190.5)
+        self.assertTrue(math.isnan(quote.volume))
+
+    def test_columns_and_index(self):
+        universe = Universe.from_records(RECORDS)
+        self.assertEqual(len(universe), 3)
+        self.assertEqual(universe.index["MSFT"], 1)
+        self.assertEqual(universe.column("current_price").dtype, np.float64)
+        self.assertTrue(np.isnan(universe.column("current_price")[2]))
+        self.assertEqual(universe.get("AAPL").pe_ratio, 12)
+        self.assertIsNone(universe.get("TSLA"))
+
+    def test_upsert(self):
+        universe = Universe.from_records(RECORDS)
+        universe.upsert(QuoteRecord("MSFT", "Microsoft Corp.", current_price=160))
+        universe.upsert(QuoteRecord("TSLA", "Tesla", current_price=250))
+        self.assertEqual(universe.get("MSFT").current_price, 160)
+        self.assertEqual(universe.index["TSLA"], 3)
+        self.assertEqual(len(universe.column("volume")), 4)
+
+    def test_upsert_grows_columns_in_batches(self):
+        universe = Universe()
+        copies = 0
+        previous = universe.column("current_price")
+        for number in range(1000):
+            universe.upsert(QuoteRecord(f"S{number}", current_price=number))
+            column = universe.column("current_price")
+            copies += not np.shares_memory(column, previous)
+            previous = column
+        self.assertLessEqual(copies, 6)
+        np.testing.assert_array_equal(universe.column("current_price"), np.arange(1000))
+        self.assertEqual(universe.to_frame()["Current Price"].iloc[-1], 999)
+        self.assertEqual(universe.get("S500").current_price, 500)
+
+    def test_frame_round_trip(self):
+        frame = Universe.from_records(RECORDS).to_frame()
+        self.assertIsInstance(frame, pd.DataFrame)
+        self.assertEqual(Universe.from_records(frame).symbols, ["AAPL", "MSFT", "GOOGL"])
+
+    def test_analyze_stocks_handles_sentinels(self):
+        recommendations = analyze_stocks(RECORDS)
+        self.assertEqual(recommendations, [
+            "Apple Inc. (AAPL): Strong Buy - Near 52-week low.",
+            "Apple Inc. (AAPL): Buy - Strong fundamentals (Low P/E and High Dividend).",
+            "Microsoft Corp. (MSFT): Hold - Trading within a stable range.",
+            "Microsoft Corp. (MSFT): Sell - Overvalued (High P/E).",
+            "Alphabet Inc. (GOOGL): Neutral - Insufficient data.",
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import time
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from bourstad import pipeline, workers
+from bourstad.panel import PricePanel
+from tests.test_ohlcv import fake_history
+
+STOCKS = [{'id': 'AAPL', 'name': 'Apple'}, {'id': 'MSFT', 'name': 'Microsoft'}, {'id': 'NVDA', 'name': 'Nvidia'}]
+
+def crashing_worker(queue_path, stocks_dir, wait, run):
+    # Dies holding a fresh lease, which would otherwise only run out after LEASE_SECONDS
+    workers.WorkQueue(queue_path).lease(workers.worker_name(), run=run)
+    os._exit(1)
+
+class TestWorkQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.queue = workers.WorkQueue(os.path.join(self.tmp.name, "queue.sqlite"))
+
+    def test_each_shard_is_leased_once(self):
+        self.assertEqual(self.queue.enqueue("run", ["fetched"], ["A", "B", "C"], shard_size=2), 2)
+        first = self.queue.lease("w1")
+        second = self.queue.lease("w2")
+        self.assertEqual((first["symbols"], second["symbols"]), (["A", "B"], ["C"]))
+        self.assertIsNone(self.queue.lease("w3"))
+
+        self.assertTrue(self.queue.complete(first["id"], "w1", {"A": {"fetched": None}}))
+        self.assertEqual(self.queue.unmerged("run"), [(first["id"], {"A": {"fetched": None}})])
+        self.assertEqual(self.queue.counts("run"), {"done": 1, "leased": 1})
+
+    def test_expired_lease_moves_to_another_worker(self):
+        self.queue.enqueue("run", ["fetched"], ["A"])
+        shard = self.queue.lease("dead", lease_seconds=-1)
+        retaken = self.queue.lease("alive")
+        self.assertEqual((retaken["id"], retaken["attempts"]), (shard["id"], 2))
+        # The first worker can no longer report back
+        self.assertFalse(self.queue.heartbeat(shard["id"], "dead"))
+        self.assertFalse(self.queue.complete(shard["id"], "dead", {}))
+        self.assertTrue(self.queue.complete(shard["id"], "alive", {}))
+
+    def test_reclaim_expired_and_dead_workers(self):
+        self.queue.enqueue("run", ["fetched"], ["A", "B", "C"], shard_size=1)
+        self.queue.lease(workers.worker_prefix(123) + "abc")
+        self.queue.lease("alive")
+        self.queue.lease("expired", lease_seconds=-1)
+        self.assertEqual(self.queue.reclaim("run", [workers.worker_prefix(123)]), 2)
+        self.assertEqual(self.queue.counts("run"), {"pending": 2, "leased": 1})
+
+    def test_gives_up_after_max_attempts(self):
+        self.queue.enqueue("run", ["fetched"], ["A"])
+        for attempt in range(workers.MAX_ATTEMPTS):
+            shard = self.queue.lease(f"w{attempt}")
+            self.queue.release(shard["id"], f"w{attempt}", "boom")
+        self.assertIsNone(self.queue.lease("w"))
+        self.assertEqual(self.queue.counts(), {"failed": 1})
+
+class TestShardedRun(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.makedirs('data')
+        os.makedirs('stocks')
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, self.cwd)
+        self.patch(workers, "POLL_INTERVAL", 0.05)
+        self.patch(workers, "load_local_stocks", lambda: STOCKS)
+        self.patch(workers, "fetch_and_parse_stocks", lambda email, password: ([], 'suid', 'aut'))
+        self.patch(pipeline, "fetch_enhanced_stock_record", lambda symbol: {'Symbol': symbol, 'Current Price': 1.0})
+        self.patch(pipeline, "download_history", fake_history)
+        self.fetched = []
+        self.patch(workers, "fetch_stock_detail", self.fetch)
+
+    def patch(self, target, name, value):
+        patcher = patch.object(target, name, value)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fetch(self, symbol, suid, aut, directory, archive=None, session=None):
+        self.fetched.append(symbol)
+        if symbol == 'NVDA':
+            return False
+        with open(os.path.join(directory, f"{symbol}.html"), 'w', encoding='utf-8') as file:
+            file.write("<html></html>")
+        return True
+
+    def run_with_workers(self, count, **kwargs):
+        threads = []
+        queue = workers.WorkQueue("data/work_queue.sqlite")
+        # Stand-ins for workers on other machines, joining once the run is queued
+        def start():
+            while not queue.counts().get("pending"):
+                time.sleep(0.01)
+            for _ in range(count):
+                thread = threading.Thread(target=workers.run_worker, args=("data/work_queue.sqlite", "stocks"))
+                thread.start()
+                threads.append(thread)
+        threading.Thread(target=start).start()
+        manifest = workers.run_sharded(workers=0, stocks_dir="stocks", history_db="data/history.sqlite", shard_size=1, **kwargs)
+        for thread in threads:
+            thread.join()
+        return manifest
+
+    def test_workers_share_the_run_and_results_reach_the_manifest(self):
+        manifest = self.run_with_workers(2)
+        self.assertEqual(sorted(self.fetched), ['AAPL', 'MSFT', 'NVDA'])
+        self.assertEqual(pipeline.summarize(manifest), {'listed': 3, 'fetched': 2, 'parsed': 2, 'enriched': 2})
+        self.assertEqual(manifest['symbols']['MSFT']['enriched'], {'Symbol': 'MSFT', 'Current Price': 1.0})
+        self.assertTrue(os.path.exists(pipeline.REAL_TIME_DATA_FILE))
+        self.assertEqual(sorted(PricePanel().symbols), ['AAPL', 'MSFT'])
+
+        # Only the failed symbol is queued again
+        self.fetched.clear()
+        manifest = self.run_with_workers(1, resume=True)
+        self.assertEqual(self.fetched, ['NVDA'])
+        self.assertEqual(pipeline.summarize(manifest)['fetched'], 2)
+
+    def test_run_ends_when_local_workers_die(self):
+        self.patch(workers, "run_worker", crashing_worker)
+        manifest = workers.run_sharded(workers=1, stocks_dir="stocks", history_db="data/history.sqlite", shard_size=1)
+        self.assertEqual(pipeline.summarize(manifest)['fetched'], 0)
+        counts = workers.WorkQueue("data/work_queue.sqlite").counts()
+        # The first shard was given up on; none is left leased to a dead worker
+        self.assertEqual((counts.get("failed"), counts.get("leased")), (1, None))
+
+if __name__ == '__main__':
+    unittest.main()